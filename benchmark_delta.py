@@ -0,0 +1,179 @@
+"""
+Benchmark for VeriFrame delta uploads
+
+Compares uploading a binary delta against the previous revision with
+uploading the full payload. Without files, a synthetic base is generated and
+edited (inserts, deletions and overwrites) to produce the new revision.
+--suite runs the standard cases, including a heavily changed file and a
+multi-GB one (the latter needs about 12 GB of temporary disk space).
+
+Usage:
+    python benchmark_delta.py --size-mb 512 --edits 20
+    python benchmark_delta.py --size-mb 64 --overwrite-percent 45
+    python benchmark_delta.py --suite
+    python benchmark_delta.py --base old.blend --target new.blend --ipfs-api http://127.0.0.1:5001
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import filecmp
+import tempfile
+import argparse
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Benchmark VeriFrame delta uploads")
+    parser.add_argument("--base", help="Previous revision (synthetic if omitted)")
+    parser.add_argument("--target", help="New revision (synthetic if omitted)")
+    parser.add_argument("--size-mb", type=int, default=256, help="Size of the synthetic base")
+    parser.add_argument("--edits", type=int, default=10, help="Number of synthetic edits")
+    parser.add_argument("--overwrite-percent", type=float, default=0.0, help="Share of the synthetic base overwritten in 64 KiB runs")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic files")
+    parser.add_argument("--suite", action="store_true", help="Run the standard synthetic cases")
+    parser.add_argument("--ipfs-api", help="Time real uploads against this IPFS API URL")
+    parser.add_argument("--bandwidth", type=float, default=10.0, help="MB/s used to estimate upload times without --ipfs-api")
+    return parser.parse_args()
+
+def write_random(f, size, rng):
+    """Write size pseudo-random bytes in chunks"""
+    while size:
+        chunk = rng.randbytes(min(size, 4 * 1024 * 1024))
+        f.write(chunk)
+        size -= len(chunk)
+
+# Standard synthetic cases: (size in MB, edits, percent overwritten)
+SUITE = [
+    (256, 10, 0.0),
+    (64, 10, 45.0),
+    (4096, 40, 0.0),
+    (4096, 40, 10.0),
+]
+OVERWRITE_RUN = 65536
+
+def make_synthetic(temp_dir, size, edits, seed, overwrite_percent=0.0):
+    """Write a random base file and a copy with scattered edits, streaming both"""
+    rng = random.Random(seed)
+    base_path = os.path.join(temp_dir, "base.blend")
+    target_path = os.path.join(temp_dir, "target.blend")
+    
+    with open(base_path, 'wb') as f:
+        write_random(f, size, rng)
+    
+    # Each edit is (offset, bytes removed from the base, bytes inserted)
+    plan = [(rng.randrange(size), rng.choice((0, 0, 4096, 65536)), rng.choice((0, 512, 65536, 1024 * 1024)))
+            for _ in range(edits)]
+    runs = int(size * overwrite_percent / 100 / OVERWRITE_RUN)
+    plan += [(run * OVERWRITE_RUN, OVERWRITE_RUN, OVERWRITE_RUN)
+             for run in rng.sample(range(size // OVERWRITE_RUN), runs)]
+    plan.sort()
+    
+    with open(base_path, 'rb') as base, open(target_path, 'wb') as out:
+        position = 0
+        for offset, removed, inserted in plan:
+            if offset < position:
+                continue
+            copy_bytes(base, out, offset - position)
+            base.seek(min(offset + removed, size))
+            position = base.tell()
+            write_random(out, inserted, rng)
+        shutil.copyfileobj(base, out)
+    
+    return base_path, target_path
+
+def copy_bytes(src, dst, length):
+    """Copy length bytes from src to dst in chunks"""
+    while length > 0:
+        chunk = src.read(min(length, 4 * 1024 * 1024))
+        if not chunk:
+            break
+        dst.write(chunk)
+        length -= len(chunk)
+
+def time_upload(ipfs, path, bandwidth):
+    """Seconds to upload path: measured with ipfs, else estimated from bandwidth"""
+    if ipfs is None:
+        return os.path.getsize(path) / (bandwidth * 1024 * 1024), "estimated"
+    start = time.perf_counter()
+    if not ipfs.upload_file(path):
+        raise RuntimeError(f"Upload of {path} failed")
+    return time.perf_counter() - start, "measured"
+
+def run_case(args, temp_dir, base_path, target_path):
+    """Compute, verify and time a delta against a full upload"""
+    from veriframe_addon import delta
+    from veriframe_addon.utils import IPFSManager, format_file_size
+    
+    signature_path = os.path.join(temp_dir, "base.sig")
+    delta_path = os.path.join(temp_dir, "target.delta")
+    
+    start = time.perf_counter()
+    delta.write_signature(base_path, signature_path)
+    signature_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    stats = delta.compute_delta(signature_path, target_path, delta_path, os.path.join(temp_dir, "target.sig"))
+    if stats is None:
+        print(f"Delta aborted after {time.perf_counter() - start:.3f}s: "
+              f"the target is mostly new bytes or too slow to scan, a full upload would be used")
+        return True
+    
+    rebuilt_path = os.path.join(temp_dir, "rebuilt.blend")
+    start = time.perf_counter()
+    delta.apply_delta(base_path, delta_path, rebuilt_path)
+    apply_seconds = time.perf_counter() - start
+    if not filecmp.cmp(target_path, rebuilt_path, shallow=False):
+        print("ERROR: rebuilt file differs from the target")
+        return False
+    os.remove(rebuilt_path)
+    
+    ipfs = IPFSManager(args.ipfs_api, "") if args.ipfs_api else None
+    full_seconds, mode = time_upload(ipfs, target_path, args.bandwidth)
+    delta_seconds, _ = time_upload(ipfs, delta_path, args.bandwidth)
+    
+    throughput = stats.target_size / stats.seconds / (1024 * 1024) if stats.seconds else 0
+    print(f"Signature of base   {signature_seconds:7.3f}s  ({format_file_size(os.path.getsize(signature_path))})")
+    print(f"Delta computation   {stats.seconds:7.3f}s  ({throughput:.0f} MB/s)")
+    print(f"Delta apply         {apply_seconds:7.3f}s")
+    print(f"Target size         {format_file_size(stats.target_size)}")
+    print(f"Delta size          {format_file_size(stats.delta_size)} "
+          f"({100.0 * stats.delta_size / max(stats.target_size, 1):.2f}%, "
+          f"{format_file_size(stats.literal_bytes)} literal)")
+    print(f"Full upload         {full_seconds:7.3f}s ({mode})")
+    print(f"Delta upload        {stats.seconds + delta_seconds:7.3f}s including computation ({mode})")
+    return True
+
+def run_benchmark():
+    """Run the given revisions, one synthetic case or the whole suite"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    
+    args = parse_args()
+    if args.base and args.target:
+        cases = [None]
+    elif args.suite:
+        cases = SUITE
+    else:
+        cases = [(args.size_mb, args.edits, args.overwrite_percent)]
+    
+    ok = True
+    for case in cases:
+        temp_dir = tempfile.mkdtemp()
+        try:
+            if case is None:
+                base_path, target_path = args.base, args.target
+            else:
+                size_mb, edits, overwrite_percent = case
+                print(f"\nGenerating {size_mb} MB synthetic revisions with {edits} edits"
+                      f" and {overwrite_percent:g}% overwritten")
+                base_path, target_path = make_synthetic(temp_dir, size_mb * 1024 * 1024, edits, args.seed,
+                                                        overwrite_percent)
+            ok = run_case(args, temp_dir, base_path, target_path) and ok
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    return ok
+
+if __name__ == "__main__":
+    if not run_benchmark():
+        sys.exit(1)
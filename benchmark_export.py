@@ -0,0 +1,106 @@
+"""
+Benchmark for VeriFrame blend file preparation
+
+Compares the targeted export (bpy.data.libraries.write) against the legacy
+full copy (pack_all + save_as_mainfile) on the currently loaded file.
+
+Usage:
+    blender -b shot.blend --python benchmark_export.py -- --runs 3
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+
+import bpy
+
+def parse_args():
+    """Parse arguments passed after Blender's '--' separator"""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Benchmark VeriFrame blend preparation")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per method")
+    parser.add_argument("--engine", default="CYCLES", help="Engine override to apply")
+    parser.add_argument("--format", default="PNG", help="Output format override to apply")
+    return parser.parse_args(argv)
+
+def session_state():
+    """Capture the parts of the open file the export must not touch"""
+    scene = bpy.context.scene
+    return {
+        'engine': scene.render.engine,
+        'format': scene.render.image_settings.file_format,
+        'packed_images': sorted(img.name for img in bpy.data.images if img.packed_file),
+        'is_dirty': bpy.data.is_dirty,
+    }
+
+def time_method(prepare, render_settings, runs, revert):
+    """Run a preparation method several times and collect durations and sizes"""
+    durations = []
+    size = 0
+    
+    for _ in range(runs):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            output_path = os.path.join(temp_dir, "job.blend")
+            start = time.perf_counter()
+            if not prepare(output_path, render_settings):
+                raise RuntimeError(f"{prepare.__name__} failed")
+            durations.append(time.perf_counter() - start)
+            size = os.path.getsize(output_path)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        
+        if revert:
+            # The legacy path packs images into the open file, so reload it
+            # to keep every run measuring the same amount of work
+            bpy.ops.wm.revert_mainfile()
+    
+    return durations, size
+
+def report(name, durations, size):
+    """Print a summary line for one method"""
+    from veriframe_addon.utils import format_file_size
+    
+    best = min(durations)
+    mean = sum(durations) / len(durations)
+    print(f"{name:<18} best {best:7.3f}s  mean {mean:7.3f}s  size {format_file_size(size)}")
+
+def run_benchmark():
+    """Benchmark both preparation paths on the loaded file"""
+    from veriframe_addon.utils import BlenderJobManager
+    
+    args = parse_args()
+    render_settings = {'engine': args.engine, 'format': args.format}
+    
+    if not bpy.data.filepath:
+        print("ERROR: open a saved .blend file to benchmark")
+        return False
+    
+    print(f"Benchmarking {bpy.data.filepath} ({args.runs} runs per method)")
+    
+    # Targeted export first: it must leave the session exactly as it found it
+    before = session_state()
+    export_durations, export_size = time_method(
+        BlenderJobManager.export_blend_file, render_settings, args.runs, revert=False
+    )
+    after = session_state()
+    
+    if before != after:
+        print(f"ERROR: targeted export modified the session: {before} -> {after}")
+        return False
+    
+    copy_durations, copy_size = time_method(
+        BlenderJobManager.prepare_blend_file, render_settings, args.runs, revert=True
+    )
+    
+    report("libraries.write", export_durations, export_size)
+    report("save_as_mainfile", copy_durations, copy_size)
+    print(f"Speedup: {min(copy_durations) / min(export_durations):.2f}x")
+    return True
+
+if __name__ == "__main__":
+    if not run_benchmark():
+        sys.exit(1)
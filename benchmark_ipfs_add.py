@@ -0,0 +1,398 @@
+"""
+Benchmark for VeriFrame `ipfs add` parameters
+
+Uploads a set of files (ideally successive revisions of real blend files,
+e.g. a .blend and its .blend1 backups) once per add configuration and
+reports add throughput and the dedup ratio: bytes uploaded over the unique
+block bytes the node has to store for all of them.
+
+By default the uploads go through IPFSManager.upload_file to a local
+stand-in for the node's /api/v0/add, so no IPFS daemon is needed. It
+chunks, lays out and hashes files like the node does for fixed-size
+chunking; for Rabin and buzhash it cuts content-defined blocks with a gear
+hash using the same minimum, average and maximum sizes, so dedup ratios are
+representative but CIDs differ from the node's. It always hashes with
+sha2-256. With --ipfs-api the same uploads go to a real node, and the
+unique blocks of every root are counted with refs and block/stat.
+
+Without files, a synthetic base and an edited revision are generated.
+
+Usage:
+    python benchmark_ipfs_add.py shot.blend shot.blend1 shot.blend2
+    python benchmark_ipfs_add.py --size-mb 64 --config size-262144 --config rabin,raw,v1
+    python benchmark_ipfs_add.py --ipfs-api http://127.0.0.1:5001 shot.blend shot.blend1
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import tempfile
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CONFIGS = [
+    "size-262144",
+    "size-262144,raw,v1",
+    "size-65536,raw,v1",
+    "size-1048576,raw,v1",
+    "rabin,raw,v1",
+    "buzhash,raw,v1",
+    "size-262144,raw,v1,trickle",
+]
+
+# The node's own parameters for its plain "rabin" and "buzhash" chunkers
+RABIN_AVERAGE = 256 * 1024
+BUZHASH_MIN = 128 * 1024
+BUZHASH_MAX = 512 * 1024
+BUZHASH_MASK_BITS = 17
+TRICKLE_DEPTH_REPEAT = 4
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Benchmark VeriFrame ipfs add parameters")
+    parser.add_argument("files", nargs="*", help="Files to upload, in order (synthetic revisions if omitted)")
+    parser.add_argument("--config", action="append", dest="configs",
+                        help="Add configuration: a chunker (size-<bytes>, rabin[-min-avg-max], buzhash) followed by "
+                             "any of raw, v1, trickle, pin, hash=<function>; repeatable")
+    parser.add_argument("--size-mb", type=int, default=64, help="Size of the synthetic base")
+    parser.add_argument("--edits", type=int, default=10, help="Number of synthetic edits")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic files")
+    parser.add_argument("--ipfs-api", help="Benchmark this IPFS API instead of the local stand-in")
+    return parser.parse_args()
+
+def parse_config(text):
+    """AddOptions for a configuration string such as 'rabin,raw,v1'"""
+    from veriframe_addon.utils import AddOptions
+    
+    chunker, *flags = text.split(",")
+    options = AddOptions(chunker=chunker, pin=False)
+    for flag in flags:
+        if flag == "raw":
+            options = options._replace(raw_leaves=True)
+        elif flag == "v1":
+            options = options._replace(cid_version=1)
+        elif flag == "trickle":
+            options = options._replace(trickle=True)
+        elif flag == "pin":
+            options = options._replace(pin=True)
+        elif flag.startswith("hash="):
+            options = options._replace(hash_function=flag[5:])
+        else:
+            raise ValueError(f"Unknown flag {flag!r} in {text!r}")
+    return options
+
+class FixedChunker:
+    """Blocks of a fixed size, like the node's size-<bytes>"""
+    
+    def __init__(self, size):
+        self.size = size
+        self._pending = bytearray()
+    
+    def update(self, data):
+        self._pending += data
+        chunks = []
+        offset = 0
+        while len(self._pending) - offset >= self.size:
+            chunks.append(bytes(self._pending[offset:offset + self.size]))
+            offset += self.size
+        del self._pending[:offset]
+        return chunks
+    
+    def finish(self):
+        return [bytes(self._pending)] if self._pending else []
+
+class GearChunker:
+    """Content-defined blocks: cut where a gear rolling hash has its low bits clear"""
+    
+    def __init__(self, minimum, maximum, mask_bits):
+        rng = random.Random(0)
+        self.gear = [rng.getrandbits(64) for _ in range(256)]
+        self.minimum = minimum
+        self.maximum = maximum
+        self.mask = (1 << mask_bits) - 1
+        self._pending = bytearray()
+    
+    def _cut(self):
+        """Length of the next block in the buffer, or None if more data is needed"""
+        data = self._pending
+        end = min(len(data), self.maximum)
+        if end <= self.minimum:
+            return None
+        
+        # The hash only depends on the last 64 bytes, so skip most of the minimum
+        gear, mask = self.gear, self.mask
+        h = 0
+        for i in range(max(0, self.minimum - 64), end):
+            h = ((h << 1) + gear[data[i]]) & 0xFFFFFFFFFFFFFFFF
+            if i >= self.minimum and not h & mask:
+                return i + 1
+        return end if end == self.maximum else None
+    
+    def update(self, data):
+        self._pending += data
+        chunks = []
+        while True:
+            length = self._cut()
+            if length is None:
+                return chunks
+            chunks.append(bytes(self._pending[:length]))
+            del self._pending[:length]
+    
+    def finish(self):
+        return [bytes(self._pending)] if self._pending else []
+
+def make_chunker(spec):
+    """Stand-in chunker for the node's chunker string"""
+    if spec.startswith("size-"):
+        return FixedChunker(int(spec[5:]))
+    if spec == "buzhash":
+        return GearChunker(BUZHASH_MIN, BUZHASH_MAX, BUZHASH_MASK_BITS)
+    if spec.startswith("rabin"):
+        sizes = [int(value) for value in spec.split("-")[1:]]
+        if len(sizes) == 1:
+            average = sizes[0]
+            sizes = [average // 3, average, average + average // 2]
+        minimum, average, maximum = sizes or (RABIN_AVERAGE // 3, RABIN_AVERAGE, RABIN_AVERAGE + RABIN_AVERAGE // 2)
+        return GearChunker(minimum, maximum, max(1, (average - minimum).bit_length() - 1))
+    raise ValueError(f"Unsupported chunker {spec!r}")
+
+class StandInNode:
+    """In-process HTTP server answering /api/v0/add, keeping every block it was sent"""
+    
+    def __init__(self):
+        self.blocks = {}  # CID bytes -> block size
+        self._lock = threading.Lock()
+        node = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                url = urlparse(self.path)
+                if url.path != "/api/v0/add":
+                    self.send_error(404)
+                    return
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                boundary = self.headers.get_param('boundary')
+                name, root, tsize = node.add(_multipart_content(_request_body(self), boundary), params)
+                body = json.dumps({'Name': name, 'Hash': str(root), 'Size': str(tsize)}).encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+    
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def add(self, content, params):
+        """Chunk and lay out one file; content yields the file name, then its bytes"""
+        from veriframe_addon import cid
+        
+        cid_version = int(params.get('cid-version', 0))
+        raw_leaves = params.get('raw-leaves', 'false') == 'true'
+        chunker = make_chunker(params.get('chunker', f"size-{cid.DEFAULT_CHUNK_SIZE}"))
+        
+        def store(block_cid, block):
+            with self._lock:
+                self.blocks[block_cid.to_bytes()] = len(block)
+            return block_cid
+        
+        def leaf(chunk):
+            if raw_leaves:
+                return store(cid.CID.for_block(chunk, cid.RAW, 1), chunk), len(chunk), len(chunk)
+            block = cid.encode_dag_pb([], cid.encode_unixfs_file(chunk, len(chunk)))
+            return store(cid.CID.for_block(block, cid.DAG_PB, cid_version), block), len(block), len(chunk)
+        
+        name = next(content)
+        leaves = []
+        for data in content:
+            leaves.extend(leaf(chunk) for chunk in chunker.update(data))
+        leaves.extend(leaf(chunk) for chunk in chunker.finish())
+        if not leaves:
+            leaves.append(leaf(b""))
+        
+        def parent(children):
+            filesize = sum(child[2] for child in children)
+            links = [cid.PBLink(child_cid, "", tsize) for child_cid, tsize, _ in children]
+            block = cid.encode_dag_pb(links, cid.encode_unixfs_file(b"", filesize, [child[2] for child in children]))
+            block_cid = store(cid.CID.for_block(block, cid.DAG_PB, cid_version), block)
+            return block_cid, len(block) + sum(child[1] for child in children), filesize
+        
+        if params.get('trickle', 'false') == 'true':
+            root = _trickle(leaves, parent, cid.DEFAULT_MAX_LINKS)
+        else:
+            nodes = leaves
+            while len(nodes) > 1:
+                nodes = [parent(nodes[i:i + cid.DEFAULT_MAX_LINKS]) for i in range(0, len(nodes), cid.DEFAULT_MAX_LINKS)]
+            root = nodes[0]
+        return name, root[0], root[1]
+    
+    def stored_bytes(self):
+        """Unique block bytes held for everything added so far"""
+        with self._lock:
+            return len(self.blocks), sum(self.blocks.values())
+
+def _trickle(leaves, parent, max_links):
+    """Trickle layout: a layer of leaves, then repeated subtrees of growing depth"""
+    position = 0
+    
+    def fill(max_depth):
+        nonlocal position
+        children = leaves[position:position + max_links]
+        position += len(children)
+        depth = 1
+        while (max_depth < 0 or depth < max_depth) and position < len(leaves):
+            for _ in range(TRICKLE_DEPTH_REPEAT):
+                if position >= len(leaves):
+                    break
+                children.append(fill(depth))
+            depth += 1
+        return parent(children)
+    
+    return fill(-1)
+
+def _request_body(handler):
+    """Yield the request body, undoing chunked transfer encoding"""
+    if handler.headers.get("Transfer-Encoding", "").lower() != "chunked":
+        remaining = int(handler.headers.get("Content-Length", 0))
+        while remaining:
+            data = handler.rfile.read(min(remaining, 1024 * 1024))
+            if not data:
+                return
+            remaining -= len(data)
+            yield data
+        return
+    
+    while True:
+        size = int(handler.rfile.readline().split(b";")[0], 16)
+        if size == 0:
+            handler.rfile.readline()
+            return
+        yield handler.rfile.read(size)
+        handler.rfile.readline()
+
+def _multipart_content(body, boundary):
+    """Yield the file name of the first part of a multipart body, then its bytes"""
+    delimiter = f"\r\n--{boundary}".encode('utf-8')
+    buffer = bytearray()
+    for data in body:
+        buffer += data
+        end = buffer.find(b"\r\n\r\n")
+        if end >= 0:
+            break
+    else:
+        raise ValueError("Multipart body ended before the part headers")
+    
+    headers = bytes(buffer[:end]).decode('utf-8', 'replace')
+    name = headers.partition('filename="')[2].partition('"')[0]
+    yield name
+    del buffer[:end + 4]
+    
+    for data in body:
+        buffer += data
+        found = buffer.find(delimiter)
+        if found >= 0:
+            yield bytes(buffer[:found])
+            return
+        # Hold back what could be the start of the delimiter
+        keep = len(delimiter) - 1
+        if len(buffer) > keep:
+            yield bytes(buffer[:-keep])
+            del buffer[:-keep]
+    
+    found = buffer.find(delimiter)
+    if found < 0:
+        raise ValueError("Multipart body ended before its closing boundary")
+    yield bytes(buffer[:found])
+
+def node_stored_bytes(api_url, roots):
+    """Unique blocks and bytes of the DAGs under roots, as held by a real node"""
+    import requests
+    
+    blocks = set()
+    for root in roots:
+        response = requests.post(f"{api_url}/api/v0/refs", params={'arg': root, 'recursive': 'true', 'unique': 'true'},
+                                 timeout=600)
+        response.raise_for_status()
+        blocks.add(root)
+        for line in response.text.splitlines():
+            if line.strip():
+                blocks.add(json.loads(line)['Ref'])
+    
+    total = 0
+    for block in blocks:
+        response = requests.post(f"{api_url}/api/v0/block/stat", params={'arg': block}, timeout=60)
+        response.raise_for_status()
+        total += response.json()['Size']
+    return len(blocks), total
+
+def run_config(options, paths, api_url):
+    """Upload every path with one configuration; returns (seconds, block count, stored bytes)"""
+    from veriframe_addon.utils import IPFSManager
+    
+    stand_in = None if api_url else StandInNode()
+    try:
+        ipfs = IPFSManager(api_url or stand_in.url, "", options)
+        roots = []
+        start = time.perf_counter()
+        for path in paths:
+            root = ipfs.upload_file(path)
+            if not root:
+                raise RuntimeError(f"Upload of {path} failed")
+            roots.append(root)
+        seconds = time.perf_counter() - start
+        
+        if stand_in:
+            blocks, stored = stand_in.stored_bytes()
+        else:
+            blocks, stored = node_stored_bytes(api_url, roots)
+        return seconds, blocks, stored
+    finally:
+        if stand_in:
+            stand_in.close()
+
+def run_benchmark():
+    """Upload the files once per configuration and print throughput and dedup"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from veriframe_addon.utils import format_file_size
+    
+    args = parse_args()
+    configs = args.configs or DEFAULT_CONFIGS
+    temp_dir = tempfile.mkdtemp()
+    try:
+        paths = args.files
+        if not paths:
+            from benchmark_delta import make_synthetic
+            
+            print(f"Generating {args.size_mb} MB synthetic revisions with {args.edits} edits")
+            paths = list(make_synthetic(temp_dir, args.size_mb * 1024 * 1024, args.edits, args.seed))
+        
+        total = sum(os.path.getsize(path) for path in paths)
+        print(f"{len(paths)} file(s), {format_file_size(total)}, against "
+              f"{args.ipfs_api or 'the local stand-in (sha2-256 only)'}")
+        print(f"{'Configuration':<32} {'MB/s':>8} {'Blocks':>8} {'Stored':>12} {'Dedup':>7}")
+        
+        for config in configs:
+            seconds, blocks, stored = run_config(parse_config(config), paths, args.ipfs_api)
+            throughput = total / seconds / (1024 * 1024) if seconds else 0
+            print(f"{config:<32} {throughput:8.1f} {blocks:8d} {format_file_size(stored):>12} "
+                  f"{total / max(stored, 1):6.2f}x")
+        return True
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    if not run_benchmark():
+        sys.exit(1)
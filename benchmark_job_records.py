@@ -0,0 +1,156 @@
+"""
+Benchmark for VeriFrame job history records
+
+Compares the memory and the cost of common queries of a large job history
+kept as one dict per job (the previous JobTracker) with the column-backed
+JobTracker: typed arrays, status codes, epoch timestamps and interned CIDs.
+Jobs are synthetic: variants of one upload share a blend CID, every job has
+its own sidecar CID and completed jobs a result CID.
+
+Usage:
+    python benchmark_job_records.py --jobs 100000
+    python benchmark_job_records.py --jobs 20000 --group-size 1
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+
+BASE58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+VARIANTS = ("CYCLES PNG 128spp", "CYCLES EXR 512spp 50%", "EEVEE PNG", "CYCLES PNG 64spp f1-250")
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Benchmark VeriFrame job history records")
+    parser.add_argument("--jobs", type=int, default=100000, help="Number of jobs in the history")
+    parser.add_argument("--group-size", type=int, default=10, help="Jobs sharing one uploaded blend")
+    parser.add_argument("--lookups", type=int, default=200, help="Job lookups by ID to time")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic history")
+    return parser.parse_args()
+
+def fake_cid(rng):
+    return "Qm" + "".join(rng.choice(BASE58) for _ in range(44))
+
+def generate_jobs(count, group_size, seed):
+    """Yield job dicts as they would arrive from submissions, newest last"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    blend_hash = group_id = ""
+    for i in range(count):
+        if i % group_size == 0:
+            blend_hash = fake_cid(rng)
+            group_id = f"{rng.getrandbits(32):08x}" if group_size > 1 else ""
+        status = rng.choices(("PENDING", "IN_PROGRESS", "COMPLETED", "FAILED", "CANCELLED"), (5, 5, 80, 7, 3))[0]
+        yield {
+            'job_id': f"{i:08x}",
+            'status': status,
+            'reward': rng.choice((5.0, 10.0, 12.5, 20.0)),
+            'deadline': 24,
+            'ipfs_hash': fake_cid(rng),
+            # Built per job, as it would be when read back from Blender or JSON
+            'blend_hash': "".join(blend_hash),
+            'root_hash': "",
+            'result_hash': fake_cid(rng) if status == 'COMPLETED' else "",
+            'variant': "".join(VARIANTS[i % len(VARIANTS)]),
+            'group_id': "".join(group_id),
+            'submission_time': (start + timedelta(seconds=37 * i + rng.randrange(30))).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+def measure(build):
+    """Return (result, retained bytes, seconds) of build()"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, seconds
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+# The previous JobTracker: a list of dicts, scanned for every query
+def dict_status_counts(jobs):
+    counts = {}
+    for job in jobs:
+        counts[job['status']] = counts.get(job['status'], 0) + 1
+    return counts
+
+def dict_total_reward(jobs):
+    return sum(job['reward'] for job in jobs if job['status'] == 'COMPLETED')
+
+def dict_active(jobs):
+    return [job for job in jobs if job.get('status') in ['PENDING', 'IN_PROGRESS']]
+
+def dict_by_submission(jobs):
+    parsed = [(datetime.strptime(job['submission_time'], "%Y-%m-%d %H:%M:%S"), job['job_id']) for job in jobs]
+    return [job_id for _, job_id in sorted(parsed, reverse=True)]
+
+def dict_lookups(jobs, job_ids):
+    found = 0
+    for job_id in job_ids:
+        for job in jobs:
+            if job.get('job_id') == job_id:
+                found += 1
+                break
+    return found
+
+def run_benchmark():
+    """Build both representations of the same history and compare them"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from veriframe_addon.utils import JobTracker, format_file_size, _numpy
+    
+    args = parse_args()
+    rng = random.Random(args.seed + 1)
+    lookup_ids = [f"{rng.randrange(args.jobs):08x}" for _ in range(args.lookups)]
+    
+    print(f"{args.jobs} jobs, {args.group_size} per upload, NumPy {'available' if _numpy() else 'not available'}")
+    
+    dict_jobs, dict_bytes, dict_build = measure(lambda: list(generate_jobs(args.jobs, args.group_size, args.seed)))
+    
+    def build_tracker():
+        tracker = JobTracker()
+        for job in generate_jobs(args.jobs, args.group_size, args.seed):
+            tracker.add_job(job)
+        return tracker
+    
+    tracker, tracker_bytes, tracker_build = measure(build_tracker)
+    
+    rows = [
+        ("Memory", format_file_size(dict_bytes), format_file_size(tracker_bytes)),
+        ("Bytes per job", f"{dict_bytes / args.jobs:.0f}", f"{tracker_bytes / args.jobs:.0f}"),
+        ("Build (incl. generation)", f"{dict_build:.3f}s", f"{tracker_build:.3f}s"),
+    ]
+    
+    checks = [
+        ("Status counts", lambda: dict_status_counts(dict_jobs), tracker.status_counts),
+        ("Completed reward", lambda: dict_total_reward(dict_jobs), tracker.total_reward),
+        ("Active jobs", lambda: len(dict_active(dict_jobs)), lambda: len(tracker.get_active_jobs())),
+        ("Sort by submission", lambda: dict_by_submission(dict_jobs), tracker.job_ids_by_submission),
+        (f"{args.lookups} lookups by ID", lambda: dict_lookups(dict_jobs, lookup_ids),
+         lambda: sum(tracker.get_job(job_id) is not None for job_id in lookup_ids)),
+    ]
+    for name, dict_query, tracker_query in checks:
+        dict_result, dict_seconds = timed(dict_query)
+        tracker_result, tracker_seconds = timed(tracker_query)
+        if name == "Status counts":
+            tracker_result = {status: count for status, count in tracker_result.items() if count}
+        if dict_result != tracker_result:
+            print(f"ERROR: {name} differs between the representations")
+            return 1
+        rows.append((name, f"{dict_seconds:.4f}s", f"{tracker_seconds:.4f}s"))
+    
+    print(f"{'':26} {'dict per job':>14} {'columns':>14}")
+    for name, dict_value, tracker_value in rows:
+        print(f"{name:26} {dict_value:>14} {tracker_value:>14}")
+    print(f"Memory saved: {1 - tracker_bytes / dict_bytes:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(run_benchmark())
@@ -0,0 +1,131 @@
+"""
+Startup benchmark for the VeriFrame addon
+
+Measures what enabling the addon costs every Blender start: importing the
+package, register(), and which modules that pulls in. Fails when enabling
+takes longer than the threshold or loads a module that must stay lazy
+(networking and mesh modules are only needed once a job is submitted).
+
+Usage:
+    blender -b --factory-startup --python benchmark_startup.py -- --runs 5 --max-enable-ms 150
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib
+import importlib.abc
+import statistics
+
+ADDON = "veriframe_addon"
+
+# Modules that enabling the addon must not import
+LAZY_MODULES = ("requests", "urllib3", "bmesh", "ssl", "http.client", "concurrent.futures")
+
+def parse_args():
+    """Parse arguments passed after Blender's '--' separator"""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Benchmark VeriFrame addon startup")
+    parser.add_argument("--runs", type=int, default=5, help="Warm enable/disable cycles after the cold one")
+    parser.add_argument("--max-enable-ms", type=float, default=150.0, help="Fail if the cold enable takes longer")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    return parser.parse_args(argv)
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """Records the inclusive execution time of every module imported while installed"""
+    
+    def __init__(self):
+        self.times = {}
+    
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, self.times)
+                return spec
+        return None
+    
+    def __enter__(self):
+        sys.meta_path.insert(0, self)
+        return self
+    
+    def __exit__(self, *exc):
+        sys.meta_path.remove(self)
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader, times):
+        self._loader = loader
+        self._times = times
+    
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+    
+    def exec_module(self, module):
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._times[module.__name__] = time.perf_counter() - start
+    
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+def enable():
+    """Import and register the addon, returning (module, import seconds, register seconds)"""
+    start = time.perf_counter()
+    addon = importlib.import_module(ADDON)
+    imported = time.perf_counter()
+    addon.register()
+    return addon, imported - start, time.perf_counter() - imported
+
+def disable(addon):
+    """Unregister the addon and forget its modules so the next enable imports them again"""
+    addon.unregister()
+    for name in [name for name in sys.modules if name == ADDON or name.startswith(ADDON + ".")]:
+        del sys.modules[name]
+
+def run_benchmark():
+    """Time a cold enable and several warm ones, and check what they import"""
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    
+    before = set(sys.modules)
+    with ImportTimer() as timer:
+        addon, import_seconds, register_seconds = enable()
+    loaded = set(sys.modules) - before
+    disable(addon)
+    
+    warm = []
+    for _ in range(args.runs):
+        addon, warm_import, warm_register = enable()
+        warm.append(warm_import + warm_register)
+        disable(addon)
+    
+    cold_ms = (import_seconds + register_seconds) * 1000
+    external = sorted(name for name in loaded if name.split('.')[0] != ADDON)
+    print(f"Cold enable      {cold_ms:8.1f} ms (import {import_seconds * 1000:.1f} ms, register {register_seconds * 1000:.1f} ms)")
+    if warm:
+        print(f"Warm enable      {statistics.median(warm) * 1000:8.1f} ms (median of {len(warm)})")
+    print(f"Modules imported {len(loaded)} ({len(external)} outside the addon)")
+    
+    print("Slowest imports (inclusive):")
+    for name, seconds in sorted(timer.times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {seconds * 1000:8.2f} ms  {name}")
+    
+    ok = True
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    if eager:
+        print(f"FAIL: enabling the addon imported {', '.join(eager)}")
+        ok = False
+    if cold_ms > args.max_enable_ms:
+        print(f"FAIL: cold enable took {cold_ms:.1f} ms, limit is {args.max_enable_ms:.1f} ms")
+        ok = False
+    return ok
+
+if __name__ == "__main__":
+    if not run_benchmark():
+        sys.exit(1)
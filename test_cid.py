@@ -0,0 +1,97 @@
+"""
+Known-vector checks for the VeriFrame CID and UnixFS code
+Runs with plain Python or pytest (no Blender needed): python test_cid.py
+"""
+
+import os
+import sys
+import hashlib
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from veriframe_addon.cid import CID, DAG_PB, UnixFSFileBuilder, StreamVerifier, VerificationError
+
+def file_cid(data: bytes, **options) -> str:
+    builder = UnixFSFileBuilder(**options)
+    builder.update(data)
+    return str(builder.finish())
+
+def test_single_chunk_files():
+    """Roots that `ipfs add` prints for small files"""
+    print("Testing single-chunk file CIDs...")
+    
+    vectors = [
+        (b"", "QmbFMke1KXqnYyBBWxB74N4c5SBnJMVAiMNRcGu6x1AwQH"),
+        (b"hello world\n", "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o"),
+    ]
+    for data, expected in vectors:
+        actual = file_cid(data)
+        assert actual == expected, f"{data!r} gave {actual}, expected {expected}"
+    
+    print("✅ Single-chunk file CIDs match ipfs add")
+
+def test_multi_chunk_file():
+    """A file split into three chunks, against dag-pb blocks encoded by hand"""
+    print("Testing a multi-chunk file CID...")
+    
+    # Leaves: PBNode{Data: UnixFS{Type: File, Data: chunk, filesize}}
+    leaves = [
+        bytes.fromhex("0a0a" "0802" "1204" "61626364" "1804"),  # "abcd"
+        bytes.fromhex("0a0a" "0802" "1204" "65666768" "1804"),  # "efgh"
+        bytes.fromhex("0a08" "0802" "1202" "696a" "1802"),  # "ij"
+    ]
+    # Root: one PBLink{Hash, Name: "", Tsize} per leaf, then UnixFS{Type: File, filesize: 10, blocksizes: 4, 4, 2}
+    root = b""
+    for leaf in leaves:
+        multihash = bytes.fromhex("1220") + hashlib.sha256(leaf).digest()
+        link = bytes.fromhex("0a22") + multihash + bytes.fromhex("1200") + bytes((0x18, len(leaf)))
+        root += bytes((0x12, len(link))) + link
+    unixfs = bytes.fromhex("0802" "180a" "2004" "2004" "2002")
+    root += bytes((0x0a, len(unixfs))) + unixfs
+    expected = str(CID(0, DAG_PB, hashlib.sha256(root).digest()))
+    
+    builder = UnixFSFileBuilder(chunk_size=4)
+    # Uneven writes: chunking must not depend on how the data arrives
+    for part in (b"abc", b"defghi", b"j"):
+        builder.update(part)
+    actual = str(builder.finish())
+    assert actual == expected, f"Multi-chunk root is {actual}, expected {expected}"
+    assert builder.tsize == len(root) + sum(len(leaf) for leaf in leaves), f"Multi-chunk tsize is {builder.tsize}"
+    
+    print("✅ Multi-chunk file CID matches the hand-encoded DAG")
+
+def test_stream_verifier():
+    """A stream of several default-size chunks verifies against its root and fails on one changed byte"""
+    print("Testing streaming verification...")
+    
+    data = bytes(range(256)) * 2400  # 600 KiB: three 256 KiB chunks
+    root = CID.decode(file_cid(data))
+    
+    verifier = StreamVerifier(root)
+    verifier.update(data)
+    verifier.finish()
+    
+    verifier = StreamVerifier(root)
+    verifier.update(data[:300000] + b"\xff" + data[300001:])
+    try:
+        verifier.finish()
+    except VerificationError:
+        pass
+    else:
+        raise AssertionError("Corrupted stream accepted")
+    
+    print("✅ Streaming verification accepts the file and rejects a corrupted copy")
+
+def run(tests) -> int:
+    """Run test functions outside pytest; the exit status is non-zero if any failed"""
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ ERROR: {test.__name__}: {e}")
+            failed += 1
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(run([test_single_chunk_files, test_multi_chunk_file, test_stream_verifier]))
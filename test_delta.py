@@ -0,0 +1,112 @@
+"""
+Known-vector checks for the VeriFrame binary delta format
+Runs with plain Python or pytest (no Blender needed): python test_delta.py
+"""
+
+import os
+import sys
+import random
+import struct
+import hashlib
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from veriframe_addon.delta import write_signature, compute_delta, apply_delta
+from test_cid import run
+
+def write_file(directory: str, name: str, data: bytes) -> str:
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+def read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_apply_known_delta():
+    """A vfdelta1 file encoded by hand: copy block 1, three literal bytes, copy block 0"""
+    print("Testing delta apply...")
+    
+    base = b"A" * 4096 + b"B" * 4096 + b"C" * 100
+    expected = b"B" * 4096 + b"xyz" + b"A" * 4096
+    header = b"VFDELTA1" + struct.pack('<QI', len(base), 4096)
+    body = b"C" + struct.pack('<II', 1, 1) + b"L" + struct.pack('<I', 3) + b"xyz" + b"C" + struct.pack('<II', 0, 1)
+    end = b"E" + struct.pack('<Q', len(expected)) + hashlib.blake2b(expected, digest_size=32).digest()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        base_path = write_file(directory, "base", base)
+        output_path = os.path.join(directory, "output")
+        apply_delta(base_path, write_file(directory, "delta", header + body + end), output_path)
+        assert read_file(output_path) == expected, "Applied delta does not give the expected bytes"
+        
+        # A wrong checksum or a different base must be refused
+        bad_end = end[:-1] + bytes((end[-1] ^ 1,))
+        for name, delta_base, delta in (("checksum", base_path, header + body + bad_end),
+                                        ("base", write_file(directory, "other", base + b"!"), header + body + end)):
+            try:
+                apply_delta(delta_base, write_file(directory, "bad", delta), output_path)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"Delta with a wrong {name} was applied")
+    
+    print("✅ Hand-encoded delta applies, and bad checksums and bases are refused")
+
+def test_round_trip():
+    """Delta of an edited file against its previous revision rebuilds it, mostly from copies"""
+    print("Testing delta round trip...")
+    
+    rng = random.Random(7)
+    base = bytes(rng.getrandbits(8) for _ in range(300000))
+    # Bytes inserted (shifting everything after them), overwritten and removed
+    target = base[:100000] + b"inserted" * 125 + base[100000:200000] + b"\0" * 64 + base[200064:290000]
+    
+    with tempfile.TemporaryDirectory() as directory:
+        base_path = write_file(directory, "base", base)
+        target_path = write_file(directory, "target", target)
+        signature_path = os.path.join(directory, "base.sig")
+        delta_path = os.path.join(directory, "delta")
+        write_signature(base_path, signature_path)
+        stats = compute_delta(signature_path, target_path, delta_path)
+        assert stats is not None, "Delta was abandoned for a mostly unchanged file"
+        
+        output_path = os.path.join(directory, "output")
+        apply_delta(base_path, delta_path, output_path)
+        assert read_file(output_path) == target, "Round trip does not rebuild the target"
+        assert stats.delta_size <= len(target) // 10, f"Delta is {stats.delta_size} bytes for a {len(target)}-byte file"
+    
+    print(f"✅ Round trip rebuilds the target from a {stats.delta_size}-byte delta")
+
+def test_long_edits():
+    """An insert several blocks long and an overwrite of aligned blocks, which the scan hops over"""
+    print("Testing delta of long edits...")
+    
+    rng = random.Random(11)
+    base = rng.randbytes(400000)
+    block_size = 4096
+    inserted = rng.randbytes(5 * block_size + 123)
+    overwritten = rng.randbytes(2 * block_size)
+    target = base[:50000] + inserted + base[50000:49 * block_size] + overwritten + base[51 * block_size:]
+    
+    with tempfile.TemporaryDirectory() as directory:
+        base_path = write_file(directory, "base", base)
+        signature_path = os.path.join(directory, "base.sig")
+        delta_path = os.path.join(directory, "delta")
+        write_signature(base_path, signature_path)
+        stats = compute_delta(signature_path, write_file(directory, "target", target), delta_path)
+        assert stats is not None, "Delta was abandoned for a mostly unchanged file"
+        
+        output_path = os.path.join(directory, "output")
+        apply_delta(base_path, delta_path, output_path)
+        assert read_file(output_path) == target, "Round trip does not rebuild the target"
+        
+        # Hopping may leave a few blocks around each edit as literals, not the rest of the file
+        changed = len(inserted) + len(overwritten)
+        assert stats.literal_bytes <= changed + 10 * block_size, f"{stats.literal_bytes} literal bytes for {changed} changed"
+    
+    print(f"✅ Long edits give {stats.literal_bytes} literal bytes of {len(target)}")
+
+if __name__ == "__main__":
+    sys.exit(run([test_apply_known_delta, test_round_trip, test_long_edits]))
@@ -0,0 +1,102 @@
+"""
+Opt-in check of real multicall submissions against starknet-devnet
+Runs with plain Python or pytest once a devnet is up; skipped otherwise: python test_devnet.py
+
+Needs starknet-py and a devnet with the job registry deployed:
+    VERIFRAME_DEVNET_URL=http://127.0.0.1:5050 VERIFRAME_DEVNET_CONTRACT=0x... python test_devnet.py
+The first predeployed account signs, unless VERIFRAME_DEVNET_ACCOUNT and
+VERIFRAME_PRIVATE_KEY name another one.
+"""
+
+import os
+import sys
+import uuid
+import importlib.util
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from veriframe_addon import multicall
+from veriframe_addon.config import PRIVATE_KEY_ENV, MULTICALL_MAX_CALLS, MIN_REWARD_AMOUNT
+from veriframe_addon.utils import StarknetManager, SUBMITTED
+from test_cid import run
+
+DEVNET_URL = os.environ.get("VERIFRAME_DEVNET_URL", "")
+DEVNET_CONTRACT = os.environ.get("VERIFRAME_DEVNET_CONTRACT", "")
+
+def skip(reason: str):
+    """Skip under pytest; with plain Python just say so"""
+    if "pytest" in sys.modules:
+        import pytest
+        pytest.skip(reason)
+    print(f"⏭️  Skipped: {reason}")
+
+def rpc(method: str, params=None):
+    import requests
+    
+    response = requests.post(DEVNET_URL, json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}},
+                             timeout=30)
+    response.raise_for_status()
+    body = response.json()
+    assert 'error' not in body, f"{method} failed: {body.get('error')}"
+    return body['result']
+
+def devnet_account():
+    """(address, private key) of the signing account"""
+    address = os.environ.get("VERIFRAME_DEVNET_ACCOUNT")
+    private_key = os.environ.get(PRIVATE_KEY_ENV)
+    if address and private_key:
+        return address, private_key
+    account = rpc("devnet_getPredeployedAccounts")[0]
+    return account['address'], account['private_key']
+
+def test_chunked_multicall():
+    """More jobs than fit one transaction land in several batches, each job with the ID of its own event"""
+    print("Testing a chunked multicall on devnet...")
+    
+    if not DEVNET_URL or not DEVNET_CONTRACT:
+        skip("set VERIFRAME_DEVNET_URL and VERIFRAME_DEVNET_CONTRACT to run against starknet-devnet")
+        return
+    if importlib.util.find_spec("starknet_py") is None:
+        skip("starknet-py is not installed")
+        return
+    
+    address, private_key = devnet_account()
+    previous_key = os.environ.get(PRIVATE_KEY_ENV)
+    os.environ[PRIVATE_KEY_ENV] = private_key
+    try:
+        # Distinct CIDs, so every job can be told apart in the events
+        jobs = [(f"Qm{uuid.uuid4().hex}{index:012d}", MIN_REWARD_AMOUNT, 1)
+                for index in range(MULTICALL_MAX_CALLS + 5)]
+        calls = [multicall.submit_job_call(DEVNET_CONTRACT, *job) for job in jobs]
+        assert len(multicall.chunk_calls(calls)) > 1, "Jobs fit one transaction; nothing is chunked"
+        
+        starknet = StarknetManager(DEVNET_URL, DEVNET_CONTRACT)
+        submissions = starknet.submit_jobs(jobs, address)
+    finally:
+        if previous_key is None:
+            os.environ.pop(PRIVATE_KEY_ENV, None)
+        else:
+            os.environ[PRIVATE_KEY_ENV] = previous_key
+    
+    assert submissions is not None, "Jobs could not be encoded"
+    states = {submission.state for submission in submissions}
+    assert states == {SUBMITTED}, f"Submissions ended as {states}"
+    
+    # Jobs of one transaction are consecutive, and their IDs follow its events in call order
+    batches = {}
+    for index, submission in enumerate(submissions):
+        batches.setdefault(submission.tx_hash, []).append(index)
+    assert len(batches) > 1, "All jobs went out in one transaction"
+    for tx_hash, indices in batches.items():
+        assert indices == list(range(indices[0], indices[-1] + 1)), f"Jobs of {tx_hash} are not consecutive"
+        receipt = rpc("starknet_getTransactionReceipt", {"transaction_hash": tx_hash})
+        job_ids = multicall.job_ids_from_events(receipt['events'], DEVNET_CONTRACT, len(indices))
+        assert [submissions[index].job_id for index in indices] == job_ids, f"Job IDs of {tx_hash} are out of order"
+    
+    job_ids = [submission.job_id for submission in submissions]
+    assert len(set(job_ids)) == len(job_ids), "Job IDs repeat"
+    
+    print(f"✅ {len(jobs)} jobs landed in {len(batches)} transactions with their own job IDs")
+
+if __name__ == "__main__":
+    sys.exit(run([test_chunked_multicall]))
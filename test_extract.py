@@ -0,0 +1,115 @@
+"""
+Known-layout checks for the VeriFrame streaming archive extraction
+Runs with plain Python or pytest (no Blender needed): python test_extract.py
+"""
+
+import io
+import os
+import sys
+import gzip
+import struct
+import tarfile
+import zipfile
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from veriframe_addon.extract import ArchiveSink, FrameTarget, ExtractionError
+from test_cid import run
+
+FILES = {
+    "frames/frame_0001.png": b"\x89PNG frame one" * 100,
+    "frames/frame_0002.png": bytes(range(256)) * 40,
+    "logs/render.txt": b"Rendered 2 frames\n",
+}
+
+class _Unseekable(io.RawIOBase):
+    """Write-only stream, so zipfile streams its entries with data descriptors"""
+    
+    def __init__(self):
+        self.data = bytearray()
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self.data += data
+        return len(data)
+
+def extract(archive: bytes, chunk_size: int = 7):
+    """Stream archive into a scratch folder in small chunks; returns {name: bytes} of what came out"""
+    with tempfile.TemporaryDirectory() as directory:
+        sink = ArchiveSink(FrameTarget(directory), os.path.join(directory, "fallback"))
+        for offset in range(0, len(archive), chunk_size):
+            sink.write(archive[offset:offset + chunk_size])
+        sink.close()
+        
+        files = {}
+        for root, _, names in os.walk(directory):
+            for name in names:
+                path = os.path.join(root, name)
+                with open(path, 'rb') as f:
+                    files[os.path.relpath(path, directory).replace(os.sep, '/')] = f.read()
+        return files
+
+def streamed_zip(files, compression) -> bytes:
+    stream = _Unseekable()
+    with zipfile.ZipFile(stream, 'w', compression) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return bytes(stream.data)
+
+def test_zip_data_descriptor():
+    """Deflated zip entries whose sizes and CRC only follow the data"""
+    print("Testing zip entries with data descriptors...")
+    
+    data = streamed_zip(FILES, zipfile.ZIP_DEFLATED)
+    
+    # General purpose flag bit 3: sizes and CRC are in a descriptor after the data
+    flags, = struct.unpack('<H', data[6:8])
+    assert flags & 0x08, "zipfile did not write a data descriptor"
+    
+    files = extract(data)
+    assert files == FILES, f"Zip extracted to {sorted(files)}"
+    
+    # A stored entry with a descriptor cannot be delimited while streaming: it must be refused, not misread,
+    # and the sink keeps the error so the caller can fall back to keeping the archive
+    stored = streamed_zip(FILES, zipfile.ZIP_STORED)
+    with tempfile.TemporaryDirectory() as directory:
+        sink = ArchiveSink(FrameTarget(directory), os.path.join(directory, "fallback"))
+        try:
+            sink.write(stored)
+            sink.close()
+        except ExtractionError as e:
+            assert sink.error is e, "Sink did not record the extraction error"
+        else:
+            raise AssertionError("Stored entry with a data descriptor was accepted")
+    
+    print("✅ Zip entries with data descriptors extract intact")
+
+def test_pax_tar():
+    """A gzipped pax tar whose names only fit in pax extended headers"""
+    print("Testing pax tar archives...")
+    
+    files = dict(FILES)
+    files["frames/" + "long_folder_name/" * 8 + "frame_0003.png"] = b"beyond the 100-byte ustar name field"
+    files["frames/café_0004.png"] = b"non-ASCII name"
+    
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz', format=tarfile.PAX_FORMAT) as archive:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = 1700000000.5  # fractional: written as a pax record
+            archive.addfile(info, io.BytesIO(data))
+    data = buffer.getvalue()
+    
+    assert b"path=" in gzip.decompress(data), "tarfile did not write a pax path record"
+    
+    extracted = extract(data)
+    assert extracted == files, f"Tar extracted to {sorted(extracted)}"
+    
+    print("✅ Pax tar entries extract under their full names")
+
+if __name__ == "__main__":
+    sys.exit(run([test_zip_data_descriptor, test_pax_tar]))
@@ -0,0 +1,115 @@
+"""
+Checks of the VeriFrame IPFS client against a fake Kubo HTTP API
+Runs with plain Python or pytest (no Blender or IPFS node needed): python test_ipfs.py
+"""
+
+import os
+import sys
+import json
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from veriframe_addon.car import JobPackage
+from veriframe_addon.utils import IPFSManager, AddOptions
+from test_cid import run
+
+class FakeEndpoint:
+    """Local HTTP server answering POSTs with respond(path, query, body) -> (status, body text)
+    
+    Every request is kept in requests as (path, query, body). Use as a context manager.
+    """
+    
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+        endpoint = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                url = urlsplit(self.path)
+                body = self._body()
+                query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                endpoint.requests.append((url.path, query, body))
+                status, text = endpoint.respond(url.path, query, body)
+                data = text.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def _body(self) -> bytes:
+                if self.headers.get('Transfer-Encoding', '').lower() != 'chunked':
+                    return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                body = b""
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0], 16)
+                    if not size:
+                        self.rfile.readline()
+                        return body
+                    body += self.rfile.read(size)
+                    self.rfile.readline()
+            
+            def log_message(self, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+    
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+def package() -> JobPackage:
+    job_package = JobPackage()
+    job_package.add_bytes("scene.blend", b"BLENDER" * 50000)
+    job_package.add_bytes("job_0.json", b'{"overrides": {}}')
+    return job_package
+
+def test_unpinned_import():
+    """Without pinning the node reports no roots: a clean response is success"""
+    print("Testing an unpinned DAG import...")
+    
+    job_package = package()
+    with FakeEndpoint(lambda path, query, body: (200, "")) as node:
+        ipfs = IPFSManager(node.url, node.url, AddOptions(pin=False))
+        assert ipfs.import_car(job_package) == job_package.root, "Unpinned import was not accepted"
+    
+    path, query, body = node.requests[0]
+    assert path == "/api/v0/dag/import" and query.get('pin-roots') == 'false', f"Import sent as {path} {query}"
+    assert len(body) >= job_package.car_size, "The CAR was not sent"
+    
+    print("✅ Unpinned import returns the package root")
+
+def test_pinned_import():
+    """With pinning the root must be reported, and pin errors or stream errors fail the import"""
+    print("Testing pinned DAG imports...")
+    
+    job_package = package()
+    root_line = json.dumps({'Root': {'Cid': {'/': job_package.root}, 'PinErrorMsg': ""}})
+    pin_error = json.dumps({'Root': {'Cid': {'/': job_package.root}, 'PinErrorMsg': "out of space"}})
+    stream_error = json.dumps({'Message': "unexpected EOF", 'Code': 0, 'Type': 'error'})
+    cases = [
+        (root_line + "\n", job_package.root),
+        ("", None),  # pinning was asked for but nothing was reported
+        (pin_error + "\n", None),
+    ]
+    for text, expected in cases:
+        with FakeEndpoint(lambda path, query, body: (200, text)) as node:
+            ipfs = IPFSManager(node.url, node.url, AddOptions(pin=True))
+            assert ipfs.import_car(job_package) == expected, f"Response {text!r} gave the wrong result"
+    
+    with FakeEndpoint(lambda path, query, body: (200, stream_error + "\n")) as node:
+        ipfs = IPFSManager(node.url, node.url, AddOptions(pin=False))
+        assert ipfs.import_car(job_package) is None, "Error line was ignored"
+    
+    print("✅ Pinned imports need their root; pin and stream errors are failures")
+
+if __name__ == "__main__":
+    sys.exit(run([test_unpinned_import, test_pinned_import]))
@@ -0,0 +1,60 @@
+"""
+Known-vector checks for the VeriFrame Starknet encoding (Keccak, selectors, calldata)
+Runs with plain Python or pytest (no Blender needed): python test_multicall.py
+"""
+
+import os
+import sys
+import hashlib
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from veriframe_addon.multicall import keccak256, get_selector, encode_byte_array, encode_u256
+from test_cid import run
+
+def test_keccak():
+    """Keccak-256 of the empty string, and SHA3-256 padding against hashlib across the rate boundary"""
+    print("Testing Keccak-256...")
+    
+    expected = "c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470"
+    assert keccak256(b"").hex() == expected, f"keccak256('') is {keccak256(b'').hex()}"
+    
+    # The 136-byte rate: inputs just below, at and above it take one or two blocks
+    for length in (0, 1, 135, 136, 137, 272, 500):
+        data = bytes(i % 251 for i in range(length))
+        assert keccak256(data, padding=0x06) == hashlib.sha3_256(data).digest(), \
+            f"SHA3-256 of {length} bytes differs from hashlib"
+    
+    print("✅ Keccak-256 matches the known digest and hashlib's SHA3-256")
+
+def test_selectors():
+    """Selectors every Starknet tool agrees on"""
+    print("Testing selectors...")
+    
+    vectors = [
+        ("transfer", 0x83afd3f4caedc6eebf44246fe54e38c95e3179a5ec9ea81740eca5b482d12e),
+        ("__execute__", 0x15d40a3d6ca2ac30f4031e42be28da9b056fef9bb7357ac5e85627ee876e5ad),
+        ("Transfer", 0x99cd8bde557814842a3121e8ddfd433a539b8c9f14bf31ebf108d12e6196e9),
+    ]
+    for name, expected in vectors:
+        assert get_selector(name) == expected, f"Selector of {name} is {hex(get_selector(name))}, expected {hex(expected)}"
+    
+    print("✅ Selectors match")
+
+def test_calldata_encoding():
+    """Cairo ByteArray and u256 layouts"""
+    print("Testing calldata encoding...")
+    
+    assert encode_byte_array("hello") == [0, 0x68656c6c6f, 5], f"ByteArray of 'hello' is {encode_byte_array('hello')}"
+    
+    # A CIDv0 is 46 bytes: one full 31-byte word and 15 pending bytes
+    cid = "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o"
+    expected = [1, int.from_bytes(cid[:31].encode(), 'big'), int.from_bytes(cid[31:].encode(), 'big'), 15]
+    assert encode_byte_array(cid) == expected, f"ByteArray of a CID is {encode_byte_array(cid)}"
+    
+    assert encode_u256(2 ** 128 + 5) == [5, 1], f"u256 of 2**128 + 5 is {encode_u256(2 ** 128 + 5)}"
+    
+    print("✅ ByteArray and u256 calldata match the Cairo layouts")
+
+if __name__ == "__main__":
+    sys.exit(run([test_keccak, test_selectors, test_calldata_encoding]))
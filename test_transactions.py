@@ -0,0 +1,135 @@
+"""
+Checks of VeriFrame nonce management and receipt tracking against a fake JSON-RPC node
+Runs with plain Python or pytest (no Blender or Starknet node needed): python test_transactions.py
+"""
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from veriframe_addon import transactions
+from veriframe_addon.config import RECEIPT_BATCH_SIZE
+from veriframe_addon.transactions import NonceManager, ReceiptTracker, TransactionFailed, TransactionUnconfirmed
+from test_ipfs import FakeEndpoint
+from test_cid import run
+
+class FakeNode:
+    """Receipts by transaction hash; hashes not in receipts answer "not found" until added"""
+    
+    def __init__(self):
+        self.receipts = {}
+        self.batches = []
+    
+    def respond(self, path, query, body):
+        batch = json.loads(body)
+        self.batches.append(len(batch))
+        responses = []
+        for request in batch:
+            receipt = self.receipts.get(request['params']['transaction_hash'])
+            if receipt is None:
+                responses.append({"jsonrpc": "2.0", "id": request['id'],
+                                  "error": {"code": transactions.TXN_HASH_NOT_FOUND, "message": "Transaction hash not found"}})
+            else:
+                responses.append({"jsonrpc": "2.0", "id": request['id'], "result": receipt})
+        # JSON-RPC allows batch responses in any order
+        return 200, json.dumps(responses[::-1])
+
+def receipt(execution_status='SUCCEEDED', finality_status='ACCEPTED_ON_L2', **fields):
+    return dict({'events': []}, execution_status=execution_status, finality_status=finality_status, **fields)
+
+def outcome(future, timeout=5):
+    try:
+        return future.result(timeout)
+    except (TransactionFailed, TransactionUnconfirmed) as e:
+        return type(e)
+
+def test_nonce_manager():
+    """Nonces are handed out locally, and a resync never goes back below one still in flight"""
+    print("Testing nonce management...")
+    
+    chain = [5]
+    nonces = NonceManager(lambda: chain[0])
+    assert [nonces.reserve() for _ in range(3)] == [5, 6, 7], "Nonces are not consecutive from the chain nonce"
+    
+    # Nonces 5-7 are in the mempool, so the chain still says 5
+    nonces.resync()
+    assert nonces.reserve() == 8, "Resync reused a nonce still in flight"
+    
+    # Another client sent from the account: the chain is ahead
+    chain[0] = 20
+    nonces.resync()
+    assert nonces.reserve() == 20, "Resync did not follow the chain ahead of the local nonce"
+    
+    # A failed send hands its nonce back, unless a later one was already reserved
+    nonces.release(20)
+    assert nonces.reserve() == 20, "Released nonce was not reused"
+    later = nonces.reserve()
+    nonces.release(20)
+    assert nonces.reserve() == later + 1, "Released a nonce below one still reserved"
+    
+    print("✅ Nonces are consecutive and resyncs take the larger of the chain and local nonce")
+
+def test_receipts():
+    """Succeeded, reverted, rejected, late and missing receipts"""
+    print("Testing receipt tracking...")
+    
+    node = FakeNode()
+    node.receipts["0x1"] = receipt(events=[{"data": ["0x7"]}])
+    node.receipts["0x2"] = receipt('REVERTED', revert_reason="out of gas")
+    node.receipts["0x3"] = receipt(finality_status='REJECTED')
+    with FakeEndpoint(node.respond) as endpoint:
+        tracker = ReceiptTracker(endpoint.url, poll_interval=0.05, max_interval=0.1, timeout=60)
+        nonces = transactions.get_nonces(endpoint.url, "0xabc", lambda: 0)
+        assert [nonces.reserve() for _ in range(3)] == [0, 1, 2]
+        
+        futures = {tx_hash: tracker.track(tx_hash) for tx_hash in ("0x1", "0x2", "0x3", "0x4")}
+        assert outcome(futures["0x1"])['events'] == [{"data": ["0x7"]}], "Succeeded receipt was not returned"
+        assert outcome(futures["0x2"]) is TransactionFailed, "Reverted transaction did not fail"
+        assert outcome(futures["0x3"]) is TransactionFailed, "Rejected transaction did not fail"
+        assert nonces._stale, "Rejected receipt did not resync the account nonce"
+        
+        # Not found yet: still pending, then settled once the node knows it
+        assert not futures["0x4"].done(), "Unknown transaction was settled"
+        node.receipts["0x4"] = receipt()
+        assert outcome(futures["0x4"])['execution_status'] == 'SUCCEEDED', "Late receipt was not picked up"
+        
+        # Never found: unconfirmed after the timeout, not failed
+        tracker.timeout = 0.2
+        assert outcome(tracker.track("0x5")) is TransactionUnconfirmed, "Missing receipt was not reported as unconfirmed"
+        assert tracker.pending_count() == 0, "Settled transactions are still pending"
+    
+    print("✅ Receipts settle as succeeded, failed or unconfirmed")
+
+def test_receipt_batches():
+    """More pending transactions than fit one request are polled in several batches"""
+    print("Testing batched receipt requests...")
+    
+    node = FakeNode()
+    tx_hashes = [hex(i) for i in range(1, RECEIPT_BATCH_SIZE * 2 + 2)]
+    for tx_hash in tx_hashes:
+        node.receipts[tx_hash] = receipt(transaction_hash=tx_hash)
+    with FakeEndpoint(node.respond) as endpoint:
+        tracker = ReceiptTracker(endpoint.url, poll_interval=0.05, max_interval=0.1, timeout=60)
+        settled = tracker._poll([transactions._Pending(tx_hash) for tx_hash in tx_hashes])
+        
+        responses = tracker._fetch_receipts(["0x1", "0x2"])
+        assert responses[1]['result']['transaction_hash'] == "0x2", "Batched responses were not keyed by id"
+    
+    assert settled == len(tx_hashes), f"{settled} of {len(tx_hashes)} receipts settled"
+    assert node.batches[:3] == [RECEIPT_BATCH_SIZE, RECEIPT_BATCH_SIZE, 1], f"Receipts requested in batches of {node.batches}"
+    
+    # A node without batch support answers with one error object
+    with FakeEndpoint(lambda path, query, body: (200, json.dumps({"error": {"message": "batch unsupported"}}))) as endpoint:
+        try:
+            ReceiptTracker(endpoint.url)._fetch_receipts(["0x1"])
+        except transactions.resilience.NetworkError:
+            pass
+        else:
+            raise AssertionError("Non-batch response was accepted")
+    
+    print("✅ Receipts are fetched in batches and matched by id")
+
+if __name__ == "__main__":
+    sys.exit(run([test_nonce_manager, test_receipts, test_receipt_batches]))
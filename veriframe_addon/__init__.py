@@ -16,33 +16,56 @@ bl_info = {
     "tracker_url": "https://github.com/RichoKD/VeriFrame/issues",
 }
 
-import bpy
-from . import properties
-from . import operators
-from . import panels
-from . import preferences
+try:
+    import bpy
+except ImportError:
+    # Imported as a plain Python package, e.g. `python -m veriframe_addon.cli`
+    bpy = None
 
-classes = (
-    preferences.VeriFramePreferences,
-    properties.VeriFrameJobItem,  # Must be registered before VeriFrameProperties
-    properties.VeriFrameProperties,
-    operators.VF_OT_SubmitJob,
-    operators.VF_OT_CheckJobStatus,
-    operators.VF_OT_DownloadResult,
-    operators.VF_OT_ConnectWallet,
-    operators.VF_OT_QuickConnect,
-    operators.VF_OT_DisconnectWallet,
-    operators.VF_OT_RefreshJobs,
-    panels.VF_PT_MainPanel,
-    panels.VF_PT_JobHistoryPanel,
-)
+if bpy is not None:
+    from . import properties
+    from . import operators
+    from . import panels
+    from . import preferences
+    from . import dispatcher
+    from . import refresh
+    from . import preupload
+    from . import submission_queue
+    from . import retrieval
+    from . import metrics
+    from . import job_state
+    
+    classes = (
+        preferences.VeriFramePreferences,
+        properties.VeriFrameStatusEntry,  # Must be registered before VeriFrameJobItem
+        properties.VeriFrameJobItem,  # Must be registered before VeriFrameProperties
+        properties.VeriFrameProperties,
+        properties.VeriFrameBulkTarget,  # Used by the bulk submit operator
+        operators.VF_OT_SubmitJob,
+        operators.VF_OT_SubmitSweep,
+        operators.VF_OT_SubmitBulk,
+        operators.VF_OT_CheckJobStatus,
+        operators.VF_OT_DownloadResult,
+        operators.VF_OT_ConnectWallet,
+        operators.VF_OT_QuickConnect,
+        operators.VF_OT_DisconnectWallet,
+        operators.VF_OT_RefreshJobs,
+        operators.VF_OT_RetryQueue,
+        operators.VF_OT_DiscardFailedQueue,
+        operators.VF_OT_ClearResultCache,
+        operators.VF_OT_ExportTrace,
+        operators.VF_OT_ClearTrace,
+        panels.VF_PT_MainPanel,
+        panels.VF_PT_JobHistoryPanel,
+        panels.VF_PT_DebugPanel,
+    )
 
 def register():
     """Register all classes and properties"""
+    # Only problems are printed: this runs on every Blender start
     for cls in classes:
         try:
             bpy.utils.register_class(cls)
-            print(f"✅ Registered: {cls.__name__}")
         except ValueError as e:
             if "already registered" in str(e):
                 print(f"⚠️  Already registered: {cls.__name__}")
@@ -52,9 +75,23 @@ def register():
     
     # Add properties to scene
     bpy.types.Scene.veriframe = bpy.props.PointerProperty(type=properties.VeriFrameProperties)
+    
+    dispatcher.register()
+    job_state.register()
+    preupload.register()
+    submission_queue.register()
+    metrics.register()
 
 def unregister():
     """Unregister all classes and properties"""
+    metrics.unregister()
+    refresh.unregister()
+    retrieval.unregister()
+    submission_queue.unregister()
+    preupload.unregister()
+    job_state.unregister()
+    dispatcher.unregister()
+    
     # Remove properties from scene first
     if hasattr(bpy.types.Scene, 'veriframe'):
         del bpy.types.Scene.veriframe
@@ -63,7 +100,6 @@ def unregister():
     for cls in reversed(classes):
         try:
             bpy.utils.unregister_class(cls)
-            print(f"✅ Unregistered: {cls.__name__}")
         except Exception as e:
             print(f"⚠️  Could not unregister {cls.__name__}: {e}")
 
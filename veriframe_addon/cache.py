@@ -0,0 +1,309 @@
+"""
+Local content-addressed cache of downloaded results for the VeriFrame addon
+
+Every file fetched by CID is kept once in a shared cache directory (by default
+in the VeriFrame config folder; it can point at a shared drive) and linked
+into project download folders, so the same result is never fetched twice.
+
+Objects are stored read-only as objects/<xx>/<cid> next to a small
+<cid>.json holding their size and SHA-256; the JSON's mtime is touched on
+every use and drives least-recently-used eviction once the cache grows past
+its size cap. Hits are checked against the recorded size (and optionally the
+hash) before being materialized by reflink, hardlink or copy; hardlinked
+files share the object's read-only permissions, so they cannot be edited in
+place and corrupt the cache.
+"""
+
+import os
+import stat
+import json
+import shutil
+import hashlib
+import threading
+from typing import Optional, Callable, List, Tuple
+
+from . import metrics
+from .config import RESULT_CACHE_DIR, DEFAULT_RESULT_CACHE_GB, RESULT_CACHE_EVICT_TO, UPLOAD_CHUNK_SIZE
+from .utils import PartialFile, get_data_dir, write_json_atomic
+
+# How cached objects are placed into project folders
+LINK_AUTO = 'AUTO'
+LINK_REFLINK = 'REFLINK'
+LINK_HARDLINK = 'HARDLINK'
+LINK_COPY = 'COPY'
+
+# Linux FICLONE ioctl: share the extents of another file (copy-on-write)
+_FICLONE = 0x40049409
+
+def _sha256(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def _reflink(source: str, destination: str):
+    """Copy-on-write clone; raises OSError where the filesystem cannot do it"""
+    import fcntl
+    
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.remove(destination)
+            raise
+
+class ResultCache:
+    """Size-bounded LRU cache of downloaded files, keyed by CID"""
+    
+    def __init__(self, directory: str, max_bytes: int, link_mode: str = LINK_AUTO, verify_hits: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.link_mode = link_mode
+        self.verify_hits = verify_hits
+        self._objects = os.path.join(directory, "objects")
+        # Bytes cached, counted from one directory scan and then kept up to date,
+        # so an insert does not stat every object to decide whether to evict
+        self._total = None
+        self._lock = threading.RLock()
+        os.makedirs(self._objects, exist_ok=True)
+    
+    def _object_path(self, cid: str) -> str:
+        return os.path.join(self._objects, cid[-2:], cid)
+    
+    def fetch(self, cid: str, destination: str, download: Callable[[str], Optional[str]]) -> bool:
+        """Place the file with this CID at destination, downloading it only on a miss
+        
+        download(path) writes the file to path and returns its SHA-256 hex
+        digest, or None on failure.
+        """
+        object_path = self.lookup(cid)
+        if object_path is not None:
+            return self._materialize(object_path, destination)
+        
+        object_path = self._object_path(cid)
+        partial_path = self._partial_path(cid)
+        sha256 = download(partial_path)
+        if sha256 is None:
+            return False
+        
+        size = os.path.getsize(partial_path)
+        if size > self.max_bytes:
+            # Would evict everything else: keep it out of the cache
+            shutil.move(partial_path, destination)
+            return True
+        
+        self._insert(cid, partial_path, size, sha256)
+        self._evict(keep=cid)
+        return self._materialize(self._object_path(cid), destination)
+    
+    def open_object(self, cid: str) -> PartialFile:
+        """A download sink whose bytes are cached under cid once it is closed"""
+        return _ObjectWriter(self, cid)
+    
+    def add(self, cid: str, source_path: str, sha256: str):
+        """Keep a copy of a file that was fetched without going through fetch()"""
+        object_path = self._object_path(cid)
+        size = os.path.getsize(source_path)
+        if size > self.max_bytes or os.path.exists(object_path + ".json"):
+            return
+        
+        partial_path = self._partial_path(cid)
+        if self._materialize(source_path, partial_path):
+            self._insert(cid, partial_path, size, sha256)
+            self._evict(keep=cid)
+    
+    def _partial_path(self, cid: str) -> str:
+        """Private name to write an object under until it is complete"""
+        object_path = self._object_path(cid)
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        return f"{object_path}.{os.getpid()}.{threading.get_ident()}.download"
+    
+    def _insert(self, cid: str, partial_path: str, size: int, sha256: str):
+        object_path = self._object_path(cid)
+        replaced = self._cached_size(cid)
+        os.chmod(partial_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        os.replace(partial_path, object_path)
+        # The metadata is written last: an object without it is not in the cache
+        write_json_atomic(object_path + ".json", {'size': size, 'sha256': sha256})
+        self._count(size - replaced)
+    
+    def _cached_size(self, cid: str) -> int:
+        """Size of the cached object for cid, 0 if there is none"""
+        object_path = self._object_path(cid)
+        if not os.path.exists(object_path + ".json"):
+            return 0
+        try:
+            return os.path.getsize(object_path)
+        except OSError:
+            return 0
+    
+    def _count(self, delta: int):
+        with self._lock:
+            if self._total is not None:
+                self._total = max(0, self._total + delta)
+    
+    def lookup(self, cid: str) -> Optional[str]:
+        """Path of the cached object for cid, marked as used, or None on a miss"""
+        object_path = self._object_path(cid)
+        try:
+            with open(object_path + ".json", 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            valid = os.path.getsize(object_path) == meta['size']
+            if valid and self.verify_hits:
+                valid = _sha256(object_path) == meta['sha256']
+        except (OSError, ValueError, KeyError):
+            metrics.record_cache_lookup('results', False)
+            return None
+        
+        if not valid:
+            print(f"Result cache: {cid} is corrupt, fetching it again")
+            self.remove(cid)
+            metrics.record_cache_lookup('results', False)
+            return None
+        
+        # Touch the metadata, not the object: hardlinked copies share the object's times
+        os.utime(object_path + ".json")
+        metrics.record_cache_lookup('results', True)
+        return object_path
+    
+    def _materialize(self, object_path: str, destination: str) -> bool:
+        """Place a cached object at destination using the configured link mode"""
+        if os.path.exists(destination):
+            os.remove(destination)
+        
+        if self.link_mode == LINK_COPY:
+            methods = ()
+        elif self.link_mode == LINK_REFLINK:
+            methods = (_reflink,)
+        elif self.link_mode == LINK_HARDLINK:
+            methods = (os.link,)
+        else:
+            methods = (_reflink, os.link)
+        
+        for method in methods:
+            try:
+                method(object_path, destination)
+                return True
+            except (OSError, ImportError):
+                # Not supported by this platform or filesystem, or across devices
+                continue
+        
+        try:
+            shutil.copyfile(object_path, destination)
+            return True
+        except OSError as e:
+            print(f"Result cache: could not copy {os.path.basename(destination)}: {e}")
+            return False
+    
+    def remove(self, cid: str):
+        object_path = self._object_path(cid)
+        self._count(-self._cached_size(cid))
+        for path in (object_path + ".json", object_path):
+            try:
+                # Objects are read-only, which blocks removal on Windows
+                os.chmod(path, stat.S_IWRITE | stat.S_IREAD)
+                os.remove(path)
+            except OSError:
+                pass
+    
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """(cid, size, last use) of every cached object"""
+        entries = []
+        for shard in os.listdir(self._objects):
+            shard_dir = os.path.join(self._objects, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.endswith(".json"):
+                    continue
+                cid = name[:-len(".json")]
+                try:
+                    entries.append((cid, os.path.getsize(os.path.join(shard_dir, cid)),
+                                    os.path.getmtime(os.path.join(shard_dir, name))))
+                except OSError:
+                    continue
+        return entries
+    
+    def total_size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+    
+    def _evict(self, keep: Optional[str] = None):
+        """Remove least recently used objects once the cache grows past its size cap
+        
+        Only the running total is checked on each insert; the directory is
+        scanned the first time and when objects actually need to go, and then
+        frees down to RESULT_CACHE_EVICT_TO of the cap so the next inserts do
+        not scan again. The scan also picks up objects added by other Blender
+        instances sharing the cache directory.
+        """
+        with self._lock:
+            if self._total is None:
+                self._total = self.total_size()
+            if self._total <= self.max_bytes:
+                return
+            
+            entries = sorted(self.entries(), key=lambda entry: entry[2])
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * RESULT_CACHE_EVICT_TO
+            for cid, size, _ in entries:
+                if total <= target:
+                    break
+                if cid == keep:
+                    continue
+                self.remove(cid)
+                total -= size
+            self._total = total
+    
+    def clear(self):
+        """Remove every cached object"""
+        with self._lock:
+            for cid, _, _ in self.entries():
+                self.remove(cid)
+            self._total = 0
+
+class _ObjectWriter(PartialFile):
+    """Download sink that becomes a cached object when closed"""
+    
+    def __init__(self, result_cache: ResultCache, cid: str):
+        super().__init__(result_cache._object_path(cid), result_cache._partial_path(cid))
+        self.result_cache = result_cache
+        self.cid = cid
+    
+    def close(self):
+        self._file.close()
+        self.sha256 = self._hasher.hexdigest()
+        size = os.path.getsize(self.partial_path)
+        if size > self.result_cache.max_bytes:
+            os.remove(self.partial_path)
+            return
+        self.result_cache._insert(self.cid, self.partial_path, size, self.sha256)
+        self.result_cache._evict(keep=self.cid)
+
+_cache = None
+
+def get_cache() -> Optional[ResultCache]:
+    """The result cache configured in the preferences, or None if it is disabled (main thread only)"""
+    global _cache
+    import bpy
+    
+    try:
+        addon_prefs = bpy.context.preferences.addons[__name__.partition('.')[0]].preferences
+        enabled = addon_prefs.use_result_cache
+        directory = bpy.path.abspath(addon_prefs.result_cache_dir) if addon_prefs.result_cache_dir else ""
+        max_bytes = int(addon_prefs.result_cache_size_gb * 1024 ** 3)
+        link_mode = addon_prefs.result_cache_link_mode
+        verify_hits = addon_prefs.verify_cache_hits
+    except (KeyError, AttributeError):
+        enabled, directory, max_bytes, link_mode, verify_hits = True, "", int(DEFAULT_RESULT_CACHE_GB * 1024 ** 3), LINK_AUTO, True
+    
+    if not enabled:
+        return None
+    
+    directory = directory or os.path.join(get_data_dir(), RESULT_CACHE_DIR)
+    if _cache is None or _cache.directory != directory:
+        _cache = ResultCache(directory, max_bytes, link_mode, verify_hits)
+    else:
+        _cache.max_bytes, _cache.link_mode, _cache.verify_hits = max_bytes, link_mode, verify_hits
+    return _cache
@@ -0,0 +1,161 @@
+"""
+Single-request job packaging for the VeriFrame addon
+
+The files of a submission (the base blend and one JSON sidecar per job) are
+laid out as one UnixFS directory and sent to the IPFS API as a CAR archive
+in a single `dag/import` call, instead of one `add` call per file. The DAG is
+built locally with the same chunking and CIDs as `ipfs add`, so every file's
+CID is known before anything is sent and the sidecars can reference the
+blend without waiting for its upload.
+
+Files are read twice: once to compute their CIDs, and again while the CAR is
+streamed, so nothing is buffered in memory or written to a temporary file.
+Blocks the node already has can be marked present and are left out of the
+CAR, so only what is missing is sent.
+"""
+
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from . import cid
+from .config import UPLOAD_CHUNK_SIZE
+
+class PackageChangedError(Exception):
+    """A packaged file changed between computing its CID and streaming it"""
+
+class JobPackage:
+    """Files laid out in one directory DAG, uploaded as a single CAR
+    
+    The builder settings must match the node's `ipfs add` options (see
+    AddOptions.builder_options) for the CIDs to be the ones an add would give.
+    """
+    
+    def __init__(self, cid_version: int = 0, chunk_size: int = cid.DEFAULT_CHUNK_SIZE, raw_leaves: Optional[bool] = None):
+        self._builder_options = {'cid_version': cid_version, 'chunk_size': chunk_size, 'raw_leaves': raw_leaves}
+        self.cid_version = cid_version
+        self._files = []  # (name, path or None, data or None, cid, tsize, [(block cid, CAR section size)])
+        self._root = None
+        self._directories = None
+        self._present = set()  # keys of blocks the node already has
+    
+    def add_file(self, name: str, path: str) -> str:
+        """Add a file from disk under name ('/' separated), returning its CID"""
+        blocks = []
+        builder = self._builder(blocks)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+                builder.update(chunk)
+        return self._add(name, path, None, builder, blocks)
+    
+    def add_bytes(self, name: str, data: bytes) -> str:
+        """Add an in-memory file under name, returning its CID"""
+        blocks = []
+        builder = self._builder(blocks)
+        builder.update(data)
+        return self._add(name, None, data, builder, blocks)
+    
+    @property
+    def root(self) -> str:
+        """CID of the directory holding every file added so far"""
+        self._build_directories()
+        return str(self._root)
+    
+    @property
+    def car_size(self) -> int:
+        """Bytes iter_car() will produce"""
+        self._build_directories()
+        sections = [(block_cid, size) for _, _, _, _, _, blocks in self._files for block_cid, size in blocks]
+        sections += [(block_cid, len(cid.car_section(block_cid, block))) for block_cid, block in self._directories]
+        return len(cid.car_header([self._root])) + sum(
+            size for block_cid, size in sections if block_cid.key not in self._present
+        )
+    
+    def files(self) -> List[Tuple[cid.CID, List[cid.CID]]]:
+        """(file CID, CIDs of every block of the file) per added file"""
+        return [(file_cid, [block_cid for block_cid, _ in blocks]) for _, _, _, file_cid, _, blocks in self._files]
+    
+    def block_cids(self) -> List[cid.CID]:
+        """Every block in the order iter_car() sends them, directories last"""
+        self._build_directories()
+        return ([block_cid for _, block_cids in self.files() for block_cid in block_cids]
+                + [block_cid for block_cid, _ in self._directories])
+    
+    def mark_present(self, keys: Iterable[bytes]):
+        """Leave blocks the node already has (by CID.key) out of the CAR"""
+        self._present.update(keys)
+    
+    @property
+    def missing_blocks(self) -> int:
+        """Number of blocks iter_car() will send"""
+        return sum(1 for block_cid in self.block_cids() if block_cid.key not in self._present)
+    
+    def _builder(self, blocks) -> cid.UnixFSFileBuilder:
+        def record(block_cid, block):
+            blocks.append((block_cid, len(cid.car_section(block_cid, block))))
+        
+        return cid.UnixFSFileBuilder(on_block=record, **self._builder_options)
+    
+    def _add(self, name, path, data, builder, blocks) -> str:
+        file_cid = builder.finish()
+        self._files.append((name, path, data, file_cid, builder.tsize, blocks))
+        self._root = self._directories = None
+        return str(file_cid)
+    
+    def _build_directories(self):
+        """Directory blocks, deepest first, with the root last"""
+        if self._directories is not None:
+            return
+        
+        tree = {}
+        for name, _, _, file_cid, tsize, _ in self._files:
+            *parents, filename = name.split('/')
+            node = tree
+            for parent in parents:
+                node = node.setdefault(parent, {})
+            node[filename] = (file_cid, tsize)
+        
+        directories = []
+        
+        def build(node) -> Tuple[cid.CID, int]:
+            links = []
+            for entry_name, entry in node.items():
+                entry_cid, tsize = build(entry) if isinstance(entry, dict) else entry
+                links.append(cid.PBLink(entry_cid, entry_name, tsize))
+            block = cid.directory_block(links)
+            block_cid = cid.CID.for_block(block, version=self.cid_version)
+            directories.append((block_cid, block))
+            return block_cid, len(block) + sum(link.tsize for link in links)
+        
+        self._root, _ = build(tree)
+        self._directories = directories
+    
+    def iter_car(self) -> Iterator[bytes]:
+        """Stream the package as a CARv1 archive rooted at the directory, without present blocks"""
+        self._build_directories()
+        yield cid.car_header([self._root])
+        
+        for name, path, data, file_cid, _, file_blocks in self._files:
+            if all(block_cid.key in self._present for block_cid, _ in file_blocks):
+                continue
+            
+            blocks = []
+            
+            def collect(block_cid, block):
+                if block_cid.key not in self._present:
+                    blocks.append(cid.car_section(block_cid, block))
+            
+            builder = cid.UnixFSFileBuilder(on_block=collect, **self._builder_options)
+            if data is not None:
+                builder.update(data)
+            else:
+                with open(path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+                        builder.update(chunk)
+                        yield from blocks
+                        blocks.clear()
+            if builder.finish() != file_cid:
+                raise PackageChangedError(f"{name} changed while it was being uploaded")
+            yield from blocks
+        
+        for block_cid, block in self._directories:
+            if block_cid.key not in self._present:
+                yield cid.car_section(block_cid, block)
@@ -0,0 +1,501 @@
+"""
+Content identifiers and UnixFS DAGs for the VeriFrame addon
+
+Pure-Python pieces needed to check content against its IPFS CID without a
+local node: CID parsing and formatting (CIDv0 and CIDv1, sha2-256 only), a
+dag-pb / UnixFS codec, a streaming UnixFS file builder that produces the same
+root CID as `ipfs add` with default settings, CAR (content-addressed archive)
+framing, and streaming verifiers for raw byte responses and CAR responses.
+"""
+
+import base64
+import hashlib
+from collections import namedtuple
+from typing import Optional, Callable, List, Tuple
+
+# Multicodec and multihash codes
+RAW = 0x55
+DAG_PB = 0x70
+SHA2_256 = 0x12
+SHA2_256_SIZE = 32
+
+# UnixFS node types
+UNIXFS_RAW = 0
+UNIXFS_DIRECTORY = 1
+UNIXFS_FILE = 2
+UNIXFS_HAMT_SHARD = 5
+
+# Hex digits in front of entry names in a sharded directory (fanout 256)
+HAMT_PREFIX = 2
+
+# Defaults of `ipfs add`
+DEFAULT_CHUNK_SIZE = 256 * 1024
+DEFAULT_MAX_LINKS = 174
+
+# Largest CAR section accepted (a default chunk plus generous framing)
+MAX_CAR_SECTION = 2 * 1024 * 1024
+
+_BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_BASE58_INDEX = {char: index for index, char in enumerate(_BASE58_ALPHABET)}
+
+class VerificationError(Exception):
+    """Content does not match the CID it was requested by"""
+
+def encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def decode_varint(data, offset: int = 0) -> Tuple[int, int]:
+    """(value, offset after the varint); raises IndexError if data ends first"""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+        if shift > 63:
+            raise ValueError("Varint too long")
+
+def _base58_encode(data: bytes) -> str:
+    number = int.from_bytes(data, 'big')
+    encoded = ""
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = _BASE58_ALPHABET[remainder] + encoded
+    leading_zeros = len(data) - len(data.lstrip(b"\0"))
+    return "1" * leading_zeros + encoded
+
+def _base58_decode(text: str) -> bytes:
+    number = 0
+    for char in text:
+        number = number * 58 + _BASE58_INDEX[char]
+    leading_zeros = len(text) - len(text.lstrip("1"))
+    body = number.to_bytes((number.bit_length() + 7) // 8, 'big') if number else b""
+    return b"\0" * leading_zeros + body
+
+class CID(namedtuple('CID', 'version codec digest')):
+    """A CID with a sha2-256 multihash"""
+    
+    __slots__ = ()
+    
+    @classmethod
+    def decode(cls, text: str) -> 'CID':
+        """Parse the string form (Qm... base58 CIDv0, or multibase CIDv1)"""
+        try:
+            if len(text) == 46 and text.startswith("Qm"):
+                raw = _base58_decode(text)
+            elif text[0] in "bB":
+                body = text[1:].upper()
+                raw = base64.b32decode(body + "=" * (-len(body) % 8))
+            elif text[0] == "z":
+                raw = _base58_decode(text[1:])
+            elif text[0] in "fF":
+                raw = bytes.fromhex(text[1:])
+            else:
+                raise ValueError(f"unsupported multibase prefix {text[0]!r}")
+            cid, end = cls.from_bytes(raw)
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"Invalid CID {text!r}: {e}")
+        if end != len(raw):
+            raise ValueError(f"Invalid CID {text!r}: trailing bytes")
+        return cid
+    
+    @classmethod
+    def from_bytes(cls, data, offset: int = 0) -> Tuple['CID', int]:
+        """Parse a binary CID at offset, returning (cid, offset after it)"""
+        if data[offset] == SHA2_256 and data[offset + 1] == SHA2_256_SIZE:
+            version, codec = 0, DAG_PB
+        else:
+            version, offset = decode_varint(data, offset)
+            if version != 1:
+                raise ValueError(f"Unsupported CID version {version}")
+            codec, offset = decode_varint(data, offset)
+        hash_code, offset = decode_varint(data, offset)
+        size, offset = decode_varint(data, offset)
+        if hash_code != SHA2_256 or size != SHA2_256_SIZE:
+            raise ValueError(f"Unsupported multihash 0x{hash_code:x}")
+        digest = bytes(data[offset:offset + size])
+        if len(digest) != size:
+            raise IndexError("Truncated CID")
+        return cls(version, codec, digest), offset + size
+    
+    @classmethod
+    def for_block(cls, data, codec: int = DAG_PB, version: int = 0) -> 'CID':
+        if version == 0 and codec != DAG_PB:
+            raise ValueError("CIDv0 can only address dag-pb blocks")
+        return cls(version, codec, hashlib.sha256(data).digest())
+    
+    def multihash(self) -> bytes:
+        return bytes((SHA2_256, SHA2_256_SIZE)) + self.digest
+    
+    def to_bytes(self) -> bytes:
+        if self.version == 0:
+            return self.multihash()
+        return encode_varint(1) + encode_varint(self.codec) + self.multihash()
+    
+    def matches(self, data) -> bool:
+        """Whether a block's bytes hash to this CID"""
+        return hashlib.sha256(data).digest() == self.digest
+    
+    @property
+    def key(self) -> Tuple[int, bytes]:
+        """Identity of the addressed block, independent of the CID version"""
+        return (self.codec, self.digest)
+    
+    def __str__(self) -> str:
+        if self.version == 0:
+            return _base58_encode(self.multihash())
+        return "b" + base64.b32encode(self.to_bytes()).decode('ascii').lower().rstrip("=")
+
+PBLink = namedtuple('PBLink', 'cid name tsize')
+
+def _fields(data):
+    """Iterate (field number, value) over a protobuf message with varint and bytes fields"""
+    offset = 0
+    end = len(data)
+    while offset < end:
+        tag, offset = decode_varint(data, offset)
+        field, wire_type = tag >> 3, tag & 7
+        if wire_type == 0:
+            value, offset = decode_varint(data, offset)
+        elif wire_type == 2:
+            length, offset = decode_varint(data, offset)
+            value = bytes(data[offset:offset + length])
+            if len(value) != length:
+                raise ValueError("Truncated protobuf field")
+            offset += length
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+        yield field, value
+
+def _bytes_field(field: int, value: bytes) -> bytes:
+    return encode_varint(field << 3 | 2) + encode_varint(len(value)) + value
+
+def _varint_field(field: int, value: int) -> bytes:
+    return encode_varint(field << 3) + encode_varint(value)
+
+def decode_dag_pb(block) -> Tuple[List[PBLink], Optional[bytes]]:
+    """Links and Data of a dag-pb node"""
+    links = []
+    data = None
+    for field, value in _fields(block):
+        if field == 2:
+            cid = None
+            name = ""
+            tsize = 0
+            for link_field, link_value in _fields(value):
+                if link_field == 1:
+                    cid, _ = CID.from_bytes(link_value)
+                elif link_field == 2:
+                    name = link_value.decode('utf-8')
+                elif link_field == 3:
+                    tsize = link_value
+            if cid is None:
+                raise ValueError("dag-pb link without a hash")
+            links.append(PBLink(cid, name, tsize))
+        elif field == 1:
+            data = value
+    return links, data
+
+def encode_dag_pb(links: List[PBLink], data: Optional[bytes]) -> bytes:
+    """Canonical dag-pb encoding: links first, then data"""
+    out = bytearray()
+    for link in links:
+        out += _bytes_field(2, _bytes_field(1, link.cid.to_bytes()) + _bytes_field(2, link.name.encode('utf-8'))
+                            + _varint_field(3, link.tsize))
+    if data is not None:
+        out += _bytes_field(1, data)
+    return bytes(out)
+
+def decode_unixfs(data) -> Tuple[int, bytes]:
+    """(type, file data) of a UnixFS Data message"""
+    node_type = None
+    file_data = b""
+    for field, value in _fields(data or b""):
+        if field == 1:
+            node_type = value
+        elif field == 2:
+            file_data = value
+    if node_type is None:
+        raise ValueError("UnixFS node without a type")
+    return node_type, file_data
+
+def encode_unixfs_file(data: bytes, filesize: int, blocksizes: List[int] = ()) -> bytes:
+    out = _varint_field(1, UNIXFS_FILE)
+    if data:
+        out += _bytes_field(2, data)
+    out += _varint_field(3, filesize)
+    for size in blocksizes:
+        out += _varint_field(4, size)
+    return out
+
+def encode_unixfs_directory() -> bytes:
+    return _varint_field(1, UNIXFS_DIRECTORY)
+
+def directory_block(links: List[PBLink]) -> bytes:
+    """A plain UnixFS directory node, with links sorted by name as `ipfs add -r` does"""
+    return encode_dag_pb(sorted(links, key=lambda link: link.name.encode('utf-8')), encode_unixfs_directory())
+
+def _cbor_head(major: int, value: int) -> bytes:
+    if value < 24:
+        return bytes((major << 5 | value,))
+    for info, size in ((24, 1), (25, 2), (26, 4), (27, 8)):
+        if value < 1 << (8 * size):
+            return bytes((major << 5 | info,)) + value.to_bytes(size, 'big')
+    raise ValueError("CBOR value too large")
+
+def car_header(roots: List[CID]) -> bytes:
+    """Length-prefixed CARv1 header naming the roots (dag-cbor {roots, version: 1})"""
+    header = _cbor_head(5, 2) + _cbor_head(3, 5) + b"roots" + _cbor_head(4, len(roots))
+    for root in roots:
+        # Tag 42: a CID, as bytes with a leading multibase identity prefix
+        link = b"\0" + root.to_bytes()
+        header += b"\xd8\x2a" + _cbor_head(2, len(link)) + link
+    header += _cbor_head(3, 7) + b"version" + _cbor_head(0, 1)
+    return encode_varint(len(header)) + header
+
+def car_section(cid: CID, block: bytes) -> bytes:
+    """One length-prefixed CAR block section"""
+    cid_bytes = cid.to_bytes()
+    return encode_varint(len(cid_bytes) + len(block)) + cid_bytes + block
+
+class UnixFSFileBuilder:
+    """Streams a file into a balanced UnixFS DAG, as `ipfs add` does with default settings
+    
+    CIDv0 uses dag-pb leaves; CIDv1 uses raw leaves, like `ipfs add
+    --cid-version=1`, unless raw_leaves says otherwise (raw leaves are always
+    CIDv1). on_block(cid, block) sees every block as it is made.
+    After finish(), tsize is the cumulative size of every block in the DAG,
+    as a directory link to the file records it.
+    """
+    
+    def __init__(self, cid_version: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE, max_links: int = DEFAULT_MAX_LINKS,
+                 on_block: Optional[Callable[[CID, bytes], None]] = None, raw_leaves: Optional[bool] = None):
+        self.cid_version = cid_version
+        self.raw_leaves = cid_version == 1 if raw_leaves is None else raw_leaves
+        self.chunk_size = chunk_size
+        self.max_links = max_links
+        self.on_block = on_block
+        self.size = 0
+        self.tsize = 0
+        self._pending = bytearray()
+        self._levels = [[]]  # per level: (cid, tsize, filesize) of nodes waiting for a parent
+        self._leaves = 0
+    
+    def update(self, data):
+        self.size += len(data)
+        self._pending += data
+        offset = 0
+        while len(self._pending) - offset >= self.chunk_size:
+            self._add_leaf(bytes(self._pending[offset:offset + self.chunk_size]))
+            offset += self.chunk_size
+        if offset:
+            del self._pending[:offset]
+    
+    def finish(self) -> CID:
+        """Flush the last chunk and return the root CID"""
+        if self._pending or not self._leaves:
+            self._add_leaf(bytes(self._pending))
+            self._pending.clear()
+        
+        level = 0
+        while level < len(self._levels):
+            nodes = self._levels[level]
+            is_top = level == len(self._levels) - 1
+            if is_top and len(nodes) == 1:
+                self.tsize = nodes[0][1]
+                return nodes[0][0]
+            if nodes:
+                self._levels[level] = []
+                self._add_parent(level + 1, nodes)
+            level += 1
+        raise RuntimeError("UnixFS builder produced no root")
+    
+    def _emit(self, block: bytes, codec: int) -> CID:
+        cid = CID.for_block(block, codec, 1 if codec == RAW else self.cid_version)
+        if self.on_block:
+            self.on_block(cid, block)
+        return cid
+    
+    def _add_leaf(self, chunk: bytes):
+        self._leaves += 1
+        if self.raw_leaves:
+            cid = self._emit(chunk, RAW)
+            self._push(0, (cid, len(chunk), len(chunk)))
+        else:
+            block = encode_dag_pb([], encode_unixfs_file(chunk, len(chunk)))
+            cid = self._emit(block, DAG_PB)
+            self._push(0, (cid, len(block), len(chunk)))
+    
+    def _push(self, level: int, node):
+        if level == len(self._levels):
+            self._levels.append([])
+        nodes = self._levels[level]
+        nodes.append(node)
+        if len(nodes) == self.max_links:
+            self._levels[level] = []
+            self._add_parent(level + 1, nodes)
+    
+    def _add_parent(self, level: int, children):
+        filesize = sum(child[2] for child in children)
+        links = [PBLink(cid, "", tsize) for cid, tsize, _ in children]
+        block = encode_dag_pb(links, encode_unixfs_file(b"", filesize, [child[2] for child in children]))
+        cid = self._emit(block, DAG_PB)
+        self._push(level, (cid, len(block) + sum(child[1] for child in children), filesize))
+
+class StreamVerifier:
+    """Checks a plain byte stream against a file CID without a second pass
+    
+    Raw CIDs are a sha2-256 of the bytes. For dag-pb CIDs the UnixFS DAG is
+    rebuilt with `ipfs add` defaults, so files added with other chunking
+    settings cannot be verified this way (fetch them as CAR instead). The
+    bytes are passed on to write, if given, as they arrive.
+    """
+    
+    def __init__(self, cid: CID, write: Optional[Callable[[bytes], None]] = None):
+        self.cid = cid
+        self.write = write
+        if cid.codec == RAW:
+            self._hasher = hashlib.sha256()
+            self._builder = None
+        elif cid.codec == DAG_PB:
+            self._hasher = None
+            self._builder = UnixFSFileBuilder(cid.version)
+        else:
+            raise VerificationError(f"Cannot verify content with codec 0x{cid.codec:x}")
+    
+    def update(self, data):
+        if self._hasher:
+            self._hasher.update(data)
+        else:
+            self._builder.update(data)
+        if self.write:
+            self.write(data)
+    
+    def finish(self):
+        """Raise VerificationError if the bytes do not match the CID"""
+        if self._hasher:
+            matches = self._hasher.digest() == self.cid.digest
+        else:
+            matches = self._builder.finish().key == self.cid.key
+        if not matches:
+            raise VerificationError(f"Content does not match {self.cid}")
+
+def _entry_path(directory: str, name: str) -> str:
+    # Names come from the network: never let one escape the output folder
+    if name in ("", ".", "..") or "/" in name or "\\" in name:
+        raise VerificationError(f"Unsafe entry name {name!r}")
+    return f"{directory}/{name}" if directory else name
+
+class CarVerifier:
+    """Verifies a CAR stream of a UnixFS DAG block by block and writes out its files
+    
+    Blocks must arrive in depth-first order with duplicates included (the
+    trustless gateway's order=dfs and dups=y), so each one is the next block
+    the DAG walk expects. Every block is hashed as soon as it is complete and a
+    bad response is rejected at the first wrong block.
+    
+    For a single file, write receives its bytes. For a directory, open_file
+    (path, cid) is called as each file starts, with a '/'-separated path below
+    the root ("" when the root itself is a file), and returns a file-like
+    object that is written to and closed once the file is complete.
+    """
+    
+    def __init__(self, root: CID, write: Optional[Callable[[bytes], None]] = None,
+                 open_file: Optional[Callable[[str, CID], object]] = None):
+        self.write = write
+        self.open_file = open_file
+        self._expected = [(root, "")]  # stack of (cid, path of the entry it starts or None); next block on top
+        self._file = None
+        self._buffer = bytearray()
+        self._header_read = False
+    
+    def update(self, chunk):
+        self._buffer += chunk
+        offset = 0
+        while True:
+            try:
+                length, start = decode_varint(self._buffer, offset)
+            except IndexError:
+                break
+            if length > MAX_CAR_SECTION:
+                raise VerificationError(f"CAR section of {length} bytes is too large")
+            if len(self._buffer) < start + length:
+                break
+            
+            section = memoryview(self._buffer)[start:start + length]
+            try:
+                if not self._header_read:
+                    # The header only names the roots; the CID asked for is what counts
+                    self._header_read = True
+                else:
+                    cid, data_start = CID.from_bytes(section)
+                    self._accept(cid, section[data_start:])
+            except (IndexError, ValueError) as e:
+                raise VerificationError(f"Malformed CAR section: {e}")
+            finally:
+                section.release()
+            offset = start + length
+        if offset:
+            del self._buffer[:offset]
+    
+    def finish(self):
+        """Raise VerificationError unless the whole DAG arrived"""
+        if self._expected or self._buffer:
+            raise VerificationError("CAR stream ended before the whole DAG arrived")
+    
+    def _accept(self, cid: CID, data):
+        if not self._expected or cid.key != self._expected[-1][0].key:
+            raise VerificationError(f"Unexpected block {cid} in CAR stream")
+        if not cid.matches(data):
+            raise VerificationError(f"Block {cid} does not match its hash")
+        _, path = self._expected.pop()
+        
+        if cid.codec == RAW:
+            self._start_file(path, cid)
+            self._write(bytes(data))
+        elif cid.codec == DAG_PB:
+            links, node_data = decode_dag_pb(data)
+            node_type, file_data = decode_unixfs(node_data)
+            if node_type in (UNIXFS_FILE, UNIXFS_RAW):
+                self._start_file(path, cid)
+                if file_data:
+                    self._write(file_data)
+                self._expected.extend((link.cid, None) for link in reversed(links))
+            elif node_type in (UNIXFS_DIRECTORY, UNIXFS_HAMT_SHARD) and path is not None and self.open_file:
+                children = []
+                for link in links:
+                    if node_type == UNIXFS_DIRECTORY:
+                        children.append((link.cid, _entry_path(path, link.name)))
+                    elif len(link.name) == HAMT_PREFIX:
+                        # A sub-shard holds more entries of the same directory
+                        children.append((link.cid, path))
+                    else:
+                        children.append((link.cid, _entry_path(path, link.name[HAMT_PREFIX:])))
+                self._expected.extend(reversed(children))
+            else:
+                raise VerificationError(f"{cid} is not a file")
+        else:
+            raise VerificationError(f"Unsupported block codec 0x{cid.codec:x}")
+        
+        # A file is complete once the walk moves on to the next entry
+        if self._file is not None and (not self._expected or self._expected[-1][1] is not None):
+            self._file.close()
+            self._file = None
+    
+    def _start_file(self, path: Optional[str], cid: CID):
+        if path is not None and self.open_file:
+            self._file = self.open_file(path, cid)
+    
+    def _write(self, data: bytes):
+        if self._file is not None:
+            self._file.write(data)
+        elif self.write:
+            self.write(data)
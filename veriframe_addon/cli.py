@@ -0,0 +1,457 @@
+"""
+Headless command line entry point for the VeriFrame addon
+
+Submits many blend files from pipeline scripts without the UI. Runs either as
+plain Python for manifests of already-prepared payloads, or inside Blender:
+    
+    python -m veriframe_addon.cli submit manifest.json --wallet 0x... --report report.json
+    blender -b shot.blend --python-expr "import sys; from veriframe_addon import cli; sys.exit(cli.main())" -- submit --wallet 0x...
+
+Manifest entries with a "blend" source are prepared by parallel background
+Blender processes (the same targeted export the Submit button uses); entries
+with a "payload" are uploaded as-is. Uploads run in a thread pool, each
+(blend, scene) pair is uploaded once and shared by every job that uses it,
+jobs reach the contract in multicall batches of --batch-size, and a JSON
+report lists the outcome of every job.
+
+Manifest format (paths are relative to the manifest):
+    
+    {
+        "defaults": {"reward": 10, "deadline_hours": 24, "overrides": {"engine": "CYCLES"}},
+        "jobs": [
+            {"blend": "shots/sh010.blend", "scene": "Main", "overrides": {"samples": 256}},
+            {"payload": "prepared/sh020.blend", "scene": "Scene"}
+        ]
+    }
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+from .config import (
+    DEFAULT_IPFS_API_URL,
+    DEFAULT_IPFS_GATEWAY_URL,
+    DEFAULT_SEPOLIA_RPC,
+    SEPOLIA_CONTRACT_ADDRESS,
+    DEFAULT_REWARD_AMOUNT,
+    DEFAULT_DEADLINE_HOURS,
+    SUBMIT_DEADLINE,
+    MULTICALL_MAX_CALLS,
+)
+from .resilience import Deadline
+from .tracing import tracer
+from .utils import AddOptions, IPFSManager, StarknetManager, BlenderJobManager, SUBMITTED, UNCONFIRMED, build_job_sidecar
+
+REPORT_VERSION = 1
+
+# Command line flags that become render overrides in the job sidecar
+OVERRIDE_ARGS = {
+    'engine': 'engine',
+    'format': 'format',
+    'samples': 'samples',
+    'resolution': 'resolution_percentage',
+    'frame_start': 'frame_start',
+    'frame_end': 'frame_end',
+    'camera': 'camera',
+    'view_layer': 'view_layer',
+}
+
+def _blender_binary() -> Optional[str]:
+    """Path of the running Blender, or None when running as plain Python"""
+    try:
+        import bpy
+        return bpy.app.binary_path or None
+    except (ImportError, AttributeError):
+        return None
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="veriframe", description="Submit blend files to the VeriFrame network")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    # Render override flags apply to every job unless the manifest entry sets its own
+    submit = commands.add_parser("submit", help="Prepare, upload and submit jobs")
+    submit.add_argument("manifest", nargs="?", help="JSON manifest of jobs (inside Blender, defaults to the open file)")
+    submit.add_argument("--report", help="Write a JSON results report to this path")
+    submit.add_argument("--trace", help="Write a Chrome trace of the run to this path")
+    submit.add_argument("--wallet", default=os.environ.get("VERIFRAME_WALLET", ""), help="Starknet wallet address")
+    submit.add_argument("--reward", type=float, default=DEFAULT_REWARD_AMOUNT, help="Reward per job in STRK")
+    submit.add_argument("--deadline-hours", type=int, default=DEFAULT_DEADLINE_HOURS, help="Job deadline in hours")
+    submit.add_argument("--rpc-url", default=DEFAULT_SEPOLIA_RPC)
+    submit.add_argument("--contract", default=SEPOLIA_CONTRACT_ADDRESS)
+    submit.add_argument("--ipfs-api", default=DEFAULT_IPFS_API_URL)
+    submit.add_argument("--ipfs-gateway", default=DEFAULT_IPFS_GATEWAY_URL)
+    submit.add_argument("--chunker", default=AddOptions().chunker, help="ipfs add chunker (size-<bytes>, rabin[-min-avg-max] or buzhash)")
+    submit.add_argument("--raw-leaves", action="store_true", help="Store file data in raw leaf blocks")
+    submit.add_argument("--cid-version", type=int, choices=(0, 1), default=0)
+    submit.add_argument("--hash", default=AddOptions().hash_function, help="ipfs add hash function")
+    submit.add_argument("--no-pin", action="store_true", help="Do not pin uploads on the IPFS node")
+    submit.add_argument("--trickle", action="store_true", help="Use the trickle DAG layout")
+    submit.add_argument("--blender", help="Blender executable used to prepare blend sources (default: this Blender, or 'blender')")
+    submit.add_argument("--prepare-jobs", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Parallel Blender processes")
+    submit.add_argument("--upload-workers", type=int, default=4, help="Parallel uploads")
+    submit.add_argument("--batch-size", type=int, default=MULTICALL_MAX_CALLS, help="Jobs per contract submission (split further to fit calldata limits)")
+    submit.add_argument("--scene", help="Scene to submit (default: the file's active scene)")
+    submit.add_argument("--engine", choices=("CYCLES", "EEVEE", "WORKBENCH"))
+    submit.add_argument("--format", choices=("PNG", "JPEG", "EXR", "TIFF"))
+    submit.add_argument("--samples", type=int)
+    submit.add_argument("--resolution", type=int, help="Resolution percentage")
+    submit.add_argument("--frame-start", type=int)
+    submit.add_argument("--frame-end", type=int)
+    submit.add_argument("--camera")
+    submit.add_argument("--view-layer")
+    
+    prepare = commands.add_parser("prepare", help="Export the open file for upload (runs inside Blender)")
+    prepare.add_argument("--output", required=True, help="Path of the prepared blend")
+    prepare.add_argument("--result", required=True, help="Path of the JSON result for the parent process")
+    prepare.add_argument("--scene", help="Scene to export (default: the active scene)")
+    
+    return parser
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """Read a manifest into a flat list of jobs with defaults applied and paths made absolute"""
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    
+    if isinstance(manifest, list):
+        manifest = {'jobs': manifest}
+    
+    base_dir = os.path.dirname(os.path.abspath(path))
+    defaults = manifest.get('defaults', {})
+    jobs = []
+    
+    for index, entry in enumerate(manifest.get('jobs', [])):
+        source = entry.get('blend') or entry.get('payload')
+        if not source:
+            raise ValueError(f"Manifest job {index} needs a 'blend' or 'payload' path")
+        
+        job = dict(defaults, **entry)
+        job['overrides'] = dict(defaults.get('overrides', {}), **entry.get('overrides', {}))
+        job['source'] = os.path.normpath(os.path.join(base_dir, source))
+        job['prepared'] = 'payload' in entry
+        jobs.append(job)
+    
+    return jobs
+
+def _job_result(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'source': job['source'],
+        'scene': job.get('scene') or "",
+        'overrides': job['overrides'],
+        'status': 'pending',
+        'job_id': "",
+        'tx_hash': "",
+        'blend_hash': "",
+        'sidecar_hash': "",
+        'error': "",
+        'timings': {},
+    }
+
+class BulkSubmitter:
+    """Prepares, uploads and submits a list of jobs with bounded parallelism"""
+    
+    def __init__(self, args):
+        self.args = args
+        self.ipfs = IPFSManager(args.ipfs_api, args.ipfs_gateway, AddOptions(
+            args.chunker, args.raw_leaves, args.cid_version, args.hash, not args.no_pin, args.trickle
+        ))
+        self.starknet = StarknetManager(args.rpc_url, args.contract)
+        self.blender = args.blender or _blender_binary() or "blender"
+        self.temp_dir = tempfile.mkdtemp(prefix="veriframe-cli-")
+        # One submit_jobs call at a time; its transactions are pipelined with local nonces
+        self._submit_lock = threading.Lock()
+    
+    def run(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        results = [_job_result(job) for job in jobs]
+        
+        # Jobs sharing a (source, scene) pair share one preparation and one upload
+        bases = {}
+        for job, result in zip(jobs, results):
+            bases.setdefault((job['source'], job.get('scene') or ""), []).append((job, result))
+        
+        prepare_pool = ThreadPoolExecutor(max(1, self.args.prepare_jobs), thread_name_prefix="veriframe-prepare")
+        upload_pool = ThreadPoolExecutor(max(1, self.args.upload_workers), thread_name_prefix="veriframe-upload")
+        pending = {}
+        ready = []
+        
+        def flush():
+            pending[upload_pool.submit(self._submit_batch, list(ready))] = ('submit', list(ready))
+            ready.clear()
+        
+        try:
+            for index, targets in enumerate(bases.values()):
+                job = targets[0][0]
+                if job.get('in_process'):
+                    # bpy is single threaded: the open file is exported right here
+                    future = _completed(self._prepare_in_process, job)
+                elif job['prepared']:
+                    future = _completed(self._use_payload, job)
+                else:
+                    future = prepare_pool.submit(self._prepare_subprocess, job, index)
+                pending[future] = ('prepare', targets)
+            
+            # Each stage hands its output to the next as soon as it is ready
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, targets = pending.pop(future)
+                    try:
+                        value = future.result()
+                    except Exception as e:
+                        for job, result in targets:
+                            result['status'] = 'failed'
+                            result['error'] = f"{stage}: {e}"
+                        continue
+                    
+                    if stage == 'prepare':
+                        payload_path, scene_name, seconds = value
+                        for job, result in targets:
+                            result['scene'] = scene_name
+                            result['timings']['prepare'] = round(seconds, 3)
+                        pending[upload_pool.submit(self._upload_base, payload_path)] = ('upload', targets)
+                    
+                    elif stage == 'upload':
+                        blend_hash, seconds = value
+                        for job, result in targets:
+                            result['blend_hash'] = blend_hash
+                            result['timings']['upload'] = round(seconds, 3)
+                            pending[upload_pool.submit(self._upload_sidecar, job, result)] = ('sidecar', [(job, result)])
+                    
+                    elif stage == 'sidecar':
+                        ready.extend(targets)
+                        if len(ready) >= self.args.batch_size:
+                            flush()
+                
+                # Once nothing else can join it, the last partial batch goes out
+                if ready and all(stage == 'submit' for stage, _ in pending.values()):
+                    flush()
+            
+            return results
+        
+        finally:
+            prepare_pool.shutdown(wait=True)
+            upload_pool.shutdown(wait=True)
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _use_payload(self, job: Dict[str, Any]):
+        """Already-prepared payloads skip preparation"""
+        if not os.path.isfile(job['source']):
+            raise RuntimeError(f"Payload not found: {job['source']}")
+        return job['source'], job.get('scene') or "", 0.0
+    
+    def _prepare_in_process(self, job: Dict[str, Any]):
+        import bpy
+        
+        start = time.perf_counter()
+        scene = bpy.data.scenes.get(job['scene']) if job.get('scene') else bpy.context.scene
+        if scene is None:
+            raise RuntimeError(f"Scene '{job['scene']}' not found")
+        
+        output_path = os.path.join(self.temp_dir, "open_file.blend")
+        with tracer.span("prepare_blend", "cli", source=job['source']):
+            if not BlenderJobManager.export_blend_file(output_path, {}, scene):
+                raise RuntimeError("Failed to prepare blend file")
+        return output_path, scene.name, time.perf_counter() - start
+    
+    def _prepare_subprocess(self, job: Dict[str, Any], index: int):
+        """Export one source file in a background Blender process"""
+        start = time.perf_counter()
+        output_path = os.path.join(self.temp_dir, f"job_{index}.blend")
+        result_path = os.path.join(self.temp_dir, f"job_{index}.json")
+        
+        package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        expr = (f"import sys; sys.path.insert(0, {package_parent!r}); "
+                f"from veriframe_addon import cli; sys.exit(cli.main())")
+        command = [self.blender, "-b", "--factory-startup", job['source'], "--python-expr", expr,
+                   "--", "prepare", "--output", output_path, "--result", result_path]
+        if job.get('scene'):
+            command += ["--scene", job['scene']]
+        
+        with tracer.span("prepare_subprocess", "cli", source=job['source']):
+            process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        
+        try:
+            with open(result_path, 'r', encoding='utf-8') as f:
+                outcome = json.load(f)
+        except (OSError, ValueError):
+            tail = process.stdout.strip().splitlines()[-5:]
+            raise RuntimeError(f"Blender exited with {process.returncode}: {' | '.join(tail)}")
+        
+        if not outcome.get('ok'):
+            raise RuntimeError(outcome.get('error', "Failed to prepare blend file"))
+        return output_path, outcome['scene'], time.perf_counter() - start
+    
+    def _upload_base(self, payload_path: str):
+        start = time.perf_counter()
+        # A manifest can run far longer than SUBMIT_DEADLINE, so each upload and
+        # each batch gets its own budget, like one submission from Blender
+        blend_hash = self.ipfs.upload_file(payload_path, deadline=Deadline(SUBMIT_DEADLINE))
+        if not blend_hash:
+            raise RuntimeError("Failed to upload to IPFS")
+        
+        # Free temp space early; a run can prepare hundreds of files
+        if payload_path.startswith(self.temp_dir):
+            os.remove(payload_path)
+        return blend_hash, time.perf_counter() - start
+    
+    def _upload_sidecar(self, job: Dict[str, Any], result: Dict[str, Any]):
+        start = time.perf_counter()
+        overrides = dict(job['overrides'])
+        if result['scene']:
+            overrides['scene'] = result['scene']
+        sidecar_hash = self.ipfs.upload_json(build_job_sidecar(result['blend_hash'], overrides),
+                                         deadline=Deadline(SUBMIT_DEADLINE))
+        if not sidecar_hash:
+            raise RuntimeError("Failed to upload to IPFS")
+        result['sidecar_hash'] = sidecar_hash
+        result['timings']['sidecar'] = round(time.perf_counter() - start, 3)
+    
+    def _submit_batch(self, targets: List[Tuple[Dict[str, Any], Dict[str, Any]]]):
+        """Submit jobs whose sidecars are uploaded as multicall transactions"""
+        start = time.perf_counter()
+        with self._submit_lock:
+            # Started once the lock is held: time spent behind other batches is not this one's
+            submissions = self.starknet.submit_jobs(
+                [(result['sidecar_hash'], float(job.get('reward', self.args.reward)),
+                  int(job.get('deadline_hours', self.args.deadline_hours))) for job, result in targets],
+                self.args.wallet, Deadline(SUBMIT_DEADLINE)
+            )
+        if not submissions:
+            raise RuntimeError("Failed to submit job to contract")
+        
+        seconds = round(time.perf_counter() - start, 3)
+        for (job, result), submission in zip(targets, submissions):
+            result['timings']['submit'] = seconds
+            result['tx_hash'] = submission.tx_hash or ""
+            if submission.state == SUBMITTED:
+                result['job_id'] = submission.job_id
+                result['status'] = 'submitted'
+            elif submission.state == UNCONFIRMED:
+                # Sent: resubmitting could post the job twice, so only report the hash
+                result['status'] = 'unconfirmed'
+                result['error'] = "submit: no receipt yet, check tx_hash before resubmitting"
+            else:
+                result['status'] = 'failed'
+                result['error'] = "submit: transaction failed"
+
+def _completed(function, *args):
+    """Run function now and wrap the outcome in a finished Future"""
+    future = Future()
+    try:
+        future.set_result(function(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def _cli_overrides(args) -> Dict[str, Any]:
+    overrides = {}
+    for arg_name, override in OVERRIDE_ARGS.items():
+        value = getattr(args, arg_name)
+        if value is not None:
+            overrides[override] = value
+    return overrides
+
+def run_submit(args) -> int:
+    """Submit every job in the manifest (or the open file) and write the report"""
+    if not args.wallet:
+        print("ERROR: a wallet address is required (--wallet or VERIFRAME_WALLET)")
+        return 2
+    
+    cli_overrides = _cli_overrides(args)
+    if args.manifest:
+        jobs = load_manifest(args.manifest)
+        for job in jobs:
+            job['overrides'] = dict(cli_overrides, **job['overrides'])
+            job.setdefault('scene', args.scene)
+    elif _blender_binary():
+        import bpy
+        
+        if not bpy.data.filepath:
+            print("ERROR: save the blend file or pass a manifest")
+            return 2
+        jobs = [{'source': bpy.data.filepath, 'scene': args.scene, 'overrides': cli_overrides,
+                 'prepared': False, 'in_process': True}]
+    else:
+        print("ERROR: pass a manifest, or run inside Blender to submit the open file")
+        return 2
+    
+    started = datetime.now()
+    start = time.perf_counter()
+    with tracer.span("bulk_submit", "cli", jobs=len(jobs)):
+        results = BulkSubmitter(args).run(jobs)
+    
+    submitted = sum(1 for result in results if result['status'] == 'submitted')
+    unconfirmed = sum(1 for result in results if result['status'] == 'unconfirmed')
+    report = {
+        'version': REPORT_VERSION,
+        'started': started.isoformat(timespec='seconds'),
+        'duration': round(time.perf_counter() - start, 3),
+        'submitted': submitted,
+        'unconfirmed': unconfirmed,
+        'failed': len(results) - submitted - unconfirmed,
+        'jobs': results,
+    }
+    
+    for result in results:
+        if result['status'] == 'submitted':
+            outcome = result['job_id']
+        elif result['status'] == 'unconfirmed':
+            outcome = f"UNCONFIRMED (transaction {result['tx_hash']})"
+        else:
+            outcome = f"FAILED ({result['error']})"
+        print(f"{os.path.basename(result['source'])} [{result['scene']}]: {outcome}")
+    print(f"Submitted {submitted} of {len(results)} jobs in {report['duration']:.1f}s")
+    
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.trace:
+        tracer.export_chrome_trace(args.trace)
+    
+    return 0 if submitted == len(results) else 1
+
+def run_prepare(args) -> int:
+    """Export the open file for a parent `submit` process and describe the outcome in --result"""
+    import bpy
+    
+    outcome = {'ok': False}
+    scene = bpy.data.scenes.get(args.scene) if args.scene else bpy.context.scene
+    if scene is None:
+        outcome['error'] = f"Scene '{args.scene}' not found"
+    elif BlenderJobManager.export_blend_file(args.output, {}, scene):
+        outcome = {'ok': True, 'scene': scene.name}
+    else:
+        outcome['error'] = "Failed to prepare blend file"
+    
+    with open(args.result, 'w', encoding='utf-8') as f:
+        json.dump(outcome, f)
+    return 0 if outcome['ok'] else 1
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point; inside Blender, arguments are read after the '--' separator"""
+    if argv is None:
+        if _blender_binary():
+            argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+        else:
+            argv = sys.argv[1:]
+    
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == "prepare":
+            return run_prepare(args)
+        return run_submit(args)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
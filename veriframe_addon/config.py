@@ -14,6 +14,18 @@ DEFAULT_MAINNET_RPC = "https://api.cartridge.gg/x/starknet/mainnet"
 SEPOLIA_CONTRACT_ADDRESS = "0x03103f3d37047b8bd0680c22a9b8d9502d5d1e34ab12259659dea2f6354ad7e8"
 MAINNET_CONTRACT_ADDRESS = ""  # To be deployed
 
+# Job registry interface and transaction limits
+SUBMIT_JOB_ENTRYPOINT = "submit_job"
+JOB_SUBMITTED_EVENT = "JobSubmitted"
+STRK_DECIMALS = 18
+MULTICALL_MAX_CALLDATA = 4000  # felts per transaction, with headroom under the network's limit
+MULTICALL_MAX_CALLS = 100  # calls per transaction, keeping steps and events well inside their limits
+PRIVATE_KEY_ENV = "VERIFRAME_PRIVATE_KEY"  # signing key of the wallet account (hex), never stored
+RECEIPT_POLL_INTERVAL = 1.0  # seconds between receipt polls while transactions are landing
+RECEIPT_MAX_POLL_INTERVAL = 8.0  # backoff cap while nothing new lands
+RECEIPT_TIMEOUT = 600  # seconds without a receipt before a transaction is reported as unconfirmed
+RECEIPT_BATCH_SIZE = 50  # receipts per batched JSON-RPC request
+
 # IPFS configuration
 DEFAULT_IPFS_API_URL = "http://127.0.0.1:5001"
 DEFAULT_IPFS_GATEWAY_URL = "http://127.0.0.1:8080"
@@ -27,6 +39,101 @@ DEFAULT_DEADLINE_HOURS = 24
 MIN_DEADLINE_HOURS = 1
 MAX_DEADLINE_HOURS = 168  # 1 week
 
+# Job sidecar (render overrides uploaded next to the base blend)
+SIDECAR_VERSION = 1
+MAX_SWEEP_VARIANTS = 64
+
+# Uploads
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # bytes read per streamed chunk
+PREUPLOAD_REGISTRY_FILE = "preupload.json"
+MAX_PREUPLOAD_ENTRIES = 200
+# `ipfs add` parameters (the node's defaults are a 256 KiB fixed-size chunker,
+# CIDv0, dag-pb leaves, sha2-256, pinning and the balanced layout)
+IPFS_CHUNKERS = [
+    ('SIZE', "Fixed Size", "Split files into blocks of the chosen size"),
+    ('RABIN', "Rabin", "Content-defined blocks averaging the chosen size, so inserted bytes only change nearby blocks"),
+    ('BUZHASH', "Buzhash", "Content-defined blocks from the node's faster buzhash chunker (its own fixed average size)"),
+]
+IPFS_HASH_FUNCTIONS = [
+    ('sha2-256', "SHA2-256", "The node's default; required for CIDv0"),
+    ('sha2-512', "SHA2-512", "SHA2-512 block hashes (CIDv1)"),
+    ('sha3-256', "SHA3-256", "SHA3-256 block hashes (CIDv1)"),
+    ('blake2b-256', "BLAKE2b-256", "BLAKE2b-256 block hashes (CIDv1)"),
+]
+DEFAULT_IPFS_CHUNK_SIZE_KB = 256
+MAX_IPFS_CHUNK_SIZE_KB = 1024  # largest block the node accepts
+
+PAYLOAD_CACHE_DIR = "payloads"  # prepared payloads of saved files, under the VeriFrame config folder
+MAX_CACHED_PAYLOADS = 8
+
+# Delta uploads against the previously submitted revision of a file
+DELTA_FORMAT = "vfdelta1"
+DELTA_SIDECAR_VERSION = 2  # sidecars whose blend is a delta reference
+DELTA_REGISTRY_FILE = "delta.json"
+DELTA_SIGNATURE_DIR = "signatures"
+MAX_DELTA_ENTRIES = 200
+DELTA_MIN_BLOCK_SIZE = 4 * 1024  # bytes; the block size grows with sqrt(file size)
+DELTA_MAX_BLOCK_SIZE = 1024 * 1024
+DELTA_MAX_RATIO = 0.5  # upload a delta only if it is at most this fraction of the file
+DELTA_ABORT_CHECK_BYTES = 8 * 1024 * 1024  # give up early once this much input is mostly literal
+DELTA_RESYNC_INTERVAL = 8  # in a long unmatched run, blocks hopped per block scanned byte by byte
+DELTA_MAX_SECONDS = 60  # give up once the whole file is projected to take longer than this
+DELTA_MAX_CHAIN = 8  # deltas on top of deltas before a full upload is forced
+
+# Presence checks before uploading (blocks the node already has are not sent)
+PRESENCE_CHECK_WORKERS = 8
+PRESENCE_CHECK_TIMEOUT = 10  # seconds per check; a block the node cannot answer for is sent
+
+# Network resilience
+RETRY_MAX_ATTEMPTS = 4
+RETRY_BASE_DELAY = 0.5  # seconds, doubled per attempt (with full jitter)
+RETRY_MAX_DELAY = 30.0
+CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failures before an endpoint is skipped
+CIRCUIT_RESET_TIMEOUT = 30.0  # seconds before a skipped endpoint is tried again
+SUBMIT_DEADLINE = 2 * 60 * 60  # overall budget for one submission, in seconds
+REFRESH_DEADLINE = 60
+
+# Contract read cache
+TERMINAL_JOB_STATUSES = ('COMPLETED', 'FAILED', 'CANCELLED')  # cached for the whole session
+CONTRACT_CACHE_TTL = 15.0  # seconds a non-terminal read is reused within the same block
+BLOCK_NUMBER_TTL = 2.0  # seconds the latest block number is reused
+CONTRACT_CACHE_MAX_ENTRIES = 5000
+
+# Offline submission queue
+QUEUE_DIR = "queue"  # under the VeriFrame config folder
+QUEUE_ENTRY_FILE = "entry.json"
+QUEUE_MAX_ATTEMPTS = 40  # drain attempts before an entry is marked failed
+QUEUE_RETRY_BASE_DELAY = 15.0  # seconds, doubled per attempt (with full jitter)
+QUEUE_RETRY_MAX_DELAY = 15 * 60.0
+QUEUE_POLL_INTERVAL = 2.0  # seconds between syncs with entries changed by other Blender instances
+DEFAULT_QUEUE_PARALLEL = 2
+
+# Progressive result retrieval
+RESULT_PREVIEW_DIRS = ('previews', 'preview', 'thumbnails', 'thumbs')  # result subfolders fetched first
+RESULT_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.exr', '.tif', '.tiff', '.webp')
+RESULT_MAX_DEPTH = 3  # directory levels listed below the result root
+
+# Main-thread dispatcher (results of background work applied to Blender data)
+DISPATCH_INTERVAL = 0.1  # seconds between drains while idle
+DISPATCH_BUSY_INTERVAL = 0.01  # seconds until the next drain while updates are backed up
+DISPATCH_BUDGET = 0.008  # seconds of updates applied per drain, so the UI stays responsive
+REFRESH_WORKERS = 8  # parallel status reads of a background refresh
+
+# Verified downloads: a trustless-gateway CAR in depth-first order with duplicate blocks
+CAR_ACCEPT = "application/vnd.ipld.car; version=1; order=dfs; dups=y"
+
+# Local result cache (content-addressed, shared between projects)
+RESULT_CACHE_DIR = "cache"  # under the VeriFrame config folder unless set in the preferences
+DEFAULT_RESULT_CACHE_GB = 20.0
+RESULT_CACHE_EVICT_TO = 0.9  # fraction of the size cap eviction frees down to, so a full cache is not rescanned on every insert
+
+# Diagnostics
+MAX_TRACE_SPANS = 500  # most recent timing spans kept for the debug panel
+DEBUG_PANEL_SPANS = 20  # spans listed in the debug panel
+METRICS_PROM_FILE = "veriframe.prom"
+METRICS_JSON_FILE = "veriframe_metrics.json"
+DEFAULT_METRICS_INTERVAL = 60  # seconds
+
 MAX_FILE_SIZE_MB = 500  # Maximum blend file size
 MAX_JOB_HISTORY = 100
 
@@ -37,6 +144,13 @@ SUPPORTED_ENGINES = [
     ('WORKBENCH', 'Workbench', 'Use Workbench rendering engine'),
 ]
 
+# Blender identifiers for the engines above
+RENDER_ENGINE_IDS = {
+    'CYCLES': 'CYCLES',
+    'EEVEE': 'BLENDER_EEVEE',
+    'WORKBENCH': 'BLENDER_WORKBENCH',
+}
+
 # Supported output formats
 SUPPORTED_FORMATS = [
     ('PNG', 'PNG', 'Portable Network Graphics'),
@@ -45,6 +159,14 @@ SUPPORTED_FORMATS = [
     ('TIFF', 'TIFF', 'TIFF format'),
 ]
 
+# Blender identifiers for the formats above
+RENDER_FORMAT_IDS = {
+    'PNG': 'PNG',
+    'JPEG': 'JPEG',
+    'EXR': 'OPEN_EXR',
+    'TIFF': 'TIFF',
+}
+
 # Job status types
 JOB_STATUS_TYPES = [
     ('PENDING', 'Pending', 'Job is waiting for a worker'),
@@ -54,6 +176,15 @@ JOB_STATUS_TYPES = [
     ('CANCELLED', 'Cancelled', 'Job was cancelled'),
 ]
 
+# Statuses a job may move to from each status; jobs never move backwards
+JOB_STATUS_TRANSITIONS = {
+    'PENDING': ('IN_PROGRESS', 'COMPLETED', 'FAILED', 'CANCELLED'),
+    'IN_PROGRESS': ('COMPLETED', 'FAILED', 'CANCELLED'),
+    'COMPLETED': (),
+    'FAILED': (),
+    'CANCELLED': (),
+}
+
 # UI constants
 PANEL_CATEGORY = "VeriFrame"
 ICON_CONNECTED = 'LINKED'
@@ -0,0 +1,143 @@
+"""
+Read cache for VeriFrame contract calls
+
+Jobs in a terminal state (completed, failed, cancelled) and their result
+hashes can never change on chain, so they are cached for the rest of the
+session. Other reads are reused while the chain has not produced a new block
+and the entry is younger than a short TTL. Concurrent identical reads share a
+single RPC call.
+"""
+
+import time
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Callable, Optional, Any, Hashable, Tuple
+
+from . import metrics
+from .config import CONTRACT_CACHE_TTL, CONTRACT_CACHE_MAX_ENTRIES, BLOCK_NUMBER_TTL
+
+CacheEntry = namedtuple('CacheEntry', 'value permanent block fetched_at')
+
+class _Flight:
+    """One in-progress fetch that other callers of the same key wait for"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class ContractReadCache:
+    """Permanent and block/TTL-bounded cache of contract reads, with request coalescing"""
+    
+    def __init__(self, ttl: float = CONTRACT_CACHE_TTL, max_entries: int = CONTRACT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._block = None  # (number, fetched_at)
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, fetch: Callable[[], Any], is_permanent: Callable[[Any], bool],
+            block_number: Optional[Callable[[], Optional[int]]] = None) -> Any:
+        """Return the value for key from the cache, or from fetch()
+        
+        Values for which is_permanent() is true never expire. Others expire
+        after the TTL or as soon as block_number() reports a newer block.
+        None means the read failed and is never cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        
+        if entry is not None and self._is_fresh(entry, block_number):
+            metrics.record_cache_lookup('contract', True)
+            return entry.value
+        
+        value, shared = self._single_flight(key, lambda: self._fetch(key, fetch, is_permanent, block_number))
+        # A caller that waited for someone else's fetch did not hit the chain either
+        metrics.record_cache_lookup('contract', shared)
+        return value
+    
+    def invalidate(self, *keys: Hashable):
+        """Forget cached values, e.g. after a transaction changed them"""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._block = None
+    
+    def current_block(self, block_number: Callable[[], Optional[int]]) -> Optional[int]:
+        """Latest block number, asked for at most once per BLOCK_NUMBER_TTL"""
+        with self._lock:
+            block = self._block
+        if block is not None and time.monotonic() - block[1] < BLOCK_NUMBER_TTL:
+            return block[0]
+        
+        number, _ = self._single_flight(('block_number',), block_number)
+        if number is not None:
+            with self._lock:
+                self._block = (number, time.monotonic())
+        return number
+    
+    def _is_fresh(self, entry: CacheEntry, block_number) -> bool:
+        if entry.permanent:
+            return True
+        if time.monotonic() - entry.fetched_at >= self.ttl:
+            return False
+        if block_number is None or entry.block is None:
+            return True
+        return self.current_block(block_number) == entry.block
+    
+    def _fetch(self, key, fetch, is_permanent, block_number):
+        # The block is read first so a cached value is never older than its block
+        block = self.current_block(block_number) if block_number else None
+        value = fetch()
+        if value is None:
+            return None
+        
+        with self._lock:
+            self._entries[key] = CacheEntry(value, bool(is_permanent(value)), block, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+    
+    def _single_flight(self, key: Hashable, fetch: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fetch once for concurrent callers of the same key; returns (value, shared)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, True
+        
+        try:
+            flight.value = fetch()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value, False
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache(rpc_url: str, contract_address: str) -> ContractReadCache:
+    """Cache shared by every StarknetManager for one network and contract"""
+    with _caches_lock:
+        cache = _caches.get((rpc_url, contract_address))
+        if cache is None:
+            cache = _caches[(rpc_url, contract_address)] = ContractReadCache()
+        return cache
@@ -0,0 +1,448 @@
+"""
+Binary delta uploads for the VeriFrame addon
+
+Remembers a block signature of the last payload uploaded for each source
+blend file. When a new payload shares most of its bytes with that revision,
+only an rsync-style delta (block copies from the base plus literal bytes) is
+uploaded, and the job sidecar references the base and the delta instead of a
+full blend.
+
+Everything streams: the signature holds one adler32 + blake2b entry per block,
+the target is read once in chunks, and the delta is written straight to disk,
+so multi-GB files never have to fit in memory. Matching aligned blocks costs C
+speed (zlib/hashlib); only bytes that do not match are rolled through Python.
+That roll is bounded: an unmatched run is crossed a block at a time, rolling
+through only one block in DELTA_RESYNC_INTERVAL, which still finds the base
+again after an insert or delete.
+
+Delta format (vfdelta1), little endian:
+    b"VFDELTA1" base_size:u64 block_size:u32
+    b"C" first_block:u32 block_count:u32    copy blocks from the base
+    b"L" length:u32 data                    literal bytes
+    b"E" target_size:u64 blake2b_256        end, with a checksum of the result
+"""
+
+import os
+import json
+import math
+import shutil
+import time
+import zlib
+import struct
+import hashlib
+import threading
+from collections import namedtuple
+from typing import Optional, Dict, Any, Union
+
+from .config import (
+    DELTA_FORMAT,
+    DELTA_REGISTRY_FILE,
+    DELTA_SIGNATURE_DIR,
+    MAX_DELTA_ENTRIES,
+    DELTA_MIN_BLOCK_SIZE,
+    DELTA_MAX_BLOCK_SIZE,
+    DELTA_MAX_RATIO,
+    DELTA_ABORT_CHECK_BYTES,
+    DELTA_RESYNC_INTERVAL,
+    DELTA_MAX_SECONDS,
+    DELTA_MAX_CHAIN,
+    UPLOAD_CHUNK_SIZE,
+)
+from .tracing import tracer
+from .utils import get_data_dir, write_json_atomic
+
+SIGNATURE_MAGIC = b"VFSIG1\0\0"
+DELTA_MAGIC = b"VFDELTA1"
+STRONG_DIGEST_SIZE = 16
+MAX_LITERAL_RUN = UPLOAD_CHUNK_SIZE
+ADLER_MOD = 65521
+
+_SIGNATURE_HEADER = struct.Struct('<QI')
+_SIGNATURE_ENTRY = struct.Struct(f'<I{STRONG_DIGEST_SIZE}s')
+_COPY = struct.Struct('<II')
+_LITERAL = struct.Struct('<I')
+_END = struct.Struct('<Q')
+
+DeltaStats = namedtuple('DeltaStats', 'target_size delta_size copied_bytes literal_bytes seconds')
+
+def choose_block_size(file_size: int) -> int:
+    """rsync's sqrt rule rounded to a power of two, within the configured bounds"""
+    size = 1 << int(math.sqrt(max(file_size, 1))).bit_length()
+    return max(DELTA_MIN_BLOCK_SIZE, min(DELTA_MAX_BLOCK_SIZE, size))
+
+def _strong(data) -> bytes:
+    return hashlib.blake2b(data, digest_size=STRONG_DIGEST_SIZE).digest()
+
+class SignatureWriter:
+    """Builds a block signature from a stream of chunks"""
+    
+    def __init__(self, path: str, block_size: int):
+        self.block_size = block_size
+        self.size = 0
+        self._pending = bytearray()
+        self._file = open(path, 'wb')
+        self._file.write(SIGNATURE_MAGIC + _SIGNATURE_HEADER.pack(0, block_size))
+    
+    def update(self, chunk):
+        self.size += len(chunk)
+        self._pending += chunk
+        block_size = self.block_size
+        offset = 0
+        entries = []
+        with memoryview(self._pending) as view:
+            while len(view) - offset >= block_size:
+                block = view[offset:offset + block_size]
+                entries.append(_SIGNATURE_ENTRY.pack(zlib.adler32(block), _strong(block)))
+                block.release()
+                offset += block_size
+        if offset:
+            del self._pending[:offset]
+            self._file.write(b"".join(entries))
+    
+    def close(self):
+        """Finish the signature; a trailing partial block is not indexed"""
+        self._file.seek(len(SIGNATURE_MAGIC))
+        self._file.write(_SIGNATURE_HEADER.pack(self.size, self.block_size))
+        self._file.close()
+
+def write_signature(file_path: str, signature_path: str):
+    """Compute the block signature of a file"""
+    with tracer.span("delta.signature", "delta", bytes=os.path.getsize(file_path)):
+        writer = SignatureWriter(signature_path, choose_block_size(os.path.getsize(file_path)))
+        try:
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b''):
+                    writer.update(chunk)
+        finally:
+            writer.close()
+
+def read_signature(signature_path: str):
+    """Load a signature as (base_size, block_size, {weak: {strong: block_index}})"""
+    with open(signature_path, 'rb') as f:
+        if f.read(len(SIGNATURE_MAGIC)) != SIGNATURE_MAGIC:
+            raise ValueError(f"Not a VeriFrame signature: {signature_path}")
+        base_size, block_size = _SIGNATURE_HEADER.unpack(f.read(_SIGNATURE_HEADER.size))
+        
+        table = {}
+        index = 0
+        for weak, strong in _SIGNATURE_ENTRY.iter_unpack(f.read()):
+            # The first block with given content wins; duplicates add nothing
+            table.setdefault(weak, {}).setdefault(strong, index)
+            index += 1
+    
+    return base_size, block_size, table
+
+def _lookup(table, block) -> Optional[int]:
+    """Index of the base block with the same content, if any"""
+    candidates = table.get(zlib.adler32(block))
+    return candidates.get(_strong(block)) if candidates else None
+
+class _DeltaWriter:
+    """Encodes copy and literal operations, merging consecutive block copies"""
+    
+    def __init__(self, f, base_size: int, block_size: int):
+        self._file = f
+        self._copy_start = None
+        self._copy_count = 0
+        self.copied_bytes = 0
+        self.literal_bytes = 0
+        f.write(DELTA_MAGIC + _SIGNATURE_HEADER.pack(base_size, block_size))
+        self._block_size = block_size
+    
+    def copy(self, block_index: int):
+        if self._copy_start is not None and block_index == self._copy_start + self._copy_count:
+            self._copy_count += 1
+        else:
+            self._flush_copy()
+            self._copy_start = block_index
+            self._copy_count = 1
+        self.copied_bytes += self._block_size
+    
+    def literal(self, data):
+        if not len(data):
+            return
+        self._flush_copy()
+        self.literal_bytes += len(data)
+        for offset in range(0, len(data), MAX_LITERAL_RUN):
+            run = data[offset:offset + MAX_LITERAL_RUN]
+            self._file.write(b"L" + _LITERAL.pack(len(run)))
+            self._file.write(run)
+    
+    def _flush_copy(self):
+        if self._copy_start is not None:
+            self._file.write(b"C" + _COPY.pack(self._copy_start, self._copy_count))
+            self._copy_start = None
+    
+    def end(self, target_size: int, digest: bytes):
+        self._flush_copy()
+        self._file.write(b"E" + _END.pack(target_size) + digest)
+
+def compute_delta(signature_path: str, target_path: str, delta_path: str,
+                  new_signature_path: Optional[str] = None) -> Optional[DeltaStats]:
+    """Write a delta that rebuilds target_path from the file behind signature_path
+    
+    The target is read once; if new_signature_path is given, the target's own
+    signature is written on the way for the next revision. Returns None (and
+    removes the partial delta) as soon as the target turns out to be mostly new
+    bytes, since a full upload is cheaper then, or the scan is projected to
+    take longer than DELTA_MAX_SECONDS.
+    """
+    start = time.perf_counter()
+    base_size, block_size, table = read_signature(signature_path)
+    target_size = os.path.getsize(target_path)
+    hasher = hashlib.blake2b(digest_size=32)
+    signature = SignatureWriter(new_signature_path, choose_block_size(target_size)) if new_signature_path else None
+    read_size = max(UPLOAD_CHUNK_SIZE, block_size * 4)
+    aborted = False
+    
+    try:
+        with tracer.span("delta.compute", "delta", bytes=target_size) as span, \
+                open(target_path, 'rb') as source, open(delta_path, 'wb') as out:
+            writer = _DeltaWriter(out, base_size, block_size)
+            buf = b""
+            pos = 0          # window start within buf
+            literal_start = 0
+            processed = 0    # bytes of buf consumed before the current buf
+            next_check = DELTA_ABORT_CHECK_BYTES
+            missed = 0       # bytes since the last match
+            weak = None
+            eof = False
+            
+            while True:
+                available = len(buf) - pos
+                # Two blocks ahead, so a miss can look at the aligned block after the window
+                if available < 2 * block_size and not eof:
+                    chunk = source.read(read_size)
+                    if chunk:
+                        hasher.update(chunk)
+                        if signature:
+                            signature.update(chunk)
+                        writer.literal(buf[literal_start:pos])
+                        processed += pos
+                        buf = buf[pos:] + chunk
+                        pos = literal_start = 0
+                    else:
+                        eof = True
+                    
+                    if processed >= next_check:
+                        next_check = processed + DELTA_ABORT_CHECK_BYTES
+                        # Mostly new bytes, or so many misses that the scan would hold up the
+                        # submission (projected once a tenth of the time is used, not from one chunk)
+                        elapsed = time.perf_counter() - start
+                        if (writer.literal_bytes > DELTA_MAX_RATIO * processed
+                                or (elapsed * 10 > DELTA_MAX_SECONDS
+                                    and elapsed * target_size > DELTA_MAX_SECONDS * processed)):
+                            aborted = True
+                            break
+                    continue
+                
+                if available < block_size:
+                    break
+                
+                if weak is None:
+                    weak = zlib.adler32(buf[pos:pos + block_size])
+                
+                candidates = table.get(weak)
+                if candidates:
+                    block_index = candidates.get(_strong(buf[pos:pos + block_size]))
+                    if block_index is not None:
+                        writer.literal(buf[literal_start:pos])
+                        writer.copy(block_index)
+                        pos += block_size
+                        literal_start = pos
+                        missed = 0
+                        weak = None
+                        continue
+                
+                # No match. Rolling every byte through Python is slow, so the scan hops a
+                # block at a time (overwritten blocks are followed by an aligned match)
+                # and rolls through only the second block of a miss run, where the base
+                # resumes after an insert or delete of up to a block, and one block in
+                # every DELTA_RESYNC_INTERVAL after it; each rolled block covers every
+                # shift. A block is not rolled when the aligned block after it matches.
+                if (missed // block_size) % DELTA_RESYNC_INTERVAL != 1 or (
+                        missed % block_size == 0 and available >= 2 * block_size
+                        and _lookup(table, buf[pos + block_size:pos + 2 * block_size]) is not None):
+                    pos += block_size
+                    missed += block_size
+                    weak = None
+                    continue
+                
+                # The byte leaving the window becomes literal, roll by one
+                missed += 1
+                if available > block_size:
+                    outgoing = buf[pos]
+                    a = ((weak & 0xffff) - outgoing + buf[pos + block_size]) % ADLER_MOD
+                    b = ((weak >> 16) - block_size * outgoing - 1 + a) % ADLER_MOD
+                    weak = (b << 16) | a
+                else:
+                    weak = None
+                pos += 1
+            
+            if not aborted:
+                writer.literal(buf[literal_start:])
+                writer.end(target_size, hasher.digest())
+                span.set(copied=writer.copied_bytes, literal=writer.literal_bytes)
+    except BaseException:
+        aborted = True
+        raise
+    finally:
+        if signature:
+            signature.close()
+        if aborted:
+            for path in (delta_path, new_signature_path):
+                if path and os.path.exists(path):
+                    os.remove(path)
+    
+    if aborted:
+        return None
+    
+    return DeltaStats(target_size, os.path.getsize(delta_path), writer.copied_bytes,
+                      writer.literal_bytes, time.perf_counter() - start)
+
+def apply_delta(base_path: str, delta_path: str, output_path: str):
+    """Rebuild the target of a delta from its base, verifying size and checksum"""
+    hasher = hashlib.blake2b(digest_size=32)
+    written = 0
+    
+    with open(base_path, 'rb') as base, open(delta_path, 'rb') as delta, open(output_path, 'wb') as out:
+        if delta.read(len(DELTA_MAGIC)) != DELTA_MAGIC:
+            raise ValueError(f"Not a {DELTA_FORMAT} delta: {delta_path}")
+        base_size, block_size = _SIGNATURE_HEADER.unpack(delta.read(_SIGNATURE_HEADER.size))
+        if os.fstat(base.fileno()).st_size != base_size:
+            raise ValueError("Delta was computed against a different base file")
+        
+        while True:
+            op = delta.read(1)
+            if op == b"C":
+                first_block, block_count = _COPY.unpack(delta.read(_COPY.size))
+                base.seek(first_block * block_size)
+                remaining = block_count * block_size
+                while remaining:
+                    data = base.read(min(remaining, UPLOAD_CHUNK_SIZE))
+                    if not data:
+                        raise ValueError("Delta copies past the end of the base file")
+                    out.write(data)
+                    hasher.update(data)
+                    remaining -= len(data)
+                    written += len(data)
+            elif op == b"L":
+                length, = _LITERAL.unpack(delta.read(_LITERAL.size))
+                data = delta.read(length)
+                out.write(data)
+                hasher.update(data)
+                written += len(data)
+            elif op == b"E":
+                target_size, = _END.unpack(delta.read(_END.size))
+                if written != target_size or delta.read(hasher.digest_size) != hasher.digest():
+                    raise ValueError("Delta output does not match the original file")
+                return
+            else:
+                raise ValueError("Truncated or corrupt delta")
+
+BlendRef = Union[str, Dict[str, Any]]
+
+class DeltaRegistry:
+    """Last uploaded revision of each source file: its blend reference and block signature"""
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, DELTA_REGISTRY_FILE)
+        self.signature_dir = os.path.join(directory, DELTA_SIGNATURE_DIR)
+        self._lock = threading.Lock()
+        os.makedirs(self.signature_dir, exist_ok=True)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+    
+    def signature_path(self, source_path: str) -> str:
+        key = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.signature_dir, f"{key}.sig")
+    
+    def lookup(self, source_path: str) -> Optional[Dict[str, Any]]:
+        """{'ref', 'depth'} of the last revision, if its signature is still on disk"""
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(source_path))
+        if entry and os.path.exists(self.signature_path(source_path)):
+            return entry
+        return None
+    
+    def record(self, source_path: str, ref: BlendRef, depth: int, signature_path: str):
+        """Make an uploaded revision the base for the next delta"""
+        shutil.move(signature_path, self.signature_path(source_path))
+        with self._lock:
+            key = os.path.abspath(source_path)
+            self._entries.pop(key, None)
+            self._entries[key] = {'ref': ref, 'depth': depth}
+            
+            # Drop the oldest entries (dicts keep insertion order)
+            while len(self._entries) > MAX_DELTA_ENTRIES:
+                oldest = next(iter(self._entries))
+                del self._entries[oldest]
+                try:
+                    os.remove(self.signature_path(oldest))
+                except OSError:
+                    pass
+            
+            snapshot = dict(self._entries)
+        
+        try:
+            write_json_atomic(self.path, snapshot)
+        except OSError as e:
+            print(f"Could not save delta registry: {e}")
+
+_registry = None
+
+def get_registry() -> DeltaRegistry:
+    """Return the process-wide delta registry"""
+    global _registry
+    if _registry is None:
+        _registry = DeltaRegistry(get_data_dir())
+    return _registry
+
+def upload_with_delta(ipfs, source_path: str, payload_path: str, deadline=None,
+                      work_dir: Optional[str] = None) -> Optional[BlendRef]:
+    """Upload a prepared payload, as a delta against the last revision of source_path when worthwhile
+    
+    Returns the blend reference for the job sidecar: a CID for a full upload,
+    or {'format', 'base', 'delta'} where base is itself a blend reference.
+    The delta and signature are written to work_dir (next to the payload by
+    default), which matters when the payload is the user's own saved file.
+    """
+    registry = get_registry()
+    previous = registry.lookup(source_path)
+    work_base = os.path.join(work_dir or os.path.dirname(payload_path), os.path.basename(payload_path))
+    new_signature_path = work_base + ".sig"
+    
+    if previous and previous['depth'] < DELTA_MAX_CHAIN:
+        delta_path = work_base + ".delta"
+        try:
+            stats = compute_delta(registry.signature_path(source_path), payload_path, delta_path, new_signature_path)
+        except (OSError, ValueError) as e:
+            print(f"Delta computation failed, uploading the full file: {e}")
+            stats = None
+        
+        if stats and stats.delta_size <= DELTA_MAX_RATIO * stats.target_size:
+            print(f"Uploading delta: {stats.delta_size} of {stats.target_size} bytes ({stats.seconds:.1f}s to compute)")
+            try:
+                delta_cid = ipfs.upload_file(delta_path, deadline=deadline)
+            finally:
+                os.remove(delta_path)
+            if not delta_cid:
+                return None
+            
+            ref = {'format': DELTA_FORMAT, 'base': previous['ref'], 'delta': delta_cid}
+            registry.record(source_path, ref, previous['depth'] + 1, new_signature_path)
+            return ref
+        
+        if stats:
+            os.remove(delta_path)
+    
+    cid = ipfs.upload_file(payload_path, deadline=deadline)
+    if cid:
+        if not os.path.exists(new_signature_path):
+            write_signature(payload_path, new_signature_path)
+        registry.record(source_path, cid, 0, new_signature_path)
+    return cid
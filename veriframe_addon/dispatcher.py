@@ -0,0 +1,148 @@
+"""
+Main-thread dispatch of background results for the VeriFrame addon
+
+Uploads, downloads, queue drains and status refreshes run on worker threads,
+but Blender data may only be touched on the main thread. Workers post their
+results here instead; a bpy.app.timers callback applies them on the main
+thread within a small time budget per tick, so hundreds of completions
+arriving at once are spread over several ticks instead of freezing the UI.
+
+Updates run in the order they were posted, from a single queue, and are
+coalesced inside it: a keyed update replaces one with the same key that has
+not run yet (keeping its place, since it re-reads the latest state when it
+runs), and field changes for the same job are merged into one entry at the
+back of the queue, so they still follow any update posted before them (such
+as the one adding the job). Job panels are redrawn at most once per tick,
+and only if an update changed something.
+"""
+
+import time
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+import bpy
+
+from . import job_state
+from .config import DISPATCH_INTERVAL, DISPATCH_BUSY_INTERVAL, DISPATCH_BUDGET
+
+def find_job(props, job_id: str):
+    """Job with job_id in props.jobs, or None"""
+    # Jobs are named after their ID, so the lookup happens in C
+    index = props.jobs.find(job_id)
+    if index >= 0:
+        return props.jobs[index]
+    
+    # Jobs added before they were named
+    for job in props.jobs:
+        if job.job_id == job_id:
+            return job
+    return None
+
+class MainThreadDispatcher:
+    """Thread-safe queue of Blender data updates, drained on the main thread"""
+    
+    def __init__(self, budget: float = DISPATCH_BUDGET):
+        self.budget = budget
+        # key -> update callable, or the dict of pending field changes of a job
+        self._queue = OrderedDict()
+        self._redraw = False
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+    
+    def post(self, update: Callable[[], Optional[bool]], key: Optional[Hashable] = None):
+        """Run update() on the main thread; it returns True if job panels need a redraw
+        
+        With a key, the update replaces a pending update posted with the same
+        key (keeping its place in line).
+        """
+        with self._lock:
+            self._queue[key if key is not None else ('anonymous', next(self._sequence))] = update
+    
+    def update_job(self, scene_name: str, job_id: str, **changes):
+        """Set fields of a job in scene_name's history; status changes go through the job state machine"""
+        key = ('job', scene_name, job_id)
+        with self._lock:
+            # Merged changes move to the back: they must not overtake updates posted before them
+            merged = self._queue.pop(key, {})
+            merged.update(changes)
+            self._queue[key] = merged
+    
+    def redraw(self):
+        """Redraw the job panels on the next tick, e.g. after a worker's status text changed"""
+        with self._lock:
+            self._redraw = True
+    
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._queue)
+    
+    def clear(self):
+        with self._lock:
+            self._queue.clear()
+            self._redraw = False
+    
+    def drain(self) -> bool:
+        """Apply pending updates until the time budget is spent (main thread only); True if some are left"""
+        start = time.perf_counter()
+        with self._lock:
+            changed, self._redraw = self._redraw, False
+        
+        while time.perf_counter() - start < self.budget:
+            with self._lock:
+                if not self._queue:
+                    break
+                key, update = self._queue.popitem(last=False)
+            
+            try:
+                if isinstance(update, dict):
+                    _, scene_name, job_id = key
+                    changed = self._apply_job_changes(scene_name, job_id, update) or changed
+                else:
+                    changed = bool(update()) or changed
+            except Exception as e:
+                print(f"Main-thread update failed: {e}")
+        
+        if changed:
+            job_state.tag_redraw_job_panels()
+        return self.pending() > 0
+    
+    def _apply_job_changes(self, scene_name: str, job_id: str, changes) -> bool:
+        scene = bpy.data.scenes.get(scene_name)
+        job = find_job(scene.veriframe, job_id) if scene is not None else None
+        if job is None:
+            return False
+        
+        changed = False
+        for name, value in changes.items():
+            if name == 'status':
+                changed = job_state.transition(job, value) or changed
+            elif getattr(job, name) != value:
+                setattr(job, name, value)
+                changed = True
+        return changed
+
+_dispatcher = MainThreadDispatcher()
+
+def get_dispatcher() -> MainThreadDispatcher:
+    """Return the process-wide dispatcher"""
+    return _dispatcher
+
+def _tick():
+    """bpy.app.timers callback: apply a budget's worth of updates"""
+    try:
+        backlog = _dispatcher.drain()
+    except Exception as e:
+        print(f"Dispatcher error: {e}")
+        backlog = False
+    return DISPATCH_BUSY_INTERVAL if backlog else DISPATCH_INTERVAL
+
+def register():
+    if not bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.register(_tick, first_interval=DISPATCH_INTERVAL, persistent=True)
+
+def unregister():
+    if bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.unregister(_tick)
+    _dispatcher.clear()
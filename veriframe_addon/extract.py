@@ -0,0 +1,551 @@
+"""
+Streaming extraction of result archives for the VeriFrame addon
+
+ArchiveSink receives the bytes of a zip or tar archive (optionally
+gzip-compressed) as they are downloaded and writes every entry straight to
+its destination, so an archive is never saved whole and then unpacked.
+Memory use is bounded by the chunk size, whatever the archive size.
+
+An entry whose destination already exists is compared with it as it streams
+and only written if the bytes differ, so frames left by an earlier download
+are not rewritten. Frames can be placed at the scene's output path
+(render.filepath, with its '#' run replaced by the frame number) instead of
+the download folder.
+"""
+
+import os
+import re
+import zlib
+import struct
+from typing import Optional, Callable
+
+from .config import RESULT_PREVIEW_DIRS, RESULT_IMAGE_EXTENSIONS, UPLOAD_CHUNK_SIZE
+
+_FRAME_NUMBER = re.compile(r'(\d+)(?=\.[^.]+$)')
+_HASH_RUN = re.compile(r'#+')
+
+# Largest tar metadata record (pax header or GNU long name) kept in memory
+_MAX_TAR_METADATA = 1024 * 1024
+
+class ExtractionError(Exception):
+    """The archive is malformed, truncated or uses an unsupported feature"""
+
+def frame_number(path: str) -> Optional[int]:
+    """Frame number at the end of a file name (frame_0012.png -> 12), if any"""
+    match = _FRAME_NUMBER.search(os.path.basename(path))
+    return int(match.group(1)) if match else None
+
+def is_preview(path: str) -> bool:
+    return path.split('/', 1)[0].lower() in RESULT_PREVIEW_DIRS
+
+def expand_frame_pattern(pattern: str, frame: int, extension: str) -> str:
+    """Blender's frame path rule: the last '#' run becomes the padded frame, else 4 digits are appended"""
+    directory, name = os.path.split(pattern)
+    runs = list(_HASH_RUN.finditer(name))
+    if runs:
+        run = runs[-1]
+        name = name[:run.start()] + str(frame).zfill(len(run.group())) + name[run.end():]
+    else:
+        name += f"{frame:04d}"
+    return os.path.join(directory, name + extension)
+
+class FrameTarget:
+    """Where archive entries go: below directory, or frames at the render output pattern"""
+    
+    def __init__(self, directory: str, render_pattern: Optional[str] = None):
+        self.directory = directory
+        self.render_pattern = render_pattern
+    
+    def path_for(self, name: str) -> Optional[str]:
+        """Destination of an entry, or None to skip it"""
+        parts = [part for part in name.replace('\\', '/').split('/') if part not in ("", ".")]
+        # Names come from the archive: never let one escape the output folder
+        if not parts or ".." in parts or ':' in parts[0]:
+            return None
+        
+        path = '/'.join(parts)
+        frame = frame_number(path)
+        if (self.render_pattern and frame is not None and not is_preview(path)
+                and path.lower().endswith(RESULT_IMAGE_EXTENSIONS)):
+            return expand_frame_pattern(self.render_pattern, frame, os.path.splitext(path)[1])
+        return os.path.join(self.directory, *parts)
+
+class _EntryWriter:
+    """Writes one entry, or only compares it when the destination already holds it"""
+    
+    def __init__(self, path: str, size: Optional[int] = None):
+        self.path = path
+        self._partial_path = path + ".part"
+        self._existing = None
+        self._matched = 0
+        self._out = None
+        if os.path.isfile(path) and (size is None or os.path.getsize(path) == size):
+            self._existing = open(path, 'rb')
+        else:
+            self._open_output()
+    
+    def _open_output(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._out = open(self._partial_path, 'wb')
+    
+    def write(self, data):
+        if self._existing is not None:
+            if self._existing.read(len(data)) == data:
+                self._matched += len(data)
+                return
+            self._diverge()
+        self._out.write(data)
+    
+    def _diverge(self):
+        """The entry differs from the file on disk: write it out, starting with the part that matched"""
+        existing, self._existing = self._existing, None
+        self._open_output()
+        existing.seek(0)
+        remaining = self._matched
+        while remaining:
+            chunk = existing.read(min(remaining, UPLOAD_CHUNK_SIZE))
+            self._out.write(chunk)
+            remaining -= len(chunk)
+        existing.close()
+    
+    def close(self) -> bool:
+        """Finish the entry; returns whether anything was written"""
+        if self._existing is not None:
+            if not self._existing.read(1):
+                self._existing.close()
+                self._existing = None
+                return False
+            # The file on disk is longer than the entry
+            self._diverge()
+        self._out.close()
+        self._out = None
+        os.replace(self._partial_path, self.path)
+        return True
+    
+    def discard(self):
+        if self._existing is not None:
+            self._existing.close()
+        if self._out is not None:
+            self._out.close()
+            os.remove(self._partial_path)
+
+class _Entries:
+    """Opens and closes entry writers for a parser and reports finished entries"""
+    
+    def __init__(self, target: FrameTarget, on_entry: Optional[Callable[[str, str, bool], None]]):
+        self.target = target
+        self.on_entry = on_entry
+        self.current = None
+        self._name = None
+    
+    def open(self, name: str, size: Optional[int] = None):
+        path = self.target.path_for(name)
+        self._name = name
+        self.current = _EntryWriter(path, size) if path else None
+    
+    def write(self, data):
+        if self.current is not None:
+            self.current.write(data)
+    
+    def close(self):
+        if self.current is not None:
+            written = self.current.close()
+            if self.on_entry:
+                self.on_entry(self._name, self.current.path, written)
+        self.current = None
+    
+    def discard(self):
+        if self.current is not None:
+            self.current.discard()
+        self.current = None
+
+class _ZipParser:
+    """Reads zip local file headers and entry data in order, without the central directory"""
+    
+    def __init__(self, entries: _Entries):
+        self.entries = entries
+        self._buffer = bytearray()
+        self._state = 'header'
+        self._done = False
+    
+    def feed(self, data):
+        if self._done:
+            return
+        self._buffer += data
+        while not self._done and self._step():
+            pass
+    
+    def finish(self):
+        if not self._done:
+            raise ExtractionError("Zip archive ended in the middle of an entry")
+    
+    def _step(self) -> bool:
+        """Advance as far as the buffered bytes allow; False when more are needed"""
+        if self._state == 'header':
+            return self._read_header()
+        if self._state == 'data':
+            return self._read_data()
+        return self._read_descriptor()
+    
+    def _read_header(self) -> bool:
+        if len(self._buffer) < 4:
+            return False
+        signature = bytes(self._buffer[:4])
+        if signature != b"PK\x03\x04":
+            if signature in (b"PK\x01\x02", b"PK\x05\x06", b"PK\x06\x06"):
+                # Central directory: every entry has been read
+                self._done = True
+                self._buffer.clear()
+                return False
+            raise ExtractionError("Not a zip local file header")
+        if len(self._buffer) < 30:
+            return False
+        (_, flags, method, _, _, crc, compressed_size, size,
+         name_length, extra_length) = struct.unpack_from('<HHHHHIIIHH', self._buffer, 4)
+        header_length = 30 + name_length + extra_length
+        if len(self._buffer) < header_length:
+            return False
+        
+        name = bytes(self._buffer[30:30 + name_length]).decode('utf-8' if flags & 0x800 else 'cp437')
+        extra = bytes(self._buffer[30 + name_length:header_length])
+        del self._buffer[:header_length]
+        
+        self._zip64 = False
+        if compressed_size == 0xFFFFFFFF or size == 0xFFFFFFFF:
+            size, compressed_size = self._zip64_sizes(extra, size, compressed_size)
+            self._zip64 = True
+        
+        if flags & 0x1:
+            raise ExtractionError(f"{name} is encrypted")
+        if method not in (0, 8):
+            raise ExtractionError(f"{name} uses unsupported compression method {method}")
+        self._has_descriptor = bool(flags & 0x8)
+        if self._has_descriptor and method == 0:
+            raise ExtractionError(f"{name} is stored without a size")
+        
+        self._expected_crc = crc
+        self._crc = 0
+        self._remaining = None if self._has_descriptor else compressed_size
+        self._inflater = zlib.decompressobj(-15) if method == 8 else None
+        if name.endswith('/'):
+            self.entries.current = None
+        else:
+            self.entries.open(name, None if self._has_descriptor else size)
+        self._state = 'data'
+        return True
+    
+    @staticmethod
+    def _zip64_sizes(extra: bytes, size: int, compressed_size: int):
+        offset = 0
+        while offset + 4 <= len(extra):
+            header_id, length = struct.unpack_from('<HH', extra, offset)
+            if header_id == 0x0001:
+                values = extra[offset + 4:offset + 4 + length]
+                position = 0
+                if size == 0xFFFFFFFF:
+                    size, = struct.unpack_from('<Q', values, position)
+                    position += 8
+                if compressed_size == 0xFFFFFFFF:
+                    compressed_size, = struct.unpack_from('<Q', values, position)
+                return size, compressed_size
+            offset += 4 + length
+        raise ExtractionError("Zip64 entry without sizes")
+    
+    def _emit(self, data):
+        self._crc = zlib.crc32(data, self._crc)
+        self.entries.write(data)
+    
+    def _read_data(self) -> bool:
+        if not self._buffer and self._remaining != 0:
+            return False
+        
+        take = len(self._buffer) if self._remaining is None else min(self._remaining, len(self._buffer))
+        chunk = bytes(self._buffer[:take])
+        del self._buffer[:take]
+        if self._remaining is not None:
+            self._remaining -= take
+        
+        if self._inflater is None:
+            self._emit(chunk)
+        else:
+            # Bounded output per call keeps memory flat on highly compressible data
+            output = self._inflater.decompress(chunk, UPLOAD_CHUNK_SIZE)
+            while output:
+                self._emit(output)
+                output = self._inflater.decompress(self._inflater.unconsumed_tail, UPLOAD_CHUNK_SIZE)
+            if self._inflater.eof and self._has_descriptor:
+                # Whatever follows the deflate stream is the data descriptor
+                self._buffer[:0] = self._inflater.unused_data
+                self._remaining = 0
+        
+        if self._remaining != 0:
+            return bool(self._buffer)
+        if self._inflater is not None and not self._inflater.eof:
+            raise ExtractionError("Zip entry ended before its compressed data")
+        
+        if self._has_descriptor:
+            self._state = 'descriptor'
+            return True
+        self._end_entry(self._expected_crc)
+        return True
+    
+    def _read_descriptor(self) -> bool:
+        has_signature = self._buffer[:4] == b"PK\x07\x08"
+        length = (4 if has_signature else 0) + 4 + (16 if self._zip64 else 8)
+        if len(self._buffer) < length:
+            return False
+        crc, = struct.unpack_from('<I', self._buffer, 4 if has_signature else 0)
+        del self._buffer[:length]
+        self._end_entry(crc)
+        return True
+    
+    def _end_entry(self, expected_crc: int):
+        if self._crc != expected_crc:
+            self.entries.discard()
+            raise ExtractionError("Zip entry does not match its CRC")
+        self.entries.close()
+        self._state = 'header'
+
+def _tar_number(field: bytes) -> int:
+    if field[:1] == b"\x80":
+        # GNU base-256 encoding for sizes of 8 GiB and more
+        return int.from_bytes(field[1:], 'big')
+    field = field.split(b"\0", 1)[0].strip()
+    return int(field, 8) if field else 0
+
+class _TarParser:
+    """Reads ustar, pax and GNU tar members in order"""
+    
+    def __init__(self, entries: _Entries):
+        self.entries = entries
+        self._buffer = bytearray()
+        self._state = 'header'
+        self._remaining = 0
+        self._padding = 0
+        self._metadata = None  # (kind, bytearray) while a pax header or long name is read
+        self._next_name = None
+        self._next_size = None
+        self._done = False
+    
+    def feed(self, data):
+        if self._done:
+            return
+        self._buffer += data
+        while not self._done and self._step():
+            pass
+    
+    def finish(self):
+        if not self._done and (self._state != 'header' or self._buffer):
+            raise ExtractionError("Tar archive ended in the middle of a member")
+    
+    def _step(self) -> bool:
+        if self._state == 'header':
+            return self._read_header()
+        if self._state == 'data':
+            return self._read_data()
+        return self._skip_padding()
+    
+    def _read_header(self) -> bool:
+        if len(self._buffer) < 512:
+            return False
+        header = bytes(self._buffer[:512])
+        del self._buffer[:512]
+        if header == b"\0" * 512:
+            self._done = True
+            self._buffer.clear()
+            return False
+        
+        checksum = _tar_number(header[148:156])
+        if checksum != sum(header[:148]) + 256 + sum(header[156:]):
+            raise ExtractionError("Tar header checksum mismatch")
+        
+        size = _tar_number(header[124:136])
+        type_flag = header[156:157]
+        name = header[:100].split(b"\0", 1)[0]
+        if header[257:262] == b"ustar":
+            prefix = header[345:500].split(b"\0", 1)[0]
+            if prefix:
+                name = prefix + b"/" + name
+        name = name.decode('utf-8', 'replace')
+        
+        if self._next_name is not None:
+            name, self._next_name = self._next_name, None
+        if self._next_size is not None:
+            size, self._next_size = self._next_size, None
+        
+        self._remaining = size
+        self._padding = -size % 512
+        self._metadata = None
+        if type_flag in (b"x", b"L"):
+            if size > _MAX_TAR_METADATA:
+                raise ExtractionError("Tar metadata record too large")
+            self._metadata = (type_flag, bytearray())
+            self.entries.current = None
+        elif type_flag in (b"0", b"\0", b"7"):
+            self.entries.open(name, size)
+        else:
+            # Directories, links, devices and global pax headers are not extracted
+            self.entries.current = None
+        self._state = 'data'
+        return True
+    
+    def _read_data(self) -> bool:
+        if self._remaining:
+            if not self._buffer:
+                return False
+            take = min(self._remaining, len(self._buffer))
+            chunk = bytes(self._buffer[:take])
+            del self._buffer[:take]
+            self._remaining -= take
+            if self._metadata is not None:
+                self._metadata[1].extend(chunk)
+            else:
+                self.entries.write(chunk)
+            if self._remaining:
+                return False
+        
+        if self._metadata is not None:
+            self._apply_metadata(*self._metadata)
+            self._metadata = None
+        else:
+            self.entries.close()
+        self._state = 'padding'
+        return True
+    
+    def _apply_metadata(self, kind: bytes, data: bytearray):
+        if kind == b"L":
+            self._next_name = bytes(data).split(b"\0", 1)[0].decode('utf-8', 'replace')
+            return
+        
+        # pax records: "<length> <key>=<value>\n"
+        offset = 0
+        while offset < len(data):
+            space = data.index(b" ", offset)
+            length = int(data[offset:space])
+            key, _, value = bytes(data[space + 1:offset + length - 1]).partition(b"=")
+            if key == b"path":
+                self._next_name = value.decode('utf-8', 'replace')
+            elif key == b"size":
+                self._next_size = int(value)
+            offset += length
+    
+    def _skip_padding(self) -> bool:
+        take = min(self._padding, len(self._buffer))
+        del self._buffer[:take]
+        self._padding -= take
+        if self._padding:
+            return False
+        self._state = 'header'
+        return True
+
+def _is_tar_header(header: bytes) -> bool:
+    if header[257:262] == b"ustar":
+        return True
+    try:
+        # Pre-POSIX tar has no magic: check the header checksum instead
+        return _tar_number(header[148:156]) == sum(header[:148]) + 256 + sum(header[156:512])
+    except ValueError:
+        return False
+
+class ArchiveSink:
+    """File-like target that extracts a zip or tar archive while it is being written
+    
+    on_entry(name, path, written) is called as each entry is completed;
+    written is False when an identical file was already in place. Data that
+    is not a recognised archive is written to fallback_path instead. error
+    holds the ExtractionError that stopped extraction, if one did.
+    """
+    
+    def __init__(self, target: FrameTarget, fallback_path: str,
+                 on_entry: Optional[Callable[[str, str, bool], None]] = None):
+        self.fallback_path = fallback_path
+        self.error = None
+        self._entries = _Entries(target, on_entry)
+        self._head = bytearray()  # first bytes, until the format is known
+        self._gunzip = None
+        self._parser = None
+        self._fallback = None
+    
+    def write(self, data):
+        try:
+            self._write(data)
+        except ExtractionError as e:
+            self.error = e
+            raise
+    
+    def close(self):
+        """Finish extracting; raises ExtractionError if the archive is incomplete"""
+        try:
+            self._close()
+        except ExtractionError as e:
+            self.error = e
+            raise
+    
+    def _write(self, data):
+        if self._gunzip is None:
+            self._feed(data)
+            return
+        # Bounded output per call keeps memory flat on highly compressible data
+        output = self._gunzip.decompress(data, UPLOAD_CHUNK_SIZE)
+        while output:
+            self._feed(output)
+            output = self._gunzip.decompress(self._gunzip.unconsumed_tail, UPLOAD_CHUNK_SIZE)
+    
+    def _close(self):
+        if self._gunzip is not None:
+            self._feed(self._gunzip.flush())
+            if not self._gunzip.eof:
+                raise ExtractionError("Compressed archive ended early")
+        if self._head is not None:
+            # Too short to be an archive
+            self._fallback = _EntryWriter(self.fallback_path)
+            self._fallback.write(bytes(self._head))
+            self._head = None
+        
+        if self._parser is not None:
+            self._parser.finish()
+        if self._fallback is not None:
+            self._fallback.close()
+    
+    def discard(self):
+        """Drop the entry being written after a failed download"""
+        self._entries.discard()
+        if self._fallback is not None:
+            self._fallback.discard()
+            self._fallback = None
+    
+    def _feed(self, data):
+        if self._head is not None:
+            self._head += data
+            kind = self._detect(self._head)
+            if kind is None:
+                return
+            data, self._head = bytes(self._head), None
+            if kind == 'gzip':
+                self._gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                self._head = bytearray()
+                self._write(data)
+                return
+            if kind == 'zip':
+                self._parser = _ZipParser(self._entries)
+            elif kind == 'tar':
+                self._parser = _TarParser(self._entries)
+            else:
+                self._fallback = _EntryWriter(self.fallback_path)
+        
+        if self._parser is not None:
+            self._parser.feed(data)
+        else:
+            self._fallback.write(data)
+    
+    def _detect(self, head: bytearray) -> Optional[str]:
+        """Archive format from the first bytes, or None until enough have arrived"""
+        if len(head) < 4:
+            return None
+        if head[:2] == b"\x1f\x8b" and self._gunzip is None:
+            return 'gzip'
+        if head[:4] in (b"PK\x03\x04", b"PK\x05\x06"):
+            return 'zip'
+        if len(head) < 512:
+            return None
+        return 'tar' if _is_tar_header(bytes(head[:512])) else 'other'
@@ -0,0 +1,103 @@
+"""
+Job status state machine for the VeriFrame addon
+
+Jobs only move forward: PENDING, then IN_PROGRESS, then one of the terminal
+statuses (IN_PROGRESS may be skipped). A status read that would move a job
+backwards, such as a lagging RPC node reporting PENDING for a completed job,
+is ignored instead of overwriting what is already known. Every accepted
+transition is timestamped (epoch seconds) in the job's history, a collection
+of (status, time) items, so recording one appends an item instead of
+re-serializing the whole history.
+
+Job properties are only written when a transition is accepted, and job
+panels are only redrawn after one, so refreshing many unchanged jobs does
+not churn the UI.
+
+Jobs saved by versions without submitted_at and the history get both filled
+in when their file is loaded, from the old submission_time string.
+"""
+
+import time
+from typing import List, Optional, Tuple
+
+import bpy
+from bpy.app.handlers import persistent
+
+from .config import JOB_STATUS_TRANSITIONS
+from .utils import to_epoch
+
+def can_transition(old_status: str, new_status: str) -> bool:
+    return new_status in JOB_STATUS_TRANSITIONS.get(old_status, ())
+
+def is_terminal(status: str) -> bool:
+    """Whether a job in status can never change again"""
+    return not JOB_STATUS_TRANSITIONS.get(status, ())
+
+def history(job) -> List[Tuple[str, float]]:
+    """(status, epoch seconds) pairs of every status the job has been in, oldest first"""
+    return [(entry.status, entry.at) for entry in job.status_history]
+
+def _record(job, status: str, when: Optional[float]):
+    entry = job.status_history.add()
+    entry.status = status
+    entry.at = when or time.time()
+
+def initialize(job, status: str = 'PENDING', when: Optional[float] = None):
+    """Set the status of a newly added job and start its history"""
+    job.status = status
+    job.status_history.clear()
+    _record(job, status, when)
+
+def transition(job, new_status: str, when: Optional[float] = None) -> bool:
+    """Move job to new_status if that is a valid transition; returns whether it changed"""
+    if new_status == job.status or not can_transition(job.status, new_status):
+        return False
+    
+    job.status = new_status
+    _record(job, new_status, when)
+    return True
+
+def migrate(job) -> bool:
+    """Fill in submitted_at and the history of a job saved by an earlier version; returns whether it changed"""
+    if job.submitted_at and len(job.status_history):
+        return False
+    
+    if not job.submitted_at:
+        # Earlier versions stored a TIMESTAMP_FORMAT string, still in the file as an ID property
+        job.submitted_at = to_epoch(job.get('submission_time'))
+    if not len(job.status_history):
+        status = job.status
+        _record(job, 'PENDING', job.submitted_at)
+        if status != 'PENDING':
+            # When it moved on is unknown; it was at the latest by the time of loading
+            _record(job, status, None)
+    return True
+
+@persistent
+def on_load_post(filepath):
+    """load_post handler: migrate the jobs of the loaded file"""
+    try:
+        for scene in bpy.data.scenes:
+            for job in scene.veriframe.jobs:
+                migrate(job)
+    except Exception as e:
+        print(f"Job migration error: {e}")
+
+def register():
+    if on_load_post not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(on_load_post)
+
+def unregister():
+    if on_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(on_load_post)
+
+def tag_redraw_job_panels():
+    """Redraw the render properties, where the job panels live, and nothing else"""
+    window_manager = bpy.context.window_manager
+    if window_manager is None:
+        return
+    
+    for window in window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'PROPERTIES' and area.spaces.active.context == 'RENDER':
+                area.tag_redraw()
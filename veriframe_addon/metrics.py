@@ -0,0 +1,307 @@
+"""
+Process-wide metrics for the VeriFrame addon
+
+Counters, gauges and histograms kept in memory and periodically written to
+disk in Prometheus textfile format (for node_exporter's textfile collector)
+and as JSON. Nothing here needs bpy except the export timer.
+"""
+
+import os
+import math
+import threading
+from typing import Dict, Any, List, Tuple
+
+from .config import METRICS_PROM_FILE, METRICS_JSON_FILE, DEFAULT_METRICS_INTERVAL
+from .tracing import tracer
+
+# Bucket bounds
+THROUGHPUT_BUCKETS = (64e3, 256e3, 1e6, 4e6, 16e6, 64e6, 256e6, 1e9)  # bytes/second
+SIZE_BUCKETS = (1e6, 10e6, 100e6, 500e6, 1e9, 4e9, 16e9)  # bytes
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # seconds
+
+# Spans timing one request and its response; transfers, local hashing and
+# waits on receipts or on several calls at once would swamp the latency
+RPC_SPANS = frozenset((
+    "ipfs.ls",
+    "ipfs.object_stat",
+    "starknet.block_number",
+    "starknet.get_job_status",
+    "starknet.get_job_result",
+    "starknet.cancel_job",
+    "starknet.send",
+    "starknet.submit_jobs",
+))
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    """Base for labelled metrics; each label combination gets its own child"""
+    
+    kind = ""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children = {}
+        self._lock = threading.Lock()
+    
+    def labels(self, **labels):
+        """Child metric for one label combination"""
+        key = tuple((name, str(labels[name])) for name in self.labelnames)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+            return child
+    
+    def _default(self):
+        return self.labels()
+    
+    def _items(self):
+        with self._lock:
+            return list(self._children.items())
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+    
+    def set(self, value: float):
+        with self._lock:
+            self.value = float(value)
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    
+    kind = "counter"
+    
+    def _new_child(self):
+        return _Value()
+    
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+    
+    def samples(self):
+        for labels, child in self._items():
+            yield self.name, labels, child.value
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    
+    kind = "gauge"
+    
+    def _new_child(self):
+        return _Value()
+    
+    def set(self, value: float):
+        self._default().set(value)
+    
+    def clear(self):
+        with self._lock:
+            self._children.clear()
+    
+    def samples(self):
+        for labels, child in self._items():
+            yield self.name, labels, child.value
+
+class _HistogramValue:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float):
+        with self._lock:
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    return
+            self.counts[-1] += 1
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets"""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+    
+    def observe(self, value: float):
+        self._default().observe(value)
+    
+    def samples(self):
+        for labels, child in self._items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), child.counts):
+                cumulative += count
+                yield self.name + "_bucket", labels + (('le', _format_value(bound)),), cumulative
+            yield self.name + "_sum", labels, child.sum
+            yield self.name + "_count", labels, cumulative
+
+class MetricsRegistry:
+    """Holds every metric and renders them for export"""
+    
+    def __init__(self):
+        self._metrics = []
+    
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+    
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+    
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+    
+    def to_dict(self) -> Dict[str, List[Dict[str, Any]]]:
+        """JSON friendly snapshot: metric name -> list of {labels, value} samples"""
+        snapshot = {}
+        for metric in self._metrics:
+            for name, labels, value in metric.samples():
+                snapshot.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+        return snapshot
+    
+    def write_files(self, directory: str):
+        """Atomically write the .prom and .json exports into directory"""
+        from .utils import write_json_atomic
+        
+        os.makedirs(directory, exist_ok=True)
+        prom_path = os.path.join(directory, METRICS_PROM_FILE)
+        temp_path = f"{prom_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        os.replace(temp_path, prom_path)
+        
+        write_json_atomic(os.path.join(directory, METRICS_JSON_FILE), self.to_dict())
+
+registry = MetricsRegistry()
+
+upload_bytes = registry.counter("veriframe_upload_bytes_total", "Bytes uploaded to IPFS")
+download_bytes = registry.counter("veriframe_download_bytes_total", "Bytes downloaded from IPFS")
+upload_size = registry.histogram("veriframe_upload_size_bytes", "Size of individual IPFS uploads", buckets=SIZE_BUCKETS)
+upload_throughput = registry.histogram("veriframe_upload_throughput_bytes_per_second", "Throughput of IPFS uploads", buckets=THROUGHPUT_BUCKETS)
+download_throughput = registry.histogram("veriframe_download_throughput_bytes_per_second", "Throughput of IPFS downloads", buckets=THROUGHPUT_BUCKETS)
+rpc_latency = registry.histogram("veriframe_rpc_latency_seconds", "Latency of IPFS and Starknet request/response calls", ('method',))
+errors = registry.counter("veriframe_errors_total", "Failed operations", ('operation',))
+retries = registry.counter("veriframe_retries_total", "Retried network calls", ('endpoint',))
+cache_requests = registry.counter("veriframe_cache_requests_total", "Cache lookups", ('cache', 'result'))
+cache_hit_ratio = registry.gauge("veriframe_cache_hit_ratio", "Fraction of cache lookups that were hits", ('cache',))
+jobs = registry.gauge("veriframe_jobs", "Tracked jobs by status", ('status',))
+queue_entries = registry.gauge("veriframe_queue_entries", "Offline submission queue entries by state", ('state',))
+
+def observe_transfer(direction: str, size: int, seconds: float):
+    """Record one finished upload or download"""
+    if direction == 'upload':
+        upload_bytes.inc(size)
+        upload_size.observe(size)
+        if seconds > 0:
+            upload_throughput.observe(size / seconds)
+    else:
+        download_bytes.inc(size)
+        if seconds > 0:
+            download_throughput.observe(size / seconds)
+
+def _on_span(span):
+    """Tracer listener: request spans feed the latency metric, transfer spans the transfer metrics"""
+    if span.name in RPC_SPANS:
+        rpc_latency.labels(method=span.name).observe(span.duration)
+    
+    direction = span.args.get('direction')
+    if direction and span.args.get('bytes') and 'error' not in span.args:
+        observe_transfer(direction, span.args['bytes'], span.duration)
+
+tracer.add_listener(_on_span)
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Count a cache hit or miss and refresh the hit ratio"""
+    cache_requests.labels(cache=cache, result='hit' if hit else 'miss').inc()
+    hits = cache_requests.labels(cache=cache, result='hit').value
+    misses = cache_requests.labels(cache=cache, result='miss').value
+    cache_hit_ratio.labels(cache=cache).set(hits / (hits + misses))
+
+def _collect_job_counts():
+    """Refresh the jobs-per-status gauge from every open scene (main thread only)"""
+    import bpy
+    
+    counts = {}
+    for scene in bpy.data.scenes:
+        props = getattr(scene, 'veriframe', None)
+        if props is None:
+            continue
+        for job in props.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+    
+    jobs.clear()
+    for status, count in counts.items():
+        jobs.labels(status=status).set(count)
+
+def _export_timer():
+    """bpy.app.timers callback that writes the metric files when enabled"""
+    import bpy
+    
+    try:
+        addon_prefs = bpy.context.preferences.addons[__name__.partition('.')[0]].preferences
+    except (KeyError, AttributeError):
+        return DEFAULT_METRICS_INTERVAL
+    
+    if not addon_prefs.metrics_export_enabled:
+        return DEFAULT_METRICS_INTERVAL
+    
+    try:
+        from .utils import get_data_dir
+        
+        _collect_job_counts()
+        directory = bpy.path.abspath(addon_prefs.metrics_export_path) or os.path.join(get_data_dir(), "metrics")
+        registry.write_files(directory)
+    except Exception as e:
+        print(f"Metrics export error: {e}")
+    
+    return float(addon_prefs.metrics_export_interval)
+
+def register():
+    import bpy
+    
+    if not bpy.app.timers.is_registered(_export_timer):
+        bpy.app.timers.register(_export_timer, first_interval=DEFAULT_METRICS_INTERVAL, persistent=True)
+
+def unregister():
+    import bpy
+    
+    if bpy.app.timers.is_registered(_export_timer):
+        bpy.app.timers.unregister(_export_timer)
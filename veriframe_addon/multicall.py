@@ -0,0 +1,178 @@
+"""
+Starknet multicall encoding for the VeriFrame addon
+
+Many submit_job calls are packed into account multicalls (one `__execute__`
+transaction with several calls) so a bulk submission pays one transaction's
+latency and fee per batch instead of per job. Batches are cut so each
+transaction stays under the network's calldata limit, and job IDs are read
+back from the JobSubmitted events in call order.
+
+Everything here is plain Python (selectors use a small Keccak-256), so
+calldata can be built and checked without starknet-py; signing and sending
+are left to StarknetManager.
+
+The job registry is assumed to expose
+    submit_job(ipfs_hash: ByteArray, reward: u256, deadline_hours: u64)
+and to emit one JobSubmitted event per job with the job ID as its first key
+after the selector (or its first data felt).
+"""
+
+from collections import namedtuple
+from decimal import Decimal
+from typing import List, Iterable
+
+from .config import (
+    SUBMIT_JOB_ENTRYPOINT,
+    JOB_SUBMITTED_EVENT,
+    STRK_DECIMALS,
+    MULTICALL_MAX_CALLDATA,
+    MULTICALL_MAX_CALLS,
+)
+
+FIELD_PRIME = 2 ** 251 + 17 * 2 ** 192 + 1
+BYTES_PER_WORD = 31  # ByteArray packs 31 bytes per felt
+
+Call = namedtuple('Call', 'to selector calldata')
+
+class MulticallError(Exception):
+    """A multicall could not be encoded or its result could not be mapped back to its calls"""
+
+# Keccak-f[1600] round constants and rotation offsets (indexed [x][y])
+_ROUND_CONSTANTS = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+]
+_ROTATIONS = [
+    [0, 36, 3, 41, 18],
+    [1, 44, 10, 45, 2],
+    [62, 6, 43, 15, 61],
+    [28, 55, 25, 21, 56],
+    [27, 20, 39, 8, 14],
+]
+_MASK_64 = (1 << 64) - 1
+
+def _rotate(value: int, shift: int) -> int:
+    return ((value << shift) | (value >> (64 - shift))) & _MASK_64 if shift else value
+
+def _keccak_f(lanes: List[int]):
+    for round_constant in _ROUND_CONSTANTS:
+        columns = [lanes[x] ^ lanes[x + 5] ^ lanes[x + 10] ^ lanes[x + 15] ^ lanes[x + 20] for x in range(5)]
+        for x in range(5):
+            d = columns[(x - 1) % 5] ^ _rotate(columns[(x + 1) % 5], 1)
+            for y in range(0, 25, 5):
+                lanes[x + y] ^= d
+        
+        moved = [0] * 25
+        for x in range(5):
+            for y in range(5):
+                moved[y + 5 * ((2 * x + 3 * y) % 5)] = _rotate(lanes[x + 5 * y], _ROTATIONS[x][y])
+        for x in range(5):
+            for y in range(0, 25, 5):
+                lanes[x + y] = moved[x + y] ^ (~moved[(x + 1) % 5 + y] & moved[(x + 2) % 5 + y])
+        lanes[0] ^= round_constant
+
+def keccak256(data: bytes, padding: int = 0x01) -> bytes:
+    """Keccak-256 as used by Starknet and Ethereum (padding 0x06 gives SHA3-256)"""
+    rate = 136
+    padded = bytearray(data)
+    padded.append(padding)
+    padded.extend(b"\0" * (-len(padded) % rate))
+    padded[-1] |= 0x80
+    
+    lanes = [0] * 25
+    for offset in range(0, len(padded), rate):
+        for i in range(rate // 8):
+            lanes[i] ^= int.from_bytes(padded[offset + 8 * i:offset + 8 * i + 8], 'little')
+        _keccak_f(lanes)
+    return b"".join(lane.to_bytes(8, 'little') for lane in lanes[:4])
+
+def get_selector(name: str) -> int:
+    """Entry point or event selector: starknet_keccak of the name (Keccak-256 masked to 250 bits)"""
+    return int.from_bytes(keccak256(name.encode('ascii')), 'big') & ((1 << 250) - 1)
+
+def encode_byte_array(text: str) -> List[int]:
+    """Cairo ByteArray: full 31-byte words, then the pending word and its length"""
+    data = text.encode('utf-8')
+    full = len(data) - len(data) % BYTES_PER_WORD
+    words = [int.from_bytes(data[i:i + BYTES_PER_WORD], 'big') for i in range(0, full, BYTES_PER_WORD)]
+    pending = data[full:]
+    return [len(words), *words, int.from_bytes(pending, 'big'), len(pending)]
+
+def encode_u256(value: int) -> List[int]:
+    """Cairo u256: low and high 128-bit halves"""
+    if not 0 <= value < 2 ** 256:
+        raise MulticallError(f"{value} does not fit in a u256")
+    return [value & ((1 << 128) - 1), value >> 128]
+
+def to_fri(amount: float) -> int:
+    """STRK amount in its smallest unit"""
+    return int(Decimal(str(amount)) * 10 ** STRK_DECIMALS)
+
+def to_felt(value) -> int:
+    """Felt from an int or a 0x-prefixed hex string"""
+    felt = int(value, 16) if isinstance(value, str) else int(value)
+    if not 0 <= felt < FIELD_PRIME:
+        raise MulticallError(f"{value} is not a field element")
+    return felt
+
+def submit_job_call(contract_address: str, ipfs_hash: str, reward_amount: float, deadline_hours: int) -> Call:
+    """One submit_job call on the job registry"""
+    return Call(
+        to_felt(contract_address),
+        get_selector(SUBMIT_JOB_ENTRYPOINT),
+        [*encode_byte_array(ipfs_hash), *encode_u256(to_fri(reward_amount)), int(deadline_hours)],
+    )
+
+def execute_calldata(calls: Iterable[Call]) -> List[int]:
+    """Calldata of an account's `__execute__` for calls (Cairo 1 accounts)"""
+    calls = list(calls)
+    calldata = [len(calls)]
+    for call in calls:
+        calldata += [call.to, call.selector, len(call.calldata), *call.calldata]
+    return calldata
+
+def chunk_calls(calls: List[Call], max_calldata: int = MULTICALL_MAX_CALLDATA,
+                max_calls: int = MULTICALL_MAX_CALLS) -> List[List[int]]:
+    """Split calls into batches (as lists of indices, in order) that each fit one transaction"""
+    batches = []
+    batch = []
+    size = 1  # the call count
+    for index, call in enumerate(calls):
+        call_size = 3 + len(call.calldata)
+        if 1 + call_size > max_calldata:
+            raise MulticallError(f"Call {index} alone needs {1 + call_size} felts of calldata")
+        if batch and (size + call_size > max_calldata or len(batch) == max_calls):
+            batches.append(batch)
+            batch = []
+            size = 1
+        batch.append(index)
+        size += call_size
+    if batch:
+        batches.append(batch)
+    return batches
+
+def job_ids_from_events(events, contract_address: str, expected: int) -> List[str]:
+    """Job IDs from a receipt's JobSubmitted events, in the order the calls were made
+    
+    events are dicts or objects with from_address, keys and data.
+    """
+    contract = to_felt(contract_address)
+    selector = get_selector(JOB_SUBMITTED_EVENT)
+    job_ids = []
+    for event in events:
+        fields = event if isinstance(event, dict) else vars(event)
+        keys = [to_felt(key) for key in fields.get('keys', [])]
+        if to_felt(fields.get('from_address', 0)) != contract or not keys or keys[0] != selector:
+            continue
+        values = keys[1:] or [to_felt(value) for value in fields.get('data', [])]
+        if not values:
+            raise MulticallError("JobSubmitted event without a job ID")
+        job_ids.append(str(values[0]))
+    
+    if len(job_ids) != expected:
+        raise MulticallError(f"Expected {expected} JobSubmitted events, found {len(job_ids)}")
+    return job_ids
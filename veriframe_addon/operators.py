@@ -3,15 +3,39 @@ Operators for the VeriFrame addon
 """
 
 import bpy
-import bmesh
 import os
-import json
-import requests
-import tempfile
 import shutil
-from datetime import datetime, timedelta
+import tempfile
+import itertools
+import uuid
 from bpy.types import Operator
-from bpy.props import StringProperty, BoolProperty
+from bpy.props import StringProperty, BoolProperty, EnumProperty, CollectionProperty
+from bpy_extras.io_utils import ExportHelper
+
+from .config import SUPPORTED_ENGINES, SUPPORTED_FORMATS, MAX_SWEEP_VARIANTS, SUBMIT_DEADLINE
+from .resilience import Deadline
+from . import cache
+from . import car
+from . import delta
+from . import job_state
+from . import payload_cache
+from . import preupload
+from . import refresh
+from . import retrieval
+from . import submission_queue
+from .properties import VeriFrameBulkTarget
+from .tracing import tracer
+from .utils import (
+    AddOptions,
+    IPFSManager,
+    StarknetManager,
+    BlenderJobManager,
+    SUBMITTED,
+    UNCONFIRMED,
+    build_job_sidecar,
+    canonical_json,
+    format_file_size,
+)
 
 class VF_OT_ConnectWallet(Operator):
     """Connect to Starknet wallet"""
@@ -146,7 +170,312 @@ class VF_OT_DisconnectWallet(Operator):
         self.report({'INFO'}, "Wallet disconnected")
         return {'FINISHED'}
 
-class VF_OT_SubmitJob(Operator):
+class JobSubmissionMixin:
+    """Shared steps for operators that submit jobs from an uploaded base blend"""
+    
+    def _validate_submission(self, props):
+        """Check wallet and reward before doing any work"""
+        if not props.wallet_connected:
+            self.report({'ERROR'}, "Please connect your wallet first")
+            return False
+        
+        if props.reward_amount <= 0:
+            self.report({'ERROR'}, "Reward amount must be greater than 0")
+            return False
+        
+        return True
+    
+    def _use_targeted_export(self, context):
+        """Whether to export the scene with bpy.data.libraries.write instead of a full packed copy"""
+        try:
+            addon_prefs = context.preferences.addons[__name__.partition('.')[0]].preferences
+            return addon_prefs.use_targeted_export
+        except:
+            return True
+    
+    def _use_delta_uploads(self, context):
+        """Whether to upload a delta against the last submitted revision of the open file"""
+        try:
+            addon_prefs = context.preferences.addons[__name__.partition('.')[0]].preferences
+            return addon_prefs.use_delta_uploads and bool(bpy.data.filepath)
+        except:
+            return False
+    
+    def _use_car_uploads(self, context):
+        """Whether to upload the blend and its sidecars as one CAR"""
+        try:
+            addon_prefs = context.preferences.addons[__name__.partition('.')[0]].preferences
+            return addon_prefs.use_car_uploads
+        except:
+            return True
+    
+    def _add_options(self, context):
+        """`ipfs add` parameters chosen in the preferences"""
+        try:
+            addon_prefs = context.preferences.addons[__name__.partition('.')[0]].preferences
+            return AddOptions.from_preferences(addon_prefs)
+        except:
+            return AddOptions()
+    
+    def _skip_present_blocks(self, context):
+        """Whether to ask the node which blocks it already has before uploading"""
+        try:
+            addon_prefs = context.preferences.addons[__name__.partition('.')[0]].preferences
+            return addon_prefs.skip_present_blocks
+        except:
+            return True
+    
+    def _use_payload_cache(self, context):
+        """Whether to keep prepared payloads of saved files for later submissions"""
+        try:
+            addon_prefs = context.preferences.addons[__name__.partition('.')[0]].preferences
+            return addon_prefs.cache_prepared_payloads
+        except:
+            return True
+    
+    def _upload_package(self, ipfs, payload_path, variants, deadline, skip_present=False):
+        """Upload the blend and every variant's sidecar in one dag/import call
+        
+        With skip_present, blocks the node already has are left out. Returns
+        (blend hash, sidecar hashes, package root), or Nones if the import
+        failed.
+        """
+        with tracer.span("package_job", "submit", variants=len(variants)):
+            package = car.JobPackage(**ipfs.add_options.builder_options())
+            blend_hash = package.add_file("job.blend", payload_path)
+            sidecar_hashes = [
+                package.add_bytes(f"jobs/{index}.json", canonical_json(build_job_sidecar(blend_hash, overrides)))
+                for index, overrides in enumerate(variants)
+            ]
+        
+        if skip_present:
+            ipfs.mark_present_blocks(package, deadline)
+        root_hash = ipfs.import_car(package, deadline)
+        if not root_hash:
+            return None, None, ""
+        return blend_hash, sidecar_hashes, root_hash
+    
+    def _export_base_blend(self, context, temp_dir, scenes=None):
+        """Export the scene(s) without overrides into temp_dir, returning the path or None"""
+        temp_blend_path = os.path.join(temp_dir, "job.blend")
+        
+        # Overrides travel in the sidecar, so the base blend is exported as-is
+        with tracer.span("prepare_blend", "submit"):
+            if self._use_targeted_export(context):
+                prepared = BlenderJobManager.export_blend_file(temp_blend_path, {}, context.scene, scenes)
+            else:
+                prepared = BlenderJobManager.prepare_blend_file(temp_blend_path, {})
+        
+        return temp_blend_path if prepared else None
+    
+    def _prepare_payload(self, context, temp_dir, scenes=None):
+        """Path of a payload for the scene(s) and whether it lives in temp_dir
+        
+        A saved, unchanged, self-contained file is used as it is, and an earlier
+        export of the same saved file with the same settings is reused; only
+        otherwise is the blend exported. Returns (None, False) on failure.
+        """
+        payload_path = payload_cache.saved_file_payload()
+        if payload_path:
+            self.report({'INFO'}, "Uploading the saved blend file directly")
+            return payload_path, False
+        
+        key = None
+        if self._use_payload_cache(context):
+            cache = payload_cache.get_cache()
+            key = cache.key({
+                'targeted': self._use_targeted_export(context),
+                'scenes': sorted(scene.name for scene in scenes) if scenes else [context.scene.name],
+            })
+            payload_path = cache.lookup(key) if key else None
+            if payload_path:
+                self.report({'INFO'}, "Reusing the blend prepared for the last submission")
+                return payload_path, False
+        
+        payload_path = self._export_base_blend(context, temp_dir, scenes)
+        if not payload_path:
+            return None, False
+        
+        if key:
+            try:
+                return cache.store(key, payload_path), False
+            except OSError as e:
+                print(f"Could not cache prepared payload: {e}")
+        return payload_path, True
+    
+    def _submit_variants(self, context, variants, scenes=None):
+        """Upload the base blend once and submit one job per overrides dict
+        
+        Several variants are sent in one contract transaction and tracked as a
+        group. Returns (submitted, queued) job counts, or None if the blend could
+        not be prepared. Variants that could not be sent go to the offline queue.
+        """
+        props = context.scene.veriframe
+        ipfs = IPFSManager(props.ipfs_api_url, props.ipfs_gateway_url, self._add_options(context))
+        starknet = StarknetManager(props.rpc_url, props.contract_address)
+        deadline = Deadline(SUBMIT_DEADLINE)
+        group_id = uuid.uuid4().hex[:8] if len(variants) > 1 else ""
+        
+        temp_dir = tempfile.mkdtemp()
+        try:
+            # A saved, unchanged file may already have been uploaded in the background
+            # (it holds every scene, so it also serves multi-scene submissions)
+            payload_path = None
+            owned = True
+            sidecar_hashes = None
+            root_hash = ""
+            blend_hash = preupload.lookup_saved_file(ipfs.api_url, ipfs.add_options)
+            if blend_hash:
+                self.report({'INFO'}, "Using pre-uploaded blend file")
+            else:
+                payload_path, owned = self._prepare_payload(context, temp_dir, scenes)
+                if not payload_path:
+                    self.report({'ERROR'}, "Failed to prepare blend file")
+                    return None
+                if self._use_delta_uploads(context):
+                    blend_hash = delta.upload_with_delta(ipfs, bpy.data.filepath, payload_path, deadline, temp_dir)
+                elif self._use_car_uploads(context) and ipfs.add_options.builder_options():
+                    # Only options the package can reproduce locally; the rest need the node to chunk
+                    blend_hash, sidecar_hashes, root_hash = self._upload_package(
+                        ipfs, payload_path, variants, deadline, self._skip_present_blocks(context)
+                    )
+                    # A node without dag/import still takes plain adds
+                    if not blend_hash and ipfs.is_available():
+                        blend_hash = ipfs.upload_file(payload_path, deadline=deadline)
+                else:
+                    blend_hash = ipfs.upload_file(payload_path, deadline=deadline,
+                                                  skip_present=self._skip_present_blocks(context))
+            
+            remaining = [{'overrides': overrides} for overrides in variants]
+            if blend_hash:
+                remaining = self._submit_batch(props, ipfs, starknet, blend_hash, variants, deadline, group_id,
+                                               sidecar_hashes, root_hash)
+            
+            submitted = len(variants) - len(remaining)
+            if not remaining:
+                return submitted, 0
+            
+            # Unconfirmed variants are queued whatever the preference: the queue
+            # only waits for their transaction, it never sends them again
+            if not submission_queue.is_enabled():
+                remaining = [variant for variant in remaining if variant.get('tx_hash')]
+                self.report({'ERROR'}, "Failed to submit job to contract" if blend_hash else "Failed to upload to IPFS")
+                if not remaining:
+                    return submitted, 0
+            
+            # Keep the prepared payload instead of throwing it away with the temp dir
+            submission_queue.get_queue().enqueue(
+                payload_path, blend_hash, remaining, self._queue_params(props, group_id, ipfs.add_options),
+                bpy.data.filepath, context.scene.name,
+                keep_payload=not owned, root_hash=root_hash, file_token=submission_queue.file_token()
+            )
+            return submitted, len(remaining)
+        
+        finally:
+            # Clean up temp file
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def _report_group(self, result, total):
+        """Report the outcome of a multi-variant submission and return the operator status"""
+        if result is None:
+            return {'CANCELLED'}
+        
+        submitted, queued = result
+        if queued:
+            self.report({'WARNING'}, f"Submitted {submitted} of {total} jobs, {queued} queued for background submission")
+            return {'FINISHED'}
+        
+        if submitted < total:
+            self.report({'WARNING'}, f"Submitted {submitted} of {total} jobs")
+            return {'FINISHED'} if submitted else {'CANCELLED'}
+        
+        self.report({'INFO'}, f"Submitted {submitted} jobs from one upload")
+        return {'FINISHED'}
+    
+    def _queue_params(self, props, group_id="", add_options=None):
+        """Everything the offline queue needs to submit without the scene"""
+        return {
+            'group_id': group_id,
+            'reward_amount': props.reward_amount,
+            'deadline_hours': props.job_deadline,
+            'wallet_address': props.wallet_address,
+            'rpc_url': props.rpc_url,
+            'contract_address': props.contract_address,
+            'ipfs_api_url': props.ipfs_api_url,
+            'ipfs_gateway_url': props.ipfs_gateway_url,
+            'add_options': (add_options or AddOptions())._asdict(),
+        }
+    
+    def _render_overrides(self, props):
+        """Collect the render overrides chosen in the panel"""
+        overrides = {
+            'scene': props.id_data.name,
+            'engine': props.render_engine,
+            'format': props.output_format,
+        }
+        
+        if props.override_samples > 0:
+            overrides['samples'] = props.override_samples
+        
+        if props.override_resolution > 0:
+            overrides['resolution_percentage'] = props.override_resolution
+        
+        if props.use_frame_range_override:
+            overrides['frame_start'] = props.override_frame_start
+            overrides['frame_end'] = max(props.override_frame_start, props.override_frame_end)
+        
+        if props.override_camera:
+            overrides['camera'] = props.override_camera.name
+        
+        if props.override_view_layer:
+            overrides['view_layer'] = props.override_view_layer
+        
+        return overrides
+    
+    def _submit_batch(self, props, ipfs, starknet, blend_hash, variants, deadline, group_id, sidecar_hashes=None, root_hash=""):
+        """Upload every sidecar (unless they were packaged), then submit all variants as multicall transactions
+        
+        Returns the variants that did not reach the contract as offline queue
+        variants. A variant whose transaction was sent but not confirmed keeps
+        its tx_hash, so the queue waits for that transaction instead of sending
+        the job again.
+        """
+        with tracer.span("submit_batch", "submit", variants=len(variants)):
+            if sidecar_hashes is None:
+                sidecar_hashes = []
+                for overrides in variants:
+                    sidecar_hash = ipfs.upload_json(build_job_sidecar(blend_hash, overrides), deadline=deadline)
+                    if not sidecar_hash:
+                        return [{'overrides': overrides} for overrides in variants]
+                    sidecar_hashes.append(sidecar_hash)
+            
+            submissions = starknet.submit_jobs(
+                [(sidecar_hash, props.reward_amount, props.job_deadline) for sidecar_hash in sidecar_hashes],
+                props.wallet_address, deadline
+            )
+            if not submissions:
+                return [{'overrides': overrides, 'sidecar_hash': sidecar_hash}
+                        for overrides, sidecar_hash in zip(variants, sidecar_hashes)]
+        
+        remaining = []
+        for submission, sidecar_hash, overrides in zip(submissions, sidecar_hashes, variants):
+            if submission.state == SUBMITTED:
+                props.add_job(submission.job_id, sidecar_hash, blend_hash, overrides, props.reward_amount,
+                              props.job_deadline, group_id=group_id, root_hash=root_hash)
+                continue
+            
+            variant = {'overrides': overrides, 'sidecar_hash': sidecar_hash}
+            if submission.state == UNCONFIRMED:
+                variant['tx_hash'] = submission.tx_hash
+            remaining.append(variant)
+        
+        unconfirmed = sum(1 for variant in remaining if 'tx_hash' in variant)
+        if unconfirmed:
+            self.report({'WARNING'}, f"{unconfirmed} job(s) were sent but not confirmed yet; "
+                                     "they will be added to the job history once their transaction lands")
+        return remaining
+
+class VF_OT_SubmitJob(JobSubmissionMixin, Operator):
     """Submit current blend file as a rendering job"""
     bl_idname = "veriframe.submit_job"
     bl_label = "Submit Job"
@@ -157,89 +486,253 @@ class VF_OT_SubmitJob(Operator):
         props = context.scene.veriframe
         
         # Validate settings
-        if not props.wallet_connected:
-            self.report({'ERROR'}, "Please connect your wallet first")
-            return {'CANCELLED'}
-        
-        if props.reward_amount <= 0:
-            self.report({'ERROR'}, "Reward amount must be greater than 0")
+        if not self._validate_submission(props):
             return {'CANCELLED'}
         
-        # Save current blend file to temporary location
         try:
-            temp_dir = tempfile.mkdtemp()
-            temp_blend_path = os.path.join(temp_dir, "job.blend")
-            
-            # Save the current blend file
-            bpy.ops.wm.save_as_mainfile(filepath=temp_blend_path, copy=True)
-            
-            # Upload to IPFS
-            ipfs_hash = self._upload_to_ipfs(temp_blend_path, props)
-            if not ipfs_hash:
-                self.report({'ERROR'}, "Failed to upload to IPFS")
-                return {'CANCELLED'}
+            with tracer.span("submit_job", "submit"):
+                result = self._submit_variants(context, [self._render_overrides(props)])
             
-            # Submit job to contract
-            job_id = self._submit_to_contract(ipfs_hash, props)
-            if not job_id:
-                self.report({'ERROR'}, "Failed to submit job to contract")
+            if result is None:
                 return {'CANCELLED'}
             
-            # Add job to tracking list
-            job = props.jobs.add()
-            job.job_id = job_id
-            job.status = 'PENDING'
-            job.reward = props.reward_amount
-            job.deadline = props.job_deadline
-            job.ipfs_hash = ipfs_hash
-            job.submission_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            submitted, queued = result
+            if queued:
+                self.report({'WARNING'}, "Network unavailable, job queued for background submission")
+                return {'FINISHED'}
             
-            # Clean up temp file
-            shutil.rmtree(temp_dir)
+            if not submitted:
+                return {'CANCELLED'}
             
-            self.report({'INFO'}, f"Job submitted successfully! ID: {job_id}")
+            self.report({'INFO'}, f"Job submitted successfully! ID: {props.jobs[-1].job_id}")
             return {'FINISHED'}
-            
+        
         except Exception as e:
             self.report({'ERROR'}, f"Error submitting job: {str(e)}")
             return {'CANCELLED'}
+
+class VF_OT_SubmitSweep(JobSubmissionMixin, Operator):
+    """Submit a grid of render variants that share one uploaded blend"""
+    bl_idname = "veriframe.submit_sweep"
+    bl_label = "Submit Parameter Sweep"
+    bl_description = "Upload the blend once and submit one job per combination of the chosen settings"
+    bl_options = {'REGISTER'}
+    
+    engines: EnumProperty(
+        name="Engines",
+        description="Render engines to sweep",
+        items=SUPPORTED_ENGINES,
+        options={'ENUM_FLAG'}
+    )
+    
+    formats: EnumProperty(
+        name="Formats",
+        description="Output formats to sweep",
+        items=SUPPORTED_FORMATS,
+        options={'ENUM_FLAG'}
+    )
+    
+    samples: StringProperty(
+        name="Samples",
+        description="Comma separated sample counts (empty keeps the panel setting)",
+        default=""
+    )
+    
+    resolutions: StringProperty(
+        name="Resolution %",
+        description="Comma separated resolution percentages (empty keeps the panel setting)",
+        default=""
+    )
     
-    def _upload_to_ipfs(self, file_path, props):
-        """Upload file to IPFS and return hash"""
+    def invoke(self, context, event):
+        """Show the sweep dialog, starting from the panel settings"""
+        props = context.scene.veriframe
+        self.engines = {props.render_engine}
+        self.formats = {props.output_format}
+        return context.window_manager.invoke_props_dialog(self, width=400)
+    
+    def draw(self, context):
+        """Draw the dialog UI"""
+        layout = self.layout
+        layout.label(text="Engines:")
+        layout.prop(self, "engines", expand=True)
+        layout.label(text="Formats:")
+        layout.prop(self, "formats", expand=True)
+        layout.prop(self, "samples")
+        layout.prop(self, "resolutions")
+        
+        variants = self._variants(context.scene.veriframe)
+        if variants is None:
+            layout.label(text="Samples and resolution must be comma separated numbers", icon='ERROR')
+        else:
+            layout.label(text=f"{len(variants)} job(s), one upload", icon='INFO')
+    
+    def execute(self, context):
+        props = context.scene.veriframe
+        
+        if not self._validate_submission(props):
+            return {'CANCELLED'}
+        
+        variants = self._variants(props)
+        if variants is None:
+            self.report({'ERROR'}, "Samples and resolution must be comma separated numbers")
+            return {'CANCELLED'}
+        
+        if not variants:
+            self.report({'ERROR'}, "Select at least one engine and format")
+            return {'CANCELLED'}
+        
+        if len(variants) > MAX_SWEEP_VARIANTS:
+            self.report({'ERROR'}, f"Sweep has {len(variants)} variants, the limit is {MAX_SWEEP_VARIANTS}")
+            return {'CANCELLED'}
+        
         try:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                response = requests.post(
-                    f"{props.ipfs_api_url}/api/v0/add",
-                    files=files,
-                    timeout=30
-                )
-                
-            if response.status_code == 200:
-                result = response.json()
-                return result['Hash']
-            else:
-                print(f"IPFS upload failed: {response.text}")
-                return None
-                
+            with tracer.span("submit_sweep", "submit", variants=len(variants)):
+                result = self._submit_variants(context, variants)
+            
+            return self._report_group(result, len(variants))
+        
         except Exception as e:
-            print(f"IPFS upload error: {e}")
+            self.report({'ERROR'}, f"Error submitting sweep: {str(e)}")
+            return {'CANCELLED'}
+    
+    def _variants(self, props):
+        """Expand the dialog selections into one overrides dict per job, or None if invalid"""
+        samples = _parse_int_list(self.samples)
+        resolutions = _parse_int_list(self.resolutions)
+        if samples is None or resolutions is None:
             return None
+        
+        base = self._render_overrides(props)
+        variants = []
+        for engine, file_format, sample_count, resolution in itertools.product(
+            sorted(self.engines), sorted(self.formats), samples or [None], resolutions or [None]
+        ):
+            overrides = dict(base, engine=engine, format=file_format)
+            if sample_count is not None:
+                overrides['samples'] = sample_count
+            if resolution is not None:
+                overrides['resolution_percentage'] = resolution
+            variants.append(overrides)
+        
+        return variants
+
+class VF_OT_SubmitBulk(JobSubmissionMixin, Operator):
+    """Submit several scenes, view layers and cameras from one upload"""
+    bl_idname = "veriframe.submit_bulk"
+    bl_label = "Bulk Submit"
+    bl_description = "Submit the ticked scenes, view layers and cameras as separate jobs sharing one upload and one contract transaction"
+    bl_options = {'REGISTER'}
+    
+    targets: CollectionProperty(type=VeriFrameBulkTarget)
+    
+    def invoke(self, context, event):
+        """List every scene with its view layers and cameras, starting from the current scene"""
+        self.targets.clear()
+        for scene in bpy.data.scenes:
+            self._add_target(scene.name, 'SCENE', scene.name, scene == context.scene)
+            for view_layer in scene.view_layers:
+                self._add_target(view_layer.name, 'VIEW_LAYER', scene.name)
+            for obj in scene.objects:
+                if obj.type == 'CAMERA':
+                    self._add_target(obj.name, 'CAMERA', scene.name)
+        return context.window_manager.invoke_props_dialog(self, width=400)
+    
+    def _add_target(self, name, kind, scene_name, selected=False):
+        target = self.targets.add()
+        target.name = name
+        target.kind = kind
+        target.scene = scene_name
+        target.selected = selected
+    
+    def draw(self, context):
+        """Draw the dialog UI"""
+        layout = self.layout
+        selected_scenes = {target.scene for target in self.targets if target.kind == 'SCENE' and target.selected}
+        icons = {'SCENE': 'SCENE_DATA', 'VIEW_LAYER': 'RENDERLAYERS', 'CAMERA': 'CAMERA_DATA'}
+        
+        for target in self.targets:
+            if target.kind == 'SCENE':
+                layout.prop(target, "selected", text=target.name, icon=icons[target.kind])
+            elif target.scene in selected_scenes:
+                row = layout.row()
+                row.separator(factor=3.0)
+                row.prop(target, "selected", text=target.name, icon=icons[target.kind])
+        
+        layout.separator()
+        layout.label(text="Unticked view layers and cameras use the scene's own settings")
+        layout.label(text=f"{len(self._variants(context.scene.veriframe))} job(s), one upload, one transaction", icon='INFO')
     
-    def _submit_to_contract(self, ipfs_hash, props):
-        """Submit job to smart contract"""
-        # In a real implementation, this would interact with Starknet
-        # For now, we'll simulate by generating a job ID
-        import uuid
-        job_id = str(uuid.uuid4())[:8]
+    def execute(self, context):
+        props = context.scene.veriframe
+        
+        if not self._validate_submission(props):
+            return {'CANCELLED'}
+        
+        variants = self._variants(props)
+        if not variants:
+            self.report({'ERROR'}, "Tick at least one scene")
+            return {'CANCELLED'}
+        
+        if len(variants) > MAX_SWEEP_VARIANTS:
+            self.report({'ERROR'}, f"Bulk submission has {len(variants)} jobs, the limit is {MAX_SWEEP_VARIANTS}")
+            return {'CANCELLED'}
         
-        # Here you would typically:
-        # 1. Connect to Starknet using starknet.py
-        # 2. Call the job registry contract's submit_job function
-        # 3. Pass ipfs_hash, reward_amount, and deadline
-        # 4. Return the transaction hash or job ID
+        scene_names = list(dict.fromkeys(overrides['scene'] for overrides in variants))
+        scenes = [bpy.data.scenes[name] for name in scene_names if name in bpy.data.scenes]
+        if len(scenes) != len(scene_names):
+            self.report({'ERROR'}, "A ticked scene no longer exists")
+            return {'CANCELLED'}
         
-        return job_id
+        try:
+            with tracer.span("submit_bulk", "submit", variants=len(variants), scenes=len(scenes)):
+                result = self._submit_variants(context, variants, scenes)
+            
+            return self._report_group(result, len(variants))
+        
+        except Exception as e:
+            self.report({'ERROR'}, f"Error submitting bulk jobs: {str(e)}")
+            return {'CANCELLED'}
+    
+    def _variants(self, props):
+        """One overrides dict per ticked scene x view layer x camera combination"""
+        # Camera and view layer from the panel belong to the current scene only
+        base = {key: value for key, value in self._render_overrides(props).items()
+                if key not in ('scene', 'camera', 'view_layer')}
+        
+        variants = []
+        for scene_target in self.targets:
+            if scene_target.kind != 'SCENE' or not scene_target.selected:
+                continue
+            
+            view_layers = self._ticked('VIEW_LAYER', scene_target.name) or [None]
+            cameras = self._ticked('CAMERA', scene_target.name) or [None]
+            for view_layer, camera in itertools.product(view_layers, cameras):
+                overrides = dict(base, scene=scene_target.name)
+                if view_layer:
+                    overrides['view_layer'] = view_layer
+                if camera:
+                    overrides['camera'] = camera
+                variants.append(overrides)
+        
+        return variants
+    
+    def _ticked(self, kind, scene_name):
+        """Names of the ticked targets of one kind within a scene"""
+        return [target.name for target in self.targets
+                if target.kind == kind and target.scene == scene_name and target.selected]
+
+def _parse_int_list(text):
+    """Parse '64, 128,256' into [64, 128, 256]; None if any entry is not a positive integer"""
+    values = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit() or int(part) <= 0:
+            return None
+        values.append(int(part))
+    return values
 
 class VF_OT_CheckJobStatus(Operator):
     """Check status of a specific job"""
@@ -267,11 +760,16 @@ class VF_OT_CheckJobStatus(Operator):
         
         # Query contract for job status
         status = self._get_job_status(self.job_id, props)
+        if status is None:
+            self.report({'ERROR'}, "Could not reach the Starknet RPC endpoint")
+            return {'CANCELLED'}
         
-        # Update job status in list
+        # Update job status in list; a status older than what is known is ignored
         for job in props.jobs:
             if job.job_id == self.job_id:
-                job.status = status
+                if job_state.transition(job, status):
+                    job_state.tag_redraw_job_panels()
+                status = job.status
                 break
         
         self.report({'INFO'}, f"Job {self.job_id}: {status}")
@@ -279,17 +777,13 @@ class VF_OT_CheckJobStatus(Operator):
     
     def _get_job_status(self, job_id, props):
         """Get job status from contract"""
-        # In a real implementation, this would query the smart contract
-        # For now, we'll simulate status progression
-        import random
-        statuses = ['PENDING', 'IN_PROGRESS', 'COMPLETED', 'FAILED']
-        return random.choice(statuses)
+        return StarknetManager(props.rpc_url, props.contract_address).get_job_status(job_id)
 
 class VF_OT_DownloadResult(Operator):
     """Download completed render result"""
     bl_idname = "veriframe.download_result"
     bl_label = "Download Result"
-    bl_description = "Download the rendered result from IPFS"
+    bl_description = "Fetch the result from IPFS: previews first, then full-resolution frames"
     bl_options = {'REGISTER'}
     
     job_id: StringProperty(
@@ -328,43 +822,14 @@ class VF_OT_DownloadResult(Operator):
                 self.report({'ERROR'}, "No result available")
                 return {'CANCELLED'}
         
-        # Download from IPFS
-        success = self._download_from_ipfs(job.result_hash, props)
-        if success:
-            self.report({'INFO'}, "Result downloaded successfully")
-            return {'FINISHED'}
-        else:
-            self.report({'ERROR'}, "Failed to download result")
-            return {'CANCELLED'}
+        # Previews and frames are fetched file by file in the background
+        retrieval.start_retrieval(job, props, context.scene.frame_current)
+        self.report({'INFO'}, "Retrieving result: previews first, then full-resolution frames")
+        return {'FINISHED'}
     
     def _get_result_hash(self, job_id, props):
         """Get result hash from contract"""
-        # In a real implementation, this would query the smart contract
-        # For completed jobs to get the IPFS hash of the result
-        return "QmExampleResultHash123456789"
-    
-    def _download_from_ipfs(self, ipfs_hash, props):
-        """Download file from IPFS"""
-        try:
-            # Create downloads directory if it doesn't exist
-            downloads_dir = os.path.join(bpy.path.abspath("//"), "veriframe_downloads")
-            os.makedirs(downloads_dir, exist_ok=True)
-            
-            # Download the file
-            url = f"{props.ipfs_gateway_url}/ipfs/{ipfs_hash}"
-            response = requests.get(url, timeout=60)
-            
-            if response.status_code == 200:
-                file_path = os.path.join(downloads_dir, f"{ipfs_hash}.zip")
-                with open(file_path, 'wb') as f:
-                    f.write(response.content)
-                return True
-            else:
-                return False
-                
-        except Exception as e:
-            print(f"Download error: {e}")
-            return False
+        return StarknetManager(props.rpc_url, props.contract_address).get_job_result(job_id)
 
 class VF_OT_RefreshJobs(Operator):
     """Refresh status of all jobs"""
@@ -376,20 +841,96 @@ class VF_OT_RefreshJobs(Operator):
     def execute(self, context):
         props = context.scene.veriframe
         
-        updated_count = 0
-        for job in props.jobs:
-            old_status = job.status
-            new_status = self._get_job_status(job.job_id, props)
-            if old_status != new_status:
-                job.status = new_status
-                updated_count += 1
+        # Finished jobs can never change
+        job_ids = [job.job_id for job in props.jobs if not job_state.is_terminal(job.status)]
+        if not job_ids:
+            self.report({'INFO'}, "All jobs are finished")
+            return {'FINISHED'}
         
-        self.report({'INFO'}, f"Refreshed {updated_count} job(s)")
+        # Statuses are read in the background and applied by the dispatcher
+        if refresh.start_refresh(context.scene.name, job_ids, props.rpc_url, props.contract_address) is None:
+            self.report({'INFO'}, "A refresh is already running")
+            return {'CANCELLED'}
+        
+        self.report({'INFO'}, f"Refreshing {len(job_ids)} job(s)")
         return {'FINISHED'}
+
+class VF_OT_RetryQueue(Operator):
+    """Send queued submissions now"""
+    bl_idname = "veriframe.retry_queue"
+    bl_label = "Retry Queued Submissions"
+    bl_description = "Skip the backoff wait and retry queued submissions, including ones that gave up"
+    bl_options = {'REGISTER'}
     
-    def _get_job_status(self, job_id, props):
-        """Get job status from contract"""
-        # Simulate status progression
-        import random
-        statuses = ['PENDING', 'IN_PROGRESS', 'COMPLETED', 'FAILED']
-        return random.choice(statuses)
\ No newline at end of file
+    def execute(self, context):
+        submission_queue.get_queue().retry_now()
+        self.report({'INFO'}, "Retrying queued submissions")
+        return {'FINISHED'}
+
+class VF_OT_DiscardFailedQueue(Operator):
+    """Remove queued submissions that gave up"""
+    bl_idname = "veriframe.discard_failed_queue"
+    bl_label = "Discard Failed Submissions"
+    bl_description = ("Delete queued submissions that ran out of attempts, including their prepared blend files "
+                      "(ones waiting for a sent transaction are kept)")
+    bl_options = {'REGISTER'}
+    
+    def invoke(self, context, event):
+        return context.window_manager.invoke_confirm(self, event)
+    
+    def execute(self, context):
+        removed = submission_queue.get_queue().discard_failed()
+        self.report({'INFO'}, f"Discarded {removed} failed submission(s)")
+        return {'FINISHED'}
+
+class VF_OT_ClearResultCache(Operator):
+    """Remove every file from the local result cache"""
+    bl_idname = "veriframe.clear_result_cache"
+    bl_label = "Clear Result Cache"
+    bl_description = "Delete all cached result files (files already placed in project folders are kept)"
+    bl_options = {'REGISTER'}
+    
+    def invoke(self, context, event):
+        return context.window_manager.invoke_confirm(self, event)
+    
+    def execute(self, context):
+        result_cache = cache.get_cache()
+        if result_cache is None:
+            self.report({'INFO'}, "Result cache is disabled")
+            return {'CANCELLED'}
+        
+        size = result_cache.total_size()
+        result_cache.clear()
+        self.report({'INFO'}, f"Cleared {format_file_size(size)} from the result cache")
+        return {'FINISHED'}
+
+class VF_OT_ExportTrace(Operator, ExportHelper):
+    """Export recorded timing spans as Chrome trace-event JSON"""
+    bl_idname = "veriframe.export_trace"
+    bl_label = "Export Trace"
+    bl_description = "Save the recorded pipeline timings as a Chrome trace (open in chrome://tracing or Perfetto)"
+    bl_options = {'REGISTER'}
+    
+    filename_ext = ".json"
+    filter_glob: StringProperty(default="*.json", options={'HIDDEN'})
+    
+    def execute(self, context):
+        try:
+            tracer.export_chrome_trace(self.filepath)
+        except OSError as e:
+            self.report({'ERROR'}, f"Could not write trace: {e}")
+            return {'CANCELLED'}
+        
+        self.report({'INFO'}, f"Trace saved to {self.filepath}")
+        return {'FINISHED'}
+
+class VF_OT_ClearTrace(Operator):
+    """Discard recorded timing spans"""
+    bl_idname = "veriframe.clear_trace"
+    bl_label = "Clear Trace"
+    bl_description = "Discard the recorded pipeline timings"
+    bl_options = {'REGISTER'}
+    
+    def execute(self, context):
+        tracer.clear()
+        return {'FINISHED'}
@@ -5,6 +5,14 @@ UI Panels for the VeriFrame addon
 import bpy
 from bpy.types import Panel
 
+from . import preupload
+from . import refresh
+from . import retrieval
+from . import submission_queue
+from .config import DEBUG_PANEL_SPANS
+from .tracing import tracer
+from .utils import format_file_size
+
 class VF_PT_MainPanel(Panel):
     """Main VeriFrame panel in render properties"""
     bl_label = "VeriFrame"
@@ -68,10 +76,52 @@ class VF_PT_MainPanel(Panel):
         
         col.prop(props, "output_format")
         
-        # Submit button
+        # Render overrides are sent in the job sidecar, not baked into the blend
+        row = box.row()
+        row.prop(props, "show_render_overrides",
+                icon="TRIA_DOWN" if props.show_render_overrides else "TRIA_RIGHT",
+                icon_only=True, emboss=False)
+        row.label(text="Render Overrides")
+        
+        if props.show_render_overrides:
+            col = box.column(align=True)
+            col.prop(props, "override_samples")
+            col.prop(props, "override_resolution")
+            col.prop(props, "use_frame_range_override")
+            if props.use_frame_range_override:
+                row = col.row(align=True)
+                row.prop(props, "override_frame_start")
+                row.prop(props, "override_frame_end")
+            col.prop(props, "override_camera")
+            col.prop_search(props, "override_view_layer", context.scene, "view_layers")
+        
+        # Submit buttons
         row = box.row()
         row.scale_y = 1.5
         row.operator("veriframe.submit_job", text="Submit Job", icon='RENDER_ANIMATION')
+        row = box.row(align=True)
+        row.operator("veriframe.submit_sweep", text="Parameter Sweep...", icon='MOD_ARRAY')
+        row.operator("veriframe.submit_bulk", text="Bulk Submit...", icon='SCENE_DATA')
+        
+        # Background pre-upload status
+        worker = preupload.get_worker()
+        if worker.status:
+            box.label(text=worker.status, icon='EXPORT')
+        
+        # Offline submission queue depth
+        counts = submission_queue.get_queue().counts()
+        waiting = counts['QUEUED'] + counts['SENDING']
+        if waiting or counts['FAILED']:
+            queue_box = box.box()
+            row = queue_box.row()
+            row.label(text=f"Queued: {waiting} ({counts['SENDING']} sending)", icon='SORTTIME')
+            row.operator("veriframe.retry_queue", text="", icon='FILE_REFRESH')
+            if counts['FAILED']:
+                row = queue_box.row()
+                row.label(text=f"Failed: {counts['FAILED']}", icon='ERROR')
+                row.operator("veriframe.discard_failed_queue", text="", icon='TRASH')
+            if submission_queue.get_queue().status:
+                queue_box.label(text=submission_queue.get_queue().status)
         
         # Advanced Settings
         box = layout.box()
@@ -121,50 +171,36 @@ class VF_PT_JobHistoryPanel(Panel):
         if props.auto_refresh:
             row.prop(props, "refresh_interval", text="Interval (s)")
         
+        job_refresh = refresh.get_refresh()
+        if job_refresh and job_refresh.status:
+            layout.label(text=job_refresh.status, icon='SORTTIME' if job_refresh.is_active() else 'INFO')
+        
         # Jobs list
         if len(props.jobs) == 0:
             layout.label(text="No jobs submitted yet", icon='INFO')
             return
         
-        # Job list
+        # Job list; jobs submitted together are drawn as one group
         box = layout.box()
         
-        for i, job in enumerate(props.jobs):
-            row = box.row()
-            
-            # Status icon
-            status_icons = {
-                'PENDING': 'TIME',
-                'IN_PROGRESS': 'RENDER_ANIMATION',
-                'COMPLETED': 'CHECKMARK',
-                'FAILED': 'CANCEL',
-                'CANCELLED': 'X'
-            }
-            row.label(text="", icon=status_icons.get(job.status, 'QUESTION'))
-            
-            # Job info
-            col = row.column()
-            col.label(text=f"Job {job.job_id}")
-            
-            sub_row = col.row()
-            sub_row.scale_y = 0.8
-            sub_row.label(text=f"Status: {job.status}")
-            sub_row.label(text=f"Reward: {job.reward} STRK")
-            
-            # Action buttons
-            col = row.column()
-            col.scale_x = 0.8
-            
-            # Status check button
-            op = col.operator("veriframe.check_job_status", text="", icon='FILE_REFRESH')
-            op.job_id = job.job_id
-            
-            # Download button (only for completed jobs)
-            if job.status == 'COMPLETED':
-                op = col.operator("veriframe.download_result", text="", icon='IMPORT')
-                op.job_id = job.job_id
+        groups = []
+        for job in props.jobs:
+            if job.group_id and groups and groups[-1][0] == job.group_id:
+                groups[-1][1].append(job)
+            else:
+                groups.append((job.group_id, [job]))
+        
+        for i, (group_id, jobs) in enumerate(groups):
+            if group_id:
+                completed = sum(1 for job in jobs if job.status == 'COMPLETED')
+                group_box = box.box()
+                group_box.label(text=f"Group {group_id}: {len(jobs)} jobs, {completed} completed", icon='OUTLINER_COLLECTION')
+                for job in jobs:
+                    self._draw_job(group_box, job)
+            else:
+                self._draw_job(box, jobs[0])
             
-            if i < len(props.jobs) - 1:
+            if i < len(groups) - 1:
                 box.separator()
         
         # Statistics
@@ -177,4 +213,96 @@ class VF_PT_JobHistoryPanel(Panel):
             
             row = stats_box.row()
             row.label(text=f"Completed: {completed_count}/{len(props.jobs)}")
-            row.label(text=f"Total Spent: {total_reward} STRK")
\ No newline at end of file
+            row.label(text=f"Total Spent: {total_reward} STRK")
+    
+    def _draw_job(self, layout, job):
+        """Draw one job row with its status and actions"""
+        row = layout.row()
+        
+        # Status icon
+        status_icons = {
+            'PENDING': 'TIME',
+            'IN_PROGRESS': 'RENDER_ANIMATION',
+            'COMPLETED': 'CHECKMARK',
+            'FAILED': 'CANCEL',
+            'CANCELLED': 'X'
+        }
+        row.label(text="", icon=status_icons.get(job.status, 'QUESTION'))
+        
+        # Job info
+        col = row.column()
+        col.label(text=f"Job {job.job_id}")
+        if job.variant:
+            col.label(text=job.variant)
+        
+        sub_row = col.row()
+        sub_row.scale_y = 0.8
+        sub_row.label(text=f"Status: {job.status}")
+        sub_row.label(text=f"Reward: {job.reward} STRK")
+        
+        # Action buttons
+        col = row.column()
+        col.scale_x = 0.8
+        
+        # Status check button
+        op = col.operator("veriframe.check_job_status", text="", icon='FILE_REFRESH')
+        op.job_id = job.job_id
+        
+        # Download button (only for completed jobs)
+        if job.status == 'COMPLETED':
+            op = col.operator("veriframe.download_result", text="", icon='IMPORT')
+            op.job_id = job.job_id
+        
+        # Progress of a result being fetched
+        result_retrieval = retrieval.get_retrieval(job.job_id)
+        if result_retrieval:
+            col = layout.column(align=True)
+            col.scale_y = 0.8
+            if result_retrieval.previews_total:
+                col.label(text=f"Previews: {result_retrieval.previews_done}/{result_retrieval.previews_total}", icon='IMAGE_DATA')
+            if result_retrieval.files_total:
+                col.label(text=f"Files: {result_retrieval.files_done}/{result_retrieval.files_total}", icon='IMPORT')
+            icon = 'ERROR' if result_retrieval.state == retrieval.FAILED else 'INFO'
+            col.label(text=result_retrieval.status, icon=icon)
+
+class VF_PT_DebugPanel(Panel):
+    """Pipeline stage timings, shown when debug information is enabled"""
+    bl_label = "Debug"
+    bl_idname = "VF_PT_debug_panel"
+    bl_space_type = 'PROPERTIES'
+    bl_region_type = 'WINDOW'
+    bl_context = "render"
+    bl_parent_id = "VF_PT_main_panel"
+    bl_options = {'DEFAULT_CLOSED'}
+    
+    @classmethod
+    def poll(cls, context):
+        try:
+            addon_prefs = context.preferences.addons[__name__.partition('.')[0]].preferences
+            return addon_prefs.show_debug_info
+        except (KeyError, AttributeError):
+            return False
+    
+    def draw(self, context):
+        layout = self.layout
+        
+        row = layout.row(align=True)
+        row.operator("veriframe.export_trace", text="Export Trace", icon='EXPORT')
+        row.operator("veriframe.clear_trace", text="", icon='TRASH')
+        
+        spans = tracer.spans()
+        if not spans:
+            layout.label(text="No timings recorded yet", icon='INFO')
+            return
+        
+        # Most recent stages first
+        col = layout.column(align=True)
+        for span in reversed(spans[-DEBUG_PANEL_SPANS:]):
+            row = col.row()
+            row.label(text=span.name, icon='ERROR' if 'error' in span.args else 'TIME')
+            row.label(text=f"{span.duration * 1000:.1f} ms")
+            
+            if span.throughput is not None:
+                row.label(text=f"{format_file_size(span.args['bytes'])} @ {format_file_size(int(span.throughput))}/s")
+            else:
+                row.label(text="")
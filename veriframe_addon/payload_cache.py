@@ -0,0 +1,121 @@
+"""
+Reuse of prepared submission payloads for the VeriFrame addon
+
+A saved file with no unsaved changes and no external references already is
+a complete payload, so it is uploaded straight from disk instead of being
+written to a temporary copy first.
+
+Files that still need their external data packed are exported as before,
+but the result is kept under payloads/ in the VeriFrame config folder,
+keyed by the source path, size and mtime, the export settings and the size
+and mtime of every external file. Submitting the same unchanged file again
+reuses the prepared payload without re-exporting anything. Files with unsaved
+changes are never cached, since their mtime says nothing about their
+content.
+"""
+
+import os
+import shutil
+import json
+import hashlib
+import threading
+from typing import Optional, Dict, Any
+
+import bpy
+
+from .config import PAYLOAD_CACHE_DIR, MAX_CACHED_PAYLOADS
+from .utils import BlenderJobManager, get_data_dir
+
+def saved_file_payload() -> Optional[str]:
+    """Path of the open file if it can be uploaded as-is: saved, unchanged and self-contained"""
+    if not bpy.data.filepath or bpy.data.is_dirty:
+        return None
+    
+    if BlenderJobManager.find_unpacked_files():
+        return None
+    
+    return bpy.data.filepath
+
+def _file_state(path: str):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+class PayloadCache:
+    """Prepared payloads of saved files, reused until the file, its settings or its external data change"""
+    
+    def __init__(self, directory: str, max_entries: int = MAX_CACHED_PAYLOADS):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+    
+    def key(self, settings: Dict[str, Any]) -> Optional[str]:
+        """Cache key for the open file exported with settings, or None if it cannot be cached"""
+        if not bpy.data.filepath or bpy.data.is_dirty:
+            return None
+        
+        source = _file_state(bpy.data.filepath)
+        if source is None:
+            return None
+        
+        external = sorted(
+            (path, _file_state(path))
+            for path in map(bpy.path.abspath, BlenderJobManager.find_unpacked_files())
+        )
+        description = {
+            'source': os.path.abspath(bpy.data.filepath),
+            'state': source,
+            'settings': settings,
+            'external': external,
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.blend")
+    
+    def lookup(self, key: str) -> Optional[str]:
+        """Path of the payload prepared under key, marked as used, or None"""
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+    
+    def store(self, key: str, payload_path: str) -> str:
+        """Move a freshly prepared payload into the cache and return its new path"""
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        shutil.move(payload_path, temp_path)
+        os.replace(temp_path, path)
+        self._evict(keep=path)
+        return path
+    
+    def _evict(self, keep: str):
+        """Drop the least recently used payloads beyond max_entries"""
+        with self._lock:
+            try:
+                names = [name for name in os.listdir(self.directory) if name.endswith(".blend")]
+            except OSError:
+                return
+            
+            paths = [os.path.join(self.directory, name) for name in names]
+            paths = [path for path in paths if path != keep and os.path.exists(path)]
+            paths.sort(key=os.path.getmtime)
+            for path in paths[:max(0, len(paths) + 1 - self.max_entries)]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+_cache = None
+
+def get_cache() -> PayloadCache:
+    """Return the process-wide payload cache"""
+    global _cache
+    if _cache is None:
+        _cache = PayloadCache(os.path.join(get_data_dir(), PAYLOAD_CACHE_DIR))
+    return _cache
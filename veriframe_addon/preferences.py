@@ -4,7 +4,9 @@ Addon preferences for VeriFrame
 
 import bpy
 from bpy.types import AddonPreferences
-from bpy.props import StringProperty, BoolProperty, IntProperty
+from bpy.props import StringProperty, BoolProperty, IntProperty, FloatProperty, EnumProperty
+
+from .config import IPFS_CHUNKERS, IPFS_HASH_FUNCTIONS, DEFAULT_IPFS_CHUNK_SIZE_KB, MAX_IPFS_CHUNK_SIZE_KB
 
 class VeriFramePreferences(AddonPreferences):
     """VeriFrame addon preferences"""
@@ -44,6 +46,206 @@ class VeriFramePreferences(AddonPreferences):
         default="http://127.0.0.1:8080"
     )
     
+    # `ipfs add` parameters (defaults match the node's)
+    ipfs_chunker: EnumProperty(
+        name="Chunker",
+        description="How uploaded files are split into blocks",
+        items=IPFS_CHUNKERS,
+        default='SIZE'
+    )
+    
+    ipfs_chunk_size_kb: IntProperty(
+        name="Block Size (KiB)",
+        description="Size of fixed-size blocks, or the average size of Rabin blocks",
+        default=DEFAULT_IPFS_CHUNK_SIZE_KB,
+        min=16,
+        max=MAX_IPFS_CHUNK_SIZE_KB
+    )
+    
+    ipfs_raw_leaves: BoolProperty(
+        name="Raw Leaves",
+        description="Store file data in raw blocks without a UnixFS wrapper",
+        default=False
+    )
+    
+    ipfs_cid_version: EnumProperty(
+        name="CID Version",
+        description="CID version of uploaded files",
+        items=[
+            ('0', "CIDv0", "Qm... CIDs, the node's default"),
+            ('1', "CIDv1", "bafy... CIDs"),
+        ],
+        default='0'
+    )
+    
+    ipfs_hash_function: EnumProperty(
+        name="Hash Function",
+        description="Hash function for block CIDs",
+        items=IPFS_HASH_FUNCTIONS,
+        default='sha2-256'
+    )
+    
+    ipfs_pin: BoolProperty(
+        name="Pin Uploads",
+        description="Pin uploaded files on the IPFS node so garbage collection keeps them",
+        default=True
+    )
+    
+    ipfs_trickle: BoolProperty(
+        name="Trickle Layout",
+        description="Lay blocks out for sequential reading instead of the balanced tree",
+        default=False
+    )
+    
+    # Submission settings
+    use_targeted_export: BoolProperty(
+        name="Targeted Scene Export",
+        description="Write only the scene and its dependencies for upload instead of packing and saving a full copy of the open file",
+        default=True
+    )
+    
+    use_delta_uploads: BoolProperty(
+        name="Delta Uploads",
+        description="Upload only the bytes that changed since the last submission of the same file. Render workers must support delta references (job sidecar version 2)",
+        default=False
+    )
+    
+    use_car_uploads: BoolProperty(
+        name="Upload Jobs in One Request",
+        description="Send the blend and every job sidecar as one CAR archive with a single IPFS dag/import call, falling back to separate uploads if the node refuses it",
+        default=True
+    )
+    
+    skip_present_blocks: BoolProperty(
+        name="Skip Blocks Already on the Node",
+        description="Compute CIDs locally and ask the IPFS node which blocks it already has before uploading, sending only the missing ones",
+        default=True
+    )
+    
+    cache_prepared_payloads: BoolProperty(
+        name="Reuse Prepared Blends",
+        description="Keep the blend prepared for a saved, unchanged file and reuse it for later submissions until the file, its external data or the export settings change",
+        default=True
+    )
+    
+    preupload_on_save: BoolProperty(
+        name="Pre-upload on Save",
+        description="Upload the blend file to the IPFS node in the background every time it is saved, so submitting is near instant",
+        default=False
+    )
+    
+    preupload_bandwidth_limit: FloatProperty(
+        name="Pre-upload Bandwidth (MB/s)",
+        description="Maximum upload rate for background pre-uploads (0 for unlimited)",
+        default=10.0,
+        min=0.0,
+        max=1000.0
+    )
+    
+    queue_offline_submissions: BoolProperty(
+        name="Queue Failed Submissions",
+        description="When the IPFS node or RPC is unreachable, keep the prepared submission on disk and send it in the background once they are back",
+        default=True
+    )
+    
+    queue_max_parallel: IntProperty(
+        name="Parallel Queue Uploads",
+        description="Maximum number of queued submissions sent at the same time",
+        default=2,
+        min=1,
+        max=8
+    )
+    
+    # Result cache settings
+    use_result_cache: BoolProperty(
+        name="Cache Downloaded Results",
+        description="Keep downloaded result files in a shared local cache keyed by CID, so downloading the same result again costs no network",
+        default=True
+    )
+    
+    result_cache_dir: StringProperty(
+        name="Cache Directory",
+        description="Where cached results are stored (a shared drive lets several machines reuse them; empty uses the VeriFrame config folder)",
+        default="",
+        subtype='DIR_PATH'
+    )
+    
+    result_cache_size_gb: FloatProperty(
+        name="Cache Size (GB)",
+        description="Least recently used results are removed once the cache grows past this size",
+        default=20.0,
+        min=0.1,
+        max=10000.0
+    )
+    
+    result_cache_link_mode: EnumProperty(
+        name="Place Files By",
+        description="How cached files are placed into the project's download folder",
+        items=[
+            ('AUTO', "Automatic", "Reflink where the filesystem supports it, else hardlink, else copy"),
+            ('REFLINK', "Reflink", "Copy-on-write clone (Btrfs, XFS, APFS-like filesystems), falling back to a copy"),
+            ('HARDLINK', "Hardlink", "Hardlink to the read-only cached file, falling back to a copy"),
+            ('COPY', "Copy", "Always copy the cached file"),
+        ],
+        default='AUTO'
+    )
+    
+    verify_cache_hits: BoolProperty(
+        name="Verify Cached Files",
+        description="Check the SHA-256 of a cached file before reusing it (reads the file once more)",
+        default=True
+    )
+    
+    fetch_results_as_car: BoolProperty(
+        name="Fetch Results in One Request",
+        description="Download a whole result directory as one verified CAR export instead of file by file (previews no longer arrive first)",
+        default=False
+    )
+    
+    extract_result_archives: BoolProperty(
+        name="Extract Result Archives",
+        description="Unpack zip/tar results entry by entry while they download instead of saving the archive; frames already on disk with identical content are not rewritten",
+        default=True
+    )
+    
+    result_frame_target: EnumProperty(
+        name="Extract Frames To",
+        description="Where frames from result archives are written",
+        items=[
+            ('DOWNLOADS', "Download Folder", "Next to the blend file, in the result's download folder"),
+            ('RENDER_OUTPUT', "Render Output Path", "At the scene's output path, numbered like a local render"),
+        ],
+        default='DOWNLOADS'
+    )
+    
+    verify_downloads: BoolProperty(
+        name="Verify Downloads",
+        description="Check downloaded results against their CID while they stream in, rejecting anything the gateway altered",
+        default=True
+    )
+    
+    # Monitoring settings
+    metrics_export_enabled: BoolProperty(
+        name="Export Metrics",
+        description="Periodically write upload/download, RPC latency, cache and job metrics in Prometheus textfile format and JSON",
+        default=False
+    )
+    
+    metrics_export_path: StringProperty(
+        name="Metrics Directory",
+        description="Directory for veriframe.prom and veriframe_metrics.json (point node_exporter's textfile collector here; empty uses the VeriFrame config folder)",
+        default="",
+        subtype='DIR_PATH'
+    )
+    
+    metrics_export_interval: IntProperty(
+        name="Metrics Interval (s)",
+        description="Seconds between metric file writes",
+        default=60,
+        min=5,
+        max=3600
+    )
+    
     # UI settings
     show_debug_info: BoolProperty(
         name="Show Debug Information",
@@ -87,6 +289,64 @@ class VeriFramePreferences(AddonPreferences):
         col = box.column()
         col.prop(self, "default_ipfs_api_url")
         col.prop(self, "default_ipfs_gateway_url")
+        col.prop(self, "ipfs_chunker")
+        sub = col.column()
+        sub.active = self.ipfs_chunker != 'BUZHASH'
+        sub.prop(self, "ipfs_chunk_size_kb")
+        col.prop(self, "ipfs_raw_leaves")
+        col.prop(self, "ipfs_cid_version")
+        col.prop(self, "ipfs_hash_function")
+        col.prop(self, "ipfs_pin")
+        col.prop(self, "ipfs_trickle")
+        
+        # Submission Settings
+        box = layout.box()
+        box.label(text="Submission Settings", icon='EXPORT')
+        col = box.column()
+        col.prop(self, "use_targeted_export")
+        col.prop(self, "use_delta_uploads")
+        sub = col.column()
+        sub.active = not self.use_delta_uploads
+        sub.prop(self, "use_car_uploads")
+        col.prop(self, "skip_present_blocks")
+        col.prop(self, "cache_prepared_payloads")
+        col.prop(self, "preupload_on_save")
+        sub = col.column()
+        sub.active = self.preupload_on_save
+        sub.prop(self, "preupload_bandwidth_limit")
+        col.prop(self, "queue_offline_submissions")
+        sub = col.column()
+        sub.active = self.queue_offline_submissions
+        sub.prop(self, "queue_max_parallel")
+        
+        # Result Cache Settings
+        box = layout.box()
+        box.label(text="Result Cache", icon='FILE_CACHE')
+        col = box.column()
+        col.prop(self, "use_result_cache")
+        sub = col.column()
+        sub.active = self.use_result_cache
+        sub.prop(self, "result_cache_dir")
+        sub.prop(self, "result_cache_size_gb")
+        sub.prop(self, "result_cache_link_mode")
+        sub.prop(self, "verify_cache_hits")
+        sub.operator("veriframe.clear_result_cache", icon='TRASH')
+        col.prop(self, "extract_result_archives")
+        sub = col.column()
+        sub.active = self.extract_result_archives
+        sub.prop(self, "result_frame_target")
+        col.prop(self, "verify_downloads")
+        col.prop(self, "fetch_results_as_car")
+        
+        # Monitoring Settings
+        box = layout.box()
+        box.label(text="Monitoring", icon='GRAPH')
+        col = box.column()
+        col.prop(self, "metrics_export_enabled")
+        sub = col.column()
+        sub.active = self.metrics_export_enabled
+        sub.prop(self, "metrics_export_path")
+        sub.prop(self, "metrics_export_interval")
         
         # UI Settings
         box = layout.box()
@@ -0,0 +1,206 @@
+"""
+Background pre-upload of saved blend files for the VeriFrame addon
+
+When enabled in the preferences, every save queues the saved file for upload
+to the local IPFS node on a background thread. Submitting a job from a saved,
+unchanged file then reuses the CID instead of uploading again.
+"""
+
+import os
+import json
+import queue
+import threading
+from typing import Optional
+
+import bpy
+from bpy.app.handlers import persistent
+
+from . import dispatcher
+from .config import PREUPLOAD_REGISTRY_FILE, MAX_PREUPLOAD_ENTRIES
+from .payload_cache import saved_file_payload
+from .tracing import tracer
+from .utils import AddOptions, IPFSManager, BlenderJobManager, get_data_dir, write_json_atomic
+
+def _registry_key(file_path: str, api_url: str, add_options: Optional[AddOptions]) -> str:
+    # A CID is only reusable on the node that holds it and for the same add options
+    params = (add_options or AddOptions()).params()
+    return "|".join([os.path.abspath(file_path), api_url.rstrip('/')] + [f"{name}={params[name]}" for name in sorted(params)])
+
+class PreuploadRegistry:
+    """Remembers which saved files are already on IPFS, keyed by path, IPFS node and add options
+    
+    An entry is only valid while the file keeps the size and mtime it was
+    uploaded with.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+    
+    def lookup(self, file_path: str, api_url: str, add_options: Optional[AddOptions] = None) -> Optional[str]:
+        """Return the CID of file_path if it was uploaded to api_url with add_options and has not changed since"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        
+        with self._lock:
+            entry = self._entries.get(_registry_key(file_path, api_url, add_options))
+        
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['cid']
+        return None
+    
+    def record(self, file_path: str, api_url: str, add_options: Optional[AddOptions],
+               size: int, mtime_ns: int, sha256: Optional[str], cid: str):
+        """Store an upload result and persist the registry"""
+        with self._lock:
+            self._entries[_registry_key(file_path, api_url, add_options)] = {
+                'size': size,
+                'mtime_ns': mtime_ns,
+                'sha256': sha256,
+                'cid': cid,
+            }
+            
+            # Drop the oldest entries (dicts keep insertion order)
+            while len(self._entries) > MAX_PREUPLOAD_ENTRIES:
+                del self._entries[next(iter(self._entries))]
+            
+            snapshot = dict(self._entries)
+        
+        try:
+            write_json_atomic(self.path, snapshot)
+        except OSError as e:
+            print(f"Could not save pre-upload registry: {e}")
+
+class PreuploadWorker:
+    """Single background thread that uploads saved files one at a time"""
+    
+    def __init__(self, registry: PreuploadRegistry):
+        self.registry = registry
+        self.status = ""
+        self._queue = queue.Queue()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def enqueue(self, file_path: str, api_url: str, max_bytes_per_second: int, add_options: Optional[AddOptions] = None):
+        """Queue a saved file; repeated saves of the same file collapse into one upload"""
+        with self._lock:
+            already_queued = file_path in self._pending
+            self._pending[file_path] = (api_url, max_bytes_per_second, add_options)
+            
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="veriframe-preupload", daemon=True)
+                self._thread.start()
+        
+        if not already_queued:
+            self._queue.put(file_path)
+    
+    def _set_status(self, status: str):
+        # Shown in the submit panel, which is redrawn on the main thread
+        self.status = status
+        dispatcher.get_dispatcher().redraw()
+    
+    def stop(self):
+        """Ask the worker thread to exit once the current upload finishes"""
+        self._queue.put(None)
+    
+    def _run(self):
+        while True:
+            file_path = self._queue.get()
+            if file_path is None:
+                return
+            
+            with self._lock:
+                api_url, max_bytes_per_second, add_options = self._pending.pop(file_path)
+            
+            try:
+                self._upload(file_path, api_url, max_bytes_per_second, add_options)
+            except Exception as e:
+                self._set_status(f"Pre-upload failed: {e}")
+                print(f"Pre-upload error: {e}")
+    
+    def _upload(self, file_path: str, api_url: str, max_bytes_per_second: int, add_options: Optional[AddOptions]):
+        if self.registry.lookup(file_path, api_url, add_options):
+            return
+        
+        stat = os.stat(file_path)
+        self._set_status(f"Pre-uploading {os.path.basename(file_path)}")
+        
+        # The upload hashes while streaming so the file is read only once; a
+        # file the node already holds (e.g. saved back unchanged) is not sent
+        ipfs = IPFSManager(api_url, "", add_options)
+        with tracer.span("preupload", "preupload", file=os.path.basename(file_path), bytes=stat.st_size):
+            cid = ipfs.upload_file(file_path, max_bytes_per_second, skip_present=True)
+        if not cid:
+            self._set_status("Pre-upload failed")
+            return
+        
+        # A save during the upload means these bytes are already stale
+        current = os.stat(file_path)
+        if (current.st_size, current.st_mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            self._set_status("")
+            return
+        
+        self.registry.record(file_path, api_url, add_options, stat.st_size, stat.st_mtime_ns, ipfs.last_upload_sha256, cid)
+        self._set_status(f"Pre-uploaded {os.path.basename(file_path)}")
+
+_worker = None
+
+def get_worker() -> PreuploadWorker:
+    """Return the process-wide pre-upload worker"""
+    global _worker
+    if _worker is None:
+        _worker = PreuploadWorker(PreuploadRegistry(os.path.join(get_data_dir(), PREUPLOAD_REGISTRY_FILE)))
+    return _worker
+
+def lookup_saved_file(api_url: str, add_options: Optional[AddOptions] = None) -> Optional[str]:
+    """CID of the open file if it is saved, unchanged and already pre-uploaded to api_url with add_options"""
+    file_path = saved_file_payload()
+    if not file_path:
+        return None
+    
+    return get_worker().registry.lookup(file_path, api_url, add_options)
+
+@persistent
+def on_save_post(filepath):
+    """save_post handler: queue the saved file for background upload"""
+    try:
+        addon_prefs = bpy.context.preferences.addons[__name__.partition('.')[0]].preferences
+    except (KeyError, AttributeError):
+        return
+    
+    if not addon_prefs.preupload_on_save or not filepath:
+        return
+    
+    if BlenderJobManager.find_unpacked_files():
+        print("Pre-upload skipped: file references unpacked external data")
+        return
+    
+    scene = bpy.context.scene
+    api_url = scene.veriframe.ipfs_api_url if scene and hasattr(scene, 'veriframe') else addon_prefs.default_ipfs_api_url
+    max_bytes_per_second = int(addon_prefs.preupload_bandwidth_limit * 1024 * 1024)
+    get_worker().enqueue(bpy.path.abspath(filepath), api_url, max_bytes_per_second, AddOptions.from_preferences(addon_prefs))
+
+def register():
+    if on_save_post not in bpy.app.handlers.save_post:
+        bpy.app.handlers.save_post.append(on_save_post)
+
+def unregister():
+    if on_save_post in bpy.app.handlers.save_post:
+        bpy.app.handlers.save_post.remove(on_save_post)
+    
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
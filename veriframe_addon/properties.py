@@ -3,15 +3,36 @@ Properties for the VeriFrame addon
 """
 
 import bpy
+import time
 from bpy.props import (
     StringProperty,
     FloatProperty,
     IntProperty,
     BoolProperty,
     EnumProperty,
-    CollectionProperty
+    CollectionProperty,
+    PointerProperty
 )
 
+from . import job_state
+from .config import JOB_STATUS_TYPES
+from .utils import describe_overrides, blend_ref_cid, to_epoch
+
+class VeriFrameStatusEntry(bpy.types.PropertyGroup):
+    """One status a job has been in, and when it entered it"""
+    status: EnumProperty(
+        name="Status",
+        description="Status the job moved to",
+        items=JOB_STATUS_TYPES,
+        default='PENDING'
+    )
+    
+    at: FloatProperty(
+        name="At",
+        description="When the job moved to this status, in epoch seconds",
+        default=0.0
+    )
+
 class VeriFrameJobItem(bpy.types.PropertyGroup):
     """Individual job item for tracking"""
     job_id: StringProperty(
@@ -23,16 +44,16 @@ class VeriFrameJobItem(bpy.types.PropertyGroup):
     status: EnumProperty(
         name="Status",
         description="Current job status",
-        items=[
-            ('PENDING', 'Pending', 'Job is waiting for a worker'),
-            ('IN_PROGRESS', 'In Progress', 'Job is being processed'),
-            ('COMPLETED', 'Completed', 'Job has been completed'),
-            ('FAILED', 'Failed', 'Job failed to complete'),
-            ('CANCELLED', 'Cancelled', 'Job was cancelled'),
-        ],
+        items=JOB_STATUS_TYPES,
         default='PENDING'
     )
     
+    status_history: CollectionProperty(
+        type=VeriFrameStatusEntry,
+        name="Status History",
+        description="Every status the job has been in, oldest first"
+    )
+    
     reward: FloatProperty(
         name="Reward",
         description="Reward amount in STRK tokens",
@@ -49,7 +70,31 @@ class VeriFrameJobItem(bpy.types.PropertyGroup):
     
     ipfs_hash: StringProperty(
         name="IPFS Hash",
-        description="IPFS hash of the uploaded blend file",
+        description="IPFS hash of the job sidecar (render overrides and blend reference)",
+        default=""
+    )
+    
+    blend_hash: StringProperty(
+        name="Blend Hash",
+        description="IPFS hash of the base blend file shared by all variants",
+        default=""
+    )
+    
+    root_hash: StringProperty(
+        name="Package Hash",
+        description="IPFS hash of the directory the blend and sidecars were uploaded in, if they were packaged",
+        default=""
+    )
+    
+    variant: StringProperty(
+        name="Variant",
+        description="Short summary of the render overrides for this job",
+        default=""
+    )
+    
+    group_id: StringProperty(
+        name="Group ID",
+        description="Shared by jobs submitted together from one upload (empty for single jobs)",
         default=""
     )
     
@@ -59,11 +104,35 @@ class VeriFrameJobItem(bpy.types.PropertyGroup):
         default=""
     )
     
-    submission_time: StringProperty(
-        name="Submission Time",
-        description="When the job was submitted",
+    submitted_at: FloatProperty(
+        name="Submitted At",
+        description="Submission time in epoch seconds, for sorting and comparisons without parsing",
+        default=0.0
+    )
+
+class VeriFrameBulkTarget(bpy.types.PropertyGroup):
+    """Scene, view layer or camera offered in the bulk submit dialog"""
+    kind: EnumProperty(
+        name="Kind",
+        items=[
+            ('SCENE', 'Scene', 'Submit this scene'),
+            ('VIEW_LAYER', 'View Layer', 'Submit this view layer on its own'),
+            ('CAMERA', 'Camera', 'Submit from this camera'),
+        ],
+        default='SCENE'
+    )
+    
+    scene: StringProperty(
+        name="Scene",
+        description="Scene the target belongs to",
         default=""
     )
+    
+    selected: BoolProperty(
+        name="Selected",
+        description="Include this target in the bulk submission",
+        default=False
+    )
 
 class VeriFrameProperties(bpy.types.PropertyGroup):
     """Main properties for VeriFrame addon"""
@@ -147,6 +216,63 @@ class VeriFrameProperties(bpy.types.PropertyGroup):
         default='PNG'
     )
     
+    # Render Overrides (sent in the job sidecar, not baked into the blend)
+    override_samples: IntProperty(
+        name="Samples",
+        description="Render samples for the job (0 uses the scene setting)",
+        default=0,
+        min=0,
+        max=65536
+    )
+    
+    override_resolution: IntProperty(
+        name="Resolution %",
+        description="Resolution percentage for the job (0 uses the scene setting)",
+        default=0,
+        min=0,
+        max=100,
+        subtype='PERCENTAGE'
+    )
+    
+    use_frame_range_override: BoolProperty(
+        name="Override Frame Range",
+        description="Render a different frame range than the scene",
+        default=False
+    )
+    
+    override_frame_start: IntProperty(
+        name="Start Frame",
+        description="First frame to render",
+        default=1,
+        min=0
+    )
+    
+    override_frame_end: IntProperty(
+        name="End Frame",
+        description="Last frame to render",
+        default=250,
+        min=0
+    )
+    
+    override_camera: PointerProperty(
+        name="Camera",
+        description="Camera to render from (empty uses the scene camera)",
+        type=bpy.types.Object,
+        poll=lambda self, obj: obj.type == 'CAMERA'
+    )
+    
+    override_view_layer: StringProperty(
+        name="View Layer",
+        description="Only render this view layer (empty renders all enabled layers)",
+        default=""
+    )
+    
+    show_render_overrides: BoolProperty(
+        name="Show Render Overrides",
+        description="Show per-job render overrides",
+        default=False
+    )
+    
     # Job Management
     jobs: CollectionProperty(
         type=VeriFrameJobItem,
@@ -179,4 +305,21 @@ class VeriFrameProperties(bpy.types.PropertyGroup):
         default=30,
         min=10,
         max=300
-    )
\ No newline at end of file
+    )
+    
+    def add_job(self, job_id, sidecar_hash, blend_hash, overrides, reward, deadline, submitted_at=None, group_id="",
+                root_hash=""):
+        """Add a submitted job to the tracking list (submitted_at in epoch seconds, now if not given)"""
+        job = self.jobs.add()
+        job.name = job_id  # lets the dispatcher find jobs with jobs.find()
+        job.job_id = job_id
+        job.reward = reward
+        job.deadline = deadline
+        job.ipfs_hash = sidecar_hash
+        job.blend_hash = blend_ref_cid(blend_hash)
+        job.root_hash = root_hash
+        job.variant = describe_overrides(overrides)
+        job.group_id = group_id
+        job.submitted_at = to_epoch(submitted_at) or time.time()
+        job_state.initialize(job, 'PENDING', job.submitted_at)
+        return job
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+Background refresh of job statuses for the VeriFrame addon
+
+Refresh All reads the status of every unfinished job on a small pool of
+worker threads instead of blocking the UI. Each status is handed to the
+main-thread dispatcher, which applies it through the job state machine in
+coalesced batches and redraws the job panels once per batch.
+"""
+
+import threading
+from typing import List, Optional
+
+from . import dispatcher
+from .config import REFRESH_DEADLINE, REFRESH_WORKERS
+from .resilience import Deadline
+from .tracing import tracer
+from .utils import StarknetManager
+
+class JobRefresh:
+    """One background pass over the statuses of a scene's unfinished jobs"""
+    
+    def __init__(self, scene_name: str, job_ids: List[str], rpc_url: str, contract_address: str):
+        self.scene_name = scene_name
+        self.job_ids = job_ids
+        self.starknet = StarknetManager(rpc_url, contract_address)
+        self.status = ""
+        self.checked = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="veriframe-refresh", daemon=True)
+    
+    def start(self):
+        self.status = f"Refreshing {len(self.job_ids)} job(s)"
+        self._thread.start()
+    
+    def cancel(self):
+        self._cancelled.set()
+    
+    def is_active(self) -> bool:
+        return self._thread.is_alive()
+    
+    def _run(self):
+        from concurrent.futures import ThreadPoolExecutor
+        
+        deadline = Deadline(REFRESH_DEADLINE)
+        try:
+            with tracer.span("refresh_jobs", "refresh", jobs=len(self.job_ids)):
+                with ThreadPoolExecutor(REFRESH_WORKERS, thread_name_prefix="veriframe-refresh") as pool:
+                    for job_id in self.job_ids:
+                        pool.submit(self._check, job_id, deadline)
+        finally:
+            if self.failed:
+                self.status = f"Checked {self.checked} job(s), {self.failed} could not be checked"
+            else:
+                self.status = f"Checked {self.checked} job(s)"
+            dispatcher.get_dispatcher().redraw()
+    
+    def _check(self, job_id: str, deadline: Deadline):
+        # Degrade gracefully: once the endpoint is known to be down or the
+        # time budget is spent, leave the remaining jobs as they are
+        status = None
+        if not self._cancelled.is_set() and self.starknet.is_available() and not deadline.expired():
+            status = self.starknet.get_job_status(job_id, deadline)
+        
+        with self._lock:
+            if status is None:
+                self.failed += 1
+            else:
+                self.checked += 1
+        
+        if status is not None:
+            dispatcher.get_dispatcher().update_job(self.scene_name, job_id, status=status)
+
+_refresh = None
+
+def get_refresh() -> Optional[JobRefresh]:
+    """The latest refresh started this session, if any"""
+    return _refresh
+
+def start_refresh(scene_name: str, job_ids: List[str], rpc_url: str, contract_address: str) -> Optional[JobRefresh]:
+    """Start refreshing job_ids in the background; None if a refresh is still running"""
+    global _refresh
+    if _refresh is not None and _refresh.is_active():
+        return None
+    
+    _refresh = JobRefresh(scene_name, job_ids, rpc_url, contract_address)
+    _refresh.start()
+    return _refresh
+
+def unregister():
+    if _refresh is not None:
+        _refresh.cancel()
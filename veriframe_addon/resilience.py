@@ -0,0 +1,219 @@
+"""
+Retry, backoff and circuit breaking for VeriFrame network calls
+
+Every IPFS and Starknet request goes through call(), which retries transient
+failures with jittered exponential backoff, respects an overall deadline and
+trips a per-endpoint circuit breaker so a dead endpoint fails fast instead of
+being retried for every item of a batch.
+"""
+
+import time
+import random
+import threading
+from typing import Optional, Callable, Any
+
+from . import metrics
+from .config import (
+    RETRY_MAX_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+)
+
+# HTTP statuses worth retrying, and the subset a server sends before doing any work
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+NOT_PROCESSED_STATUS_CODES = {429, 503}
+
+class NetworkError(Exception):
+    """Base class for failures raised by the resilience layer"""
+
+class TransientError(NetworkError):
+    """A failure that may succeed if retried"""
+    
+    def __init__(self, message: str, response=None, sent: bool = True):
+        super().__init__(message)
+        self.response = response
+        self.sent = sent
+
+class CircuitOpenError(NetworkError):
+    """The endpoint failed repeatedly and is not being called for now"""
+
+class DeadlineExceeded(NetworkError):
+    """The overall time budget ran out"""
+
+class Deadline:
+    """Absolute time budget shared by every call made for one operation"""
+    
+    def __init__(self, seconds: Optional[float] = None):
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+    
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None for no deadline"""
+        if self.expires_at is None:
+            return None
+        return self.expires_at - time.monotonic()
+    
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+    
+    def timeout(self, default: float) -> float:
+        """Per-request timeout: the default, capped by the time left"""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if remaining <= 0:
+            raise DeadlineExceeded("Deadline exceeded")
+        return min(default, remaining)
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+    
+    def __init__(self, max_attempts: int = RETRY_MAX_ATTEMPTS, base_delay: float = RETRY_BASE_DELAY, max_delay: float = RETRY_MAX_DELAY):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+    
+    def delay(self, attempt: int) -> float:
+        """Sleep before retry number attempt (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+DEFAULT_POLICY = RetryPolicy()
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets one trial call through after a cool-down"""
+    
+    CLOSED = 'CLOSED'
+    OPEN = 'OPEN'
+    HALF_OPEN = 'HALF_OPEN'
+    
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """Whether a call may be attempted now"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                return True
+            if self.state == self.HALF_OPEN:
+                # Only the single trial call is allowed while half open
+                return False
+            return True
+    
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+    
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    """Circuit breaker shared by every caller of one endpoint"""
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker()
+        return breaker
+
+def is_available(endpoint: str) -> bool:
+    """False while the endpoint's circuit is open"""
+    return not get_breaker(endpoint).is_open()
+
+def _as_transient(error: Exception) -> Optional[TransientError]:
+    """Map requests exceptions to TransientError; None for non-retryable errors"""
+    import requests
+    
+    if isinstance(error, TransientError):
+        return error
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return TransientError(str(error), sent=False)
+    if isinstance(error, requests.exceptions.ConnectionError):
+        # Refused/unresolvable connections never reached the server
+        sent = 'NewConnectionError' not in repr(error) and 'NameResolutionError' not in repr(error)
+        return TransientError(str(error), sent=sent)
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError)):
+        return TransientError(str(error))
+    return None
+
+def call(request: Callable[[float], Any], endpoint: str, idempotent: bool = True,
+         timeout: float = 30, deadline: Optional[Deadline] = None,
+         policy: RetryPolicy = DEFAULT_POLICY) -> Any:
+    """Run request(timeout) with retries, backoff and circuit breaking
+    
+    request may return a requests.Response; retryable status codes are treated
+    as transient failures. Non-idempotent requests are only retried when the
+    failed attempt cannot have been processed by the server.
+    """
+    breaker = get_breaker(endpoint)
+    deadline = deadline or Deadline()
+    attempt = 0
+    
+    while True:
+        attempt += 1
+        # Checked first: allow() may start a half-open trial that must then be settled
+        request_timeout = deadline.timeout(timeout)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{endpoint} is unavailable (circuit open)")
+        
+        recorded = False
+        try:
+            result = request(request_timeout)
+            status_code = getattr(result, 'status_code', None)
+            if status_code in RETRYABLE_STATUS_CODES:
+                raise TransientError(f"HTTP {status_code} from {endpoint}", response=result,
+                                     sent=status_code not in NOT_PROCESSED_STATUS_CODES)
+        except Exception as e:
+            transient = _as_transient(e)
+            if transient is None:
+                # Not a network problem (bad request, bug): the endpoint itself is fine
+                breaker.record_success()
+                recorded = True
+                raise
+            
+            breaker.record_failure()
+            recorded = True
+            retry_allowed = idempotent or not transient.sent
+            if attempt >= policy.max_attempts or not retry_allowed:
+                if transient.response is not None:
+                    return transient.response
+                raise transient
+            
+            delay = policy.delay(attempt)
+            remaining = deadline.remaining()
+            if remaining is not None and delay >= remaining:
+                raise DeadlineExceeded(f"Deadline exceeded after {attempt} attempt(s) to {endpoint}") from e
+            
+            metrics.retries.labels(endpoint=endpoint).inc()
+            print(f"Retrying {endpoint} in {delay:.1f}s ({transient})")
+            time.sleep(delay)
+            continue
+        else:
+            breaker.record_success()
+            recorded = True
+            return result
+        finally:
+            # An attempt cut short (e.g. KeyboardInterrupt) still settles a half-open trial
+            if not recorded:
+                breaker.record_failure()
@@ -0,0 +1,460 @@
+"""
+Progressive retrieval of render results for the VeriFrame addon
+
+A result CID is expected to be a directory: full-resolution frames plus small
+previews in a previews/ (or thumbnails/) subfolder. Instead of fetching one
+archive, the directory is listed and every file is fetched by IPFS path on a
+background thread: previews first, then frames in priority order (first, last
+and current frame before the rest). Each finished file is handed to the
+main-thread dispatcher, which loads it and shows the best image so far in an
+image editor.
+
+Results that are a single file (the old zip layout) are archives: they are
+extracted entry by entry as they download (see extract.py), optionally with
+frames placed at the scene's output path, or kept as a .zip when extraction
+is off. With verification on, every file is fetched by its own CID and checked
+against it while it streams in.
+
+Optionally the whole result is fetched in one request instead, as a CAR
+export that is verified and unpacked into the output folder as it streams
+(files then arrive in name order rather than previews first).
+"""
+
+import os
+import threading
+from collections import namedtuple
+from typing import Optional, List, Dict
+
+import bpy
+
+from .config import (
+    RESULT_IMAGE_EXTENSIONS,
+    RESULT_MAX_DEPTH,
+    DOWNLOADS_FOLDER,
+    UPLOAD_CHUNK_SIZE,
+)
+from . import cache
+from . import dispatcher
+from . import extract
+from .tracing import tracer
+from .utils import IPFSManager, PartialFile
+
+ResultFile = namedtuple('ResultFile', 'path cid size frame preview')
+
+# Retrieval states
+LISTING = 'LISTING'
+FETCHING = 'FETCHING'
+DONE = 'DONE'
+FAILED = 'FAILED'
+
+def _is_image(path: str) -> bool:
+    return path.lower().endswith(RESULT_IMAGE_EXTENSIONS)
+
+def _result_file(path: str, link: Dict) -> ResultFile:
+    return ResultFile(path, link['Hash'], link.get('Size', 0), extract.frame_number(path), extract.is_preview(path))
+
+def list_result(ipfs: IPFSManager, cid: str) -> Optional[List[ResultFile]]:
+    """Every file below a result directory, or None if cid is not a listable directory"""
+    files = []
+    pending = [("", cid, 0)]
+    
+    while pending:
+        prefix, directory_cid, depth = pending.pop()
+        links = ipfs.list_directory(directory_cid)
+        if links is None or (not links and not prefix):
+            return None
+        
+        for link in links:
+            name = link.get('Name', "")
+            # Names come from the network: never let one escape the output folder
+            if name in ("", ".", "..") or "/" in name or "\\" in name:
+                continue
+            path = prefix + name
+            if link.get('Type') == 1:
+                if depth < RESULT_MAX_DEPTH:
+                    pending.append((path + "/", link['Hash'], depth + 1))
+            else:
+                files.append(_result_file(path, link))
+    
+    return files
+
+def plan_downloads(files: List[ResultFile], current_frame: int) -> List[ResultFile]:
+    """Order files for fetching: previews, then first/last/current frames, then the rest"""
+    frames = [f.frame for f in files if f.frame is not None]
+    priority = {}
+    if frames:
+        for rank, frame in enumerate((min(frames), max(frames), current_frame)):
+            priority.setdefault(frame, rank)
+    
+    def key(f):
+        frame_rank = priority.get(f.frame, len(priority)) if f.frame is not None else len(priority) + 1
+        return (not f.preview, not _is_image(f.path), frame_rank, f.frame or 0, f.path)
+    
+    return sorted(files, key=key)
+
+class ResultRetrieval:
+    """Fetches the files of one result on a background thread"""
+    
+    def __init__(self, job_id: str, cid: str, ipfs: IPFSManager, output_dir: str, current_frame: int,
+                 result_cache: Optional[cache.ResultCache] = None, verify: bool = True, fetch_car: bool = False,
+                 extract_archives: bool = True, render_pattern: Optional[str] = None):
+        self.job_id = job_id
+        self.cid = cid
+        self.ipfs = ipfs
+        self.result_cache = result_cache
+        self.verify = verify
+        self.fetch_car = fetch_car
+        self.extract_archives = extract_archives
+        self.render_pattern = render_pattern
+        self.output_dir = output_dir
+        self.current_frame = current_frame
+        self.state = LISTING
+        self.status = "Listing result"
+        self.previews_total = 0
+        self.previews_done = 0
+        self.files_total = 0
+        self.files_done = 0
+        self.display_rank = None
+        self.view_opened = False
+        self._fetched = []
+        self._car_writer = None
+        self._car_done = set()
+        self._archive_path = f"{output_dir}.zip"
+        self._extracted = 0
+        self._extraction = None
+        self._kept_archive = False
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"veriframe-retrieve-{job_id}", daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def cancel(self):
+        """Stop after the file currently being fetched"""
+        self._cancelled.set()
+    
+    def is_active(self) -> bool:
+        return self.state in (LISTING, FETCHING)
+    
+    def take_fetched(self) -> List[tuple]:
+        """(ResultFile, local path) pairs fetched since the last call"""
+        with self._lock:
+            fetched, self._fetched = self._fetched, []
+        return fetched
+    
+    def _run(self):
+        try:
+            with tracer.span("retrieve_result", "download", cid=self.cid):
+                self._retrieve()
+        except Exception as e:
+            self.state = FAILED
+            self.status = f"Retrieval failed: {e}"
+            print(f"Result retrieval error: {e}")
+        finally:
+            dispatcher.get_dispatcher().redraw()
+    
+    def _retrieve(self):
+        if self.fetch_car and self._retrieve_car():
+            return
+        
+        self.state = LISTING
+        self.status = "Listing result"
+        files = list_result(self.ipfs, self.cid)
+        if files is None:
+            # Single-file result: an archive of the frames
+            self.state = FETCHING
+            self.status = "Downloading result archive"
+            os.makedirs(os.path.dirname(self.output_dir), exist_ok=True)
+            if not self._fetch_archive():
+                self.state = FAILED
+                self.status = "Failed to download result"
+                return
+            self.state = DONE
+            if self._kept_archive:
+                self.status = f"Could not extract, kept {os.path.basename(self._archive_path)}"
+            elif self._extracted:
+                self.status = f"Extracted {self.files_done + self.previews_done} file(s)"
+            else:
+                self.status = f"Downloaded {os.path.basename(self._archive_path)}"
+            return
+        
+        plan = plan_downloads(files, self.current_frame)
+        self.previews_total = sum(1 for f in plan if f.preview)
+        self.files_total = len(plan) - self.previews_total
+        self.state = FETCHING
+        
+        failed = 0
+        for result_file in plan:
+            if self._cancelled.is_set():
+                self.state = FAILED
+                self.status = "Retrieval cancelled"
+                return
+            
+            self.status = f"Fetching {result_file.path}"
+            local_path = os.path.join(self.output_dir, *result_file.path.split('/'))
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            
+            # Files left by an earlier, interrupted retrieval are not fetched again
+            already_fetched = result_file.size and os.path.exists(local_path) and os.path.getsize(local_path) == result_file.size
+            if not already_fetched and not self._download(f"{self.cid}/{result_file.path}", result_file.cid, local_path):
+                failed += 1
+                continue
+            self._finish(result_file, local_path)
+        
+        self.state = FAILED if failed else DONE
+        self.status = f"{failed} file(s) failed to download" if failed else f"Retrieved {len(plan)} file(s)"
+    
+    def _retrieve_car(self) -> bool:
+        """Fetch the whole result as one CAR export; False to fall back to fetching file by file"""
+        self.state = FETCHING
+        self.status = "Downloading result"
+        fetched = False
+        try:
+            fetched = self.ipfs.download_car(self.cid, self._open_car_file)
+        finally:
+            if not fetched and self._car_writer is not None:
+                # Cut off mid-file: drop what was written of it
+                self._car_writer.discard()
+            self._car_writer = None
+        if not fetched:
+            return False
+        
+        self.state = DONE
+        self.status = f"Retrieved {len(self._car_done)} file(s)"
+        return True
+    
+    def _open_car_file(self, path: str, file_cid):
+        if self._cancelled.is_set():
+            raise RuntimeError("Retrieval cancelled")
+        if self._car_writer is not None:
+            # The export was restarted after a dropped connection (harmless if it completed)
+            self._car_writer.discard()
+        
+        if not path:
+            # Single-file result: an archive
+            self._car_writer = self._archive_sink()
+            return self._car_writer
+        
+        result_file = _result_file(path, {'Hash': str(file_cid)})
+        local_path = os.path.join(self.output_dir, *path.split('/'))
+        self.status = f"Fetching {result_file.path}"
+        self._car_writer = _CarFileWriter(self, result_file, local_path)
+        return self._car_writer
+    
+    def _car_file_done(self, result_file: ResultFile, local_path: str, sha256: str):
+        if self.result_cache is not None:
+            self.result_cache.add(result_file.cid, local_path, sha256)
+        # A retried export delivers the same files again
+        if result_file.path not in self._car_done:
+            self._car_done.add(result_file.path)
+            self._finish(result_file, local_path)
+    
+    def _fetch_archive(self) -> bool:
+        """Fetch a single-file result, extracting it as it streams unless extraction is off
+        
+        An archive that cannot be extracted while streaming (e.g. stored zip
+        entries with data descriptors) is kept as downloaded instead.
+        """
+        if not self.extract_archives:
+            return self._keep_archive()
+        
+        cached_path = self.result_cache.lookup(self.cid) if self.result_cache else None
+        if cached_path is not None:
+            sink = self._archive_sink(cache_archive=False)
+            try:
+                with open(cached_path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+                        sink.write(chunk)
+                sink.close()
+            except (OSError, extract.ExtractionError) as e:
+                sink.discard()
+                print(f"Could not extract cached result {self.cid}: {e}")
+                if not isinstance(e, extract.ExtractionError):
+                    return False
+                self._kept_archive = True
+                return self._keep_archive()
+        elif not self.ipfs.download_stream(self.cid, self._archive_sink, verify=self.verify):
+            if self._extraction is None or self._extraction.error is None:
+                return False
+            print(f"Could not extract result {self.cid}: {self._extraction.error}; keeping the archive")
+            self._kept_archive = True
+            return self._keep_archive()
+        
+        if not self._extracted and os.path.exists(self._archive_path):
+            # Not an archive: it was kept as downloaded
+            self._finish(ResultFile(os.path.basename(self._archive_path), self.cid, 0, None, False), self._archive_path)
+        return True
+    
+    def _keep_archive(self) -> bool:
+        """Download the result archive to _archive_path as it is"""
+        if not self._download(self.cid, self.cid, self._archive_path):
+            return False
+        self._finish(ResultFile(os.path.basename(self._archive_path), self.cid, 0, None, False), self._archive_path)
+        return True
+    
+    def _archive_sink(self, cache_archive: bool = True):
+        """Sink that extracts the result archive, keeping a copy in the result cache if there is one"""
+        target = extract.FrameTarget(self.output_dir, self.render_pattern)
+        sink = self._extraction = extract.ArchiveSink(target, self._archive_path, self._entry_extracted)
+        if cache_archive and self.result_cache is not None:
+            return _TeeSink(sink, self.result_cache.open_object(self.cid))
+        return sink
+    
+    def _entry_extracted(self, name: str, local_path: str, written: bool):
+        self.status = f"{'Extracted' if written else 'Already have'} {name}"
+        self._extracted += 1
+        path = name.replace('\\', '/').lstrip('/')
+        self._finish(ResultFile(path, "", 0, extract.frame_number(path), extract.is_preview(path)), local_path)
+    
+    def _download(self, ipfs_path: str, cid: str, local_path: str) -> bool:
+        """Fetch one file, through the result cache when there is one"""
+        if self.verify:
+            # Only a bare CID can be checked; the path resolves to the same content
+            ipfs_path = cid
+        if self.result_cache is None:
+            return self.ipfs.download_file(ipfs_path, local_path, verify=self.verify)
+        
+        def download(path):
+            if not self.ipfs.download_file(ipfs_path, path, verify=self.verify):
+                return None
+            return self.ipfs.last_download_sha256
+        
+        return self.result_cache.fetch(cid, local_path, download)
+    
+    def _finish(self, result_file: ResultFile, local_path: str):
+        with self._lock:
+            self._fetched.append((result_file, local_path))
+        if result_file.preview:
+            self.previews_done += 1
+        else:
+            self.files_done += 1
+        # Files fetched before the main thread got to them are shown in one go
+        dispatcher.get_dispatcher().post(lambda: _present(self), key=('retrieval', self.job_id))
+
+class _CarFileWriter(PartialFile):
+    """One file of a CAR export, reported to the retrieval once complete"""
+    
+    def __init__(self, retrieval: ResultRetrieval, result_file: ResultFile, local_path: str):
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        super().__init__(local_path)
+        self.retrieval = retrieval
+        self.result_file = result_file
+    
+    def close(self):
+        super().close()
+        self.retrieval._car_file_done(self.result_file, self.path, self.sha256)
+
+class _TeeSink:
+    """Writes a download to several sinks at once"""
+    
+    def __init__(self, *sinks):
+        self.sinks = sinks
+    
+    def write(self, data):
+        for sink in self.sinks:
+            sink.write(data)
+    
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+    
+    def discard(self):
+        for sink in self.sinks:
+            sink.discard()
+
+_retrievals = {}
+
+def get_retrieval(job_id: str) -> Optional[ResultRetrieval]:
+    """The latest retrieval of a job's result, if any was started this session"""
+    return _retrievals.get(job_id)
+
+def start_retrieval(job, props, current_frame: int) -> ResultRetrieval:
+    """Start fetching a completed job's result unless it is already being fetched"""
+    retrieval = _retrievals.get(job.job_id)
+    if retrieval and retrieval.is_active():
+        return retrieval
+    
+    output_dir = os.path.join(bpy.path.abspath("//"), DOWNLOADS_FOLDER, job.result_hash)
+    ipfs = IPFSManager(props.ipfs_api_url, props.ipfs_gateway_url)
+    retrieval = _retrievals[job.job_id] = ResultRetrieval(job.job_id, job.result_hash, ipfs, output_dir, current_frame,
+                                                          cache.get_cache(), **_download_options(props.id_data))
+    retrieval.start()
+    return retrieval
+
+def _download_options(scene) -> Dict:
+    """ResultRetrieval options from the preferences"""
+    try:
+        addon_prefs = bpy.context.preferences.addons[__name__.partition('.')[0]].preferences
+    except (KeyError, AttributeError):
+        return {}
+    
+    render_pattern = None
+    if addon_prefs.result_frame_target == 'RENDER_OUTPUT' and scene.render.filepath:
+        render_pattern = bpy.path.abspath(scene.render.filepath)
+    return {
+        'verify': addon_prefs.verify_downloads,
+        'fetch_car': addon_prefs.fetch_results_as_car,
+        'extract_archives': addon_prefs.extract_result_archives,
+        'render_pattern': render_pattern,
+    }
+
+def _display_rank(retrieval: ResultRetrieval, result_file: ResultFile):
+    """Higher is better: full resolution over previews, then closeness to the current frame"""
+    distance = abs(result_file.frame - retrieval.current_frame) if result_file.frame is not None else float('inf')
+    return (not result_file.preview, -distance)
+
+def _find_image_editor():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'IMAGE_EDITOR':
+                return area
+    return None
+
+def _image_editor(retrieval: ResultRetrieval):
+    """An image editor area to show results in, opening the render view (once per retrieval) if there is none"""
+    area = _find_image_editor()
+    if area is not None or retrieval.view_opened:
+        return area
+    
+    window_manager = bpy.context.window_manager
+    if not window_manager.windows:
+        return None
+    # Opens an image editor the way the user set up render display
+    retrieval.view_opened = True
+    with bpy.context.temp_override(window=window_manager.windows[0]):
+        bpy.ops.render.view_show('INVOKE_DEFAULT')
+    return _find_image_editor()
+
+def _show(retrieval: ResultRetrieval, result_file: ResultFile, local_path: str):
+    """Show a fetched image if it beats what is on screen
+    
+    Only images that are shown are loaded, so frames that never make it to
+    the screen do not become image datablocks in the user's file.
+    """
+    rank = _display_rank(retrieval, result_file)
+    if retrieval.display_rank is not None and rank <= retrieval.display_rank:
+        return
+    
+    area = _image_editor(retrieval)
+    if area is None:
+        return
+    area.spaces.active.image = bpy.data.images.load(local_path, check_existing=True)
+    area.tag_redraw()
+    retrieval.display_rank = rank
+
+def _present(retrieval: ResultRetrieval) -> bool:
+    """Dispatcher update: show the images a retrieval fetched since the last call"""
+    for result_file, local_path in retrieval.take_fetched():
+        if not _is_image(local_path):
+            continue
+        try:
+            _show(retrieval, result_file, local_path)
+        except Exception as e:
+            print(f"Could not show {result_file.path}: {e}")
+    return True
+
+def unregister():
+    for retrieval in _retrievals.values():
+        retrieval.cancel()
+    _retrievals.clear()
@@ -0,0 +1,644 @@
+"""
+Offline submission queue for the VeriFrame addon
+
+Submissions that cannot reach the IPFS node or the Starknet RPC are stored on
+disk - the prepared blend plus everything needed to submit it - and drained in
+the background by a small pool of worker threads with backoff. The queue
+survives restarts: the load_post handler resumes draining, and jobs submitted
+from the queue are added to the job history of their blend file the next time
+that file is open. Such an entry is only deleted once that file is saved with
+the jobs in it; until then a reload adds them again. Entries queued from a
+file that was never saved are tied to a token of that file's session instead
+of the (empty) path, and take the path once the file is saved.
+
+Each entry is a directory under the VeriFrame config folder holding the
+payload (job.blend, until it has been uploaded) and entry.json, which records
+progress after every step so a restart never uploads or submits twice. The
+hash of every transaction is recorded as soon as it is sent, and a later drain
+waits for that transaction instead of sending its jobs again. An entry only
+waiting for such a transaction never runs out of attempts.
+"""
+
+import os
+import json
+import time
+import shutil
+import uuid
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+import bpy
+from bpy.app.handlers import persistent
+
+from . import dispatcher
+from . import metrics
+from .config import (
+    QUEUE_DIR,
+    QUEUE_ENTRY_FILE,
+    QUEUE_MAX_ATTEMPTS,
+    QUEUE_RETRY_BASE_DELAY,
+    QUEUE_RETRY_MAX_DELAY,
+    QUEUE_POLL_INTERVAL,
+    DEFAULT_QUEUE_PARALLEL,
+    SUBMIT_DEADLINE,
+)
+from .resilience import Deadline, RetryPolicy
+from .tracing import tracer
+from .transactions import TransactionFailed, TransactionUnconfirmed
+from .utils import (
+    AddOptions,
+    IPFSManager,
+    StarknetManager,
+    SUBMITTED,
+    UNCONFIRMED,
+    build_job_sidecar,
+    get_data_dir,
+    write_json_atomic,
+)
+
+PAYLOAD_FILE = "job.blend"
+LOCK_FILE = ".drain.lock"
+
+# Entry states
+QUEUED = 'QUEUED'
+DONE = 'DONE'
+APPLIED = 'APPLIED'  # in the job history of the open file, deleted once that file is saved
+FAILED = 'FAILED'
+
+class DrainError(Exception):
+    """A step of a queued submission failed; the entry is retried later unless permanent"""
+    
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        self.permanent = permanent
+
+def _lock_file(f):
+    """Take a non-blocking exclusive lock on an open file, raising OSError if it is held"""
+    try:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except ImportError:
+        import msvcrt
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+class SubmissionQueue:
+    """Queued submissions on disk, drained by a bounded pool of worker threads
+    
+    Only one Blender instance drains the queue at a time (guarded by an OS file
+    lock); other instances still enqueue and pick up their finished jobs.
+    """
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.status = ""
+        self._entries = {}
+        self._mtimes = {}
+        self._in_flight = set()
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._workers = 0
+        self._lock_handle = None
+        self._retry_policy = RetryPolicy(QUEUE_MAX_ATTEMPTS, QUEUE_RETRY_BASE_DELAY, QUEUE_RETRY_MAX_DELAY)
+        os.makedirs(directory, exist_ok=True)
+        self.refresh()
+    
+    # Entry storage
+    
+    def _entry_dir(self, entry_id: str) -> str:
+        return os.path.join(self.directory, entry_id)
+    
+    def _payload_path(self, entry: Dict[str, Any]) -> str:
+        return os.path.join(self._entry_dir(entry['id']), PAYLOAD_FILE)
+    
+    def _save(self, entry: Dict[str, Any]):
+        """Persist an entry; called after every step so progress survives a crash"""
+        path = os.path.join(self._entry_dir(entry['id']), QUEUE_ENTRY_FILE)
+        with self._condition:
+            snapshot = json.loads(json.dumps(entry))
+        write_json_atomic(path, snapshot)
+        with self._condition:
+            self._mtimes[entry['id']] = os.stat(path).st_mtime_ns
+    
+    def refresh(self):
+        """Sync with the directory: pick up entries queued or updated by other Blender instances"""
+        try:
+            names = [name for name in os.listdir(self.directory) if not name.startswith('.')]
+        except OSError:
+            return
+        
+        with self._condition:
+            for entry_id in set(self._entries) - set(names):
+                if entry_id not in self._in_flight:
+                    self._entries.pop(entry_id, None)
+                    self._mtimes.pop(entry_id, None)
+            
+            for name in names:
+                if name in self._in_flight:
+                    continue
+                path = os.path.join(self.directory, name, QUEUE_ENTRY_FILE)
+                try:
+                    mtime_ns = os.stat(path).st_mtime_ns
+                    if self._mtimes.get(name) == mtime_ns:
+                        continue
+                    with open(path, 'r', encoding='utf-8') as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    # entry.json is written last, so this is an enqueue still in progress
+                    continue
+                self._entries[name] = entry
+                self._mtimes[name] = mtime_ns
+            
+            self._condition.notify_all()
+        self._update_metrics()
+    
+    def enqueue(self, payload_path: Optional[str], blend_hash: Optional[str], variants: List[Dict[str, Any]],
+                params: Dict[str, Any], blend_file: str, scene: str, keep_payload: bool = False,
+                root_hash: str = "", file_token: str = "") -> str:
+        """Queue a submission, moving the prepared payload into the queue
+        
+        variants are dicts with the overrides and, once known, the sidecar_hash
+        and the tx_hash of a transaction that was sent but not confirmed.
+        payload_path is only needed while blend_hash (the uploaded base blend) is unknown.
+        With keep_payload it is copied instead, for payloads the caller does not
+        own (the user's saved file or a cached payload). root_hash is the
+        package the blend and sidecars were imported in, if any; file_token
+        identifies an unsaved blend_file (see file_token()).
+        """
+        entry_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(self._entry_dir(entry_id))
+        
+        entry = {
+            'id': entry_id,
+            'state': QUEUED,
+            'created': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'attempts': 0,
+            'next_attempt_at': 0,
+            'last_error': "",
+            'blend_file': blend_file,
+            'file_token': file_token,
+            'scene': scene,
+            'blend_hash': blend_hash or "",
+            'root_hash': root_hash,
+            'params': params,
+            'variants': [
+                {'overrides': variant['overrides'], 'sidecar_hash': variant.get('sidecar_hash', ""),
+                 'tx_hash': variant.get('tx_hash', ""), 'job_id': ""}
+                for variant in variants
+            ],
+        }
+        
+        if not blend_hash:
+            if keep_payload:
+                shutil.copyfile(payload_path, self._payload_path(entry))
+            else:
+                shutil.move(payload_path, self._payload_path(entry))
+        self._save(entry)
+        
+        with self._condition:
+            self._entries[entry_id] = entry
+            self._condition.notify_all()
+        self._update_metrics()
+        return entry_id
+    
+    def counts(self) -> Dict[str, int]:
+        """Number of entries per state, plus 'SENDING' for entries being drained right now"""
+        with self._condition:
+            counts = {QUEUED: 0, DONE: 0, APPLIED: 0, FAILED: 0, 'SENDING': len(self._in_flight)}
+            for entry in self._entries.values():
+                counts[entry['state']] = counts.get(entry['state'], 0) + 1
+        counts[QUEUED] -= counts['SENDING']
+        return counts
+    
+    def _update_metrics(self):
+        for state, count in self.counts().items():
+            metrics.queue_entries.labels(state=state).set(count)
+    
+    def completed_entries(self, blend_file: str, file_token: str) -> List[Dict[str, Any]]:
+        """Drained entries that were queued from blend_file, or from the unsaved file with file_token
+        
+        Entries applied to a session of the file that ended without saving count
+        again, since their jobs never reached the file.
+        """
+        with self._condition:
+            return [entry for entry in self._entries.values()
+                    if (entry['state'] == DONE or (entry['state'] == APPLIED and entry.get('applied_token') != file_token))
+                    and entry['id'] not in self._in_flight
+                    and ((blend_file and entry['blend_file'] == blend_file)
+                         or (file_token and entry.get('file_token') == file_token))]
+    
+    def mark_applied(self, entry_id: str, file_token: str) -> bool:
+        """Record that an entry's jobs are in the job history of the file session with file_token"""
+        with self._condition:
+            entry = self._entries.get(entry_id)
+            if entry is None or entry['id'] in self._in_flight:
+                return False
+            entry['state'] = APPLIED
+            entry['applied_token'] = file_token
+        
+        try:
+            self._save(entry)
+        except OSError as e:
+            print(f"Could not save queue entry {entry_id}: {e}")
+        self._update_metrics()
+        return True
+    
+    def remove_applied(self, file_token: str) -> int:
+        """Delete entries whose jobs were saved with the file session file_token; returns how many"""
+        with self._condition:
+            applied = [entry['id'] for entry in self._entries.values()
+                       if entry['state'] == APPLIED and entry.get('applied_token') == file_token]
+        return sum(1 for entry_id in applied if self.remove(entry_id))
+    
+    def adopt(self, file_token: str, blend_file: str):
+        """Give entries queued from the unsaved file with file_token the path it was saved to"""
+        with self._condition:
+            entries = [entry for entry in self._entries.values()
+                       if not entry['blend_file'] and file_token and entry.get('file_token') == file_token]
+            for entry in entries:
+                entry['blend_file'] = blend_file
+            # An entry being drained is saved by its worker when it finishes
+            idle = [entry for entry in entries if entry['id'] not in self._in_flight]
+        
+        for entry in idle:
+            try:
+                self._save(entry)
+            except OSError as e:
+                print(f"Could not save queue entry {entry['id']}: {e}")
+    
+    def remove(self, entry_id: str) -> bool:
+        """Delete an entry; False if another Blender instance removed it first"""
+        trash = os.path.join(self.directory, f".{entry_id}.{os.getpid()}")
+        try:
+            os.rename(self._entry_dir(entry_id), trash)
+        except OSError:
+            return False
+        finally:
+            with self._condition:
+                self._entries.pop(entry_id, None)
+                self._mtimes.pop(entry_id, None)
+            self._update_metrics()
+        
+        shutil.rmtree(trash, ignore_errors=True)
+        return True
+    
+    def retry_now(self):
+        """Retry failed entries and skip any pending backoff"""
+        with self._condition:
+            entries = [entry for entry in self._entries.values()
+                       if entry['state'] in (QUEUED, FAILED) and entry['id'] not in self._in_flight]
+        
+        for entry in entries:
+            if entry['state'] == FAILED:
+                entry['state'] = QUEUED
+                entry['attempts'] = 0
+            entry['next_attempt_at'] = 0
+            self._save(entry)
+        
+        with self._condition:
+            self._condition.notify_all()
+        self._update_metrics()
+    
+    def discard_failed(self) -> int:
+        """Delete entries that ran out of attempts, returning how many were removed
+        
+        Entries with a sent transaction still to be confirmed are kept: its jobs
+        may be on the contract, and only the entry knows them.
+        """
+        with self._condition:
+            failed = [entry['id'] for entry in self._entries.values()
+                      if entry['state'] == FAILED and not _awaiting_confirmation(entry)]
+        return sum(1 for entry_id in failed if self.remove(entry_id))
+    
+    # Draining
+    
+    def start(self, max_parallel: int = DEFAULT_QUEUE_PARALLEL):
+        """Start the drain workers if they are not running (safe to call repeatedly)"""
+        with self._condition:
+            if self._workers:
+                return
+            
+            if self._lock_handle is None:
+                handle = open(os.path.join(self.directory, LOCK_FILE), 'a')
+                try:
+                    _lock_file(handle)
+                except OSError:
+                    handle.close()
+                    self.status = "Queue is being sent by another Blender instance"
+                    return
+                self._lock_handle = handle
+            
+            self.status = ""
+            self._stopping = False
+            self._workers = max(1, max_parallel)
+            for i in range(self._workers):
+                threading.Thread(target=self._work, name=f"veriframe-queue-{i}", daemon=True).start()
+    
+    def stop(self):
+        """Ask the workers to exit after their current entry; the drain lock is released by the last one"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+    
+    def _next_ready(self):
+        """Claim the next due entry; otherwise return how long to wait (caller holds the condition)"""
+        now = time.time()
+        wait = 30.0
+        for entry in sorted(self._entries.values(), key=lambda entry: entry['id']):
+            if entry['state'] != QUEUED or entry['id'] in self._in_flight:
+                continue
+            if entry['next_attempt_at'] <= now:
+                self._in_flight.add(entry['id'])
+                return entry, 0
+            wait = min(wait, entry['next_attempt_at'] - now)
+        return None, wait
+    
+    def _work(self):
+        while True:
+            with self._condition:
+                entry = None
+                while not self._stopping:
+                    entry, wait = self._next_ready()
+                    if entry is not None:
+                        break
+                    self._condition.wait(wait)
+                
+                if entry is None:
+                    self._workers -= 1
+                    if self._workers == 0 and self._lock_handle is not None:
+                        self._lock_handle.close()
+                        self._lock_handle = None
+                    return
+            
+            try:
+                self._drain(entry)
+            finally:
+                with self._condition:
+                    self._in_flight.discard(entry['id'])
+                self._update_metrics()
+    
+    def _drain(self, entry: Dict[str, Any]):
+        """Upload and submit one entry, resuming from its last recorded step"""
+        params = entry['params']
+        # Entries queued before add options existed use the node's defaults
+        ipfs = IPFSManager(params['ipfs_api_url'], params['ipfs_gateway_url'], AddOptions(**params.get('add_options', {})))
+        starknet = StarknetManager(params['rpc_url'], params['contract_address'])
+        deadline = Deadline(SUBMIT_DEADLINE)
+        self.status = f"Sending queued submission {entry['id']}"
+        dispatcher.get_dispatcher().redraw()
+        
+        try:
+            with tracer.span("queue_drain", "queue", entry=entry['id'], variants=len(entry['variants'])):
+                self._submit_entry(entry, ipfs, starknet, deadline)
+        except Exception as e:
+            entry['attempts'] += 1
+            entry['last_error'] = str(e)
+            if _waiting_only(entry) and not getattr(e, 'permanent', False):
+                # Sent transactions may land any time: keep polling at the slowest backoff
+                entry['attempts'] = min(entry['attempts'], QUEUE_MAX_ATTEMPTS)
+                entry['next_attempt_at'] = time.time() + max(QUEUE_RETRY_BASE_DELAY, self._retry_policy.delay(entry['attempts']))
+            elif entry['attempts'] >= QUEUE_MAX_ATTEMPTS or getattr(e, 'permanent', False):
+                entry['state'] = FAILED
+            else:
+                entry['next_attempt_at'] = time.time() + max(QUEUE_RETRY_BASE_DELAY, self._retry_policy.delay(entry['attempts']))
+            print(f"Queued submission {entry['id']} failed (attempt {entry['attempts']}): {e}")
+            self.status = f"Queued submission failed: {e}"
+        else:
+            entry['state'] = DONE
+            self.status = ""
+        
+        try:
+            self._save(entry)
+        except OSError as e:
+            print(f"Could not save queue entry {entry['id']}: {e}")
+        
+        if entry['state'] == DONE:
+            _post_entry(entry['id'])
+        dispatcher.get_dispatcher().redraw()
+    
+    def _submit_entry(self, entry: Dict[str, Any], ipfs: IPFSManager, starknet: StarknetManager, deadline: Deadline):
+        params = entry['params']
+        
+        if not entry['blend_hash']:
+            payload_path = self._payload_path(entry)
+            if not os.path.exists(payload_path):
+                raise DrainError("Queued blend file is missing", permanent=True)
+            
+            blend_hash = ipfs.upload_file(payload_path, deadline=deadline)
+            if not blend_hash:
+                raise DrainError("Failed to upload to IPFS")
+            entry['blend_hash'] = blend_hash
+            self._save(entry)
+            os.remove(payload_path)
+        
+        for variant in entry['variants']:
+            if variant['job_id'] or variant['sidecar_hash']:
+                continue
+            sidecar_hash = ipfs.upload_json(build_job_sidecar(entry['blend_hash'], variant['overrides']), deadline=deadline)
+            if not sidecar_hash:
+                raise DrainError("Failed to upload to IPFS")
+            variant['sidecar_hash'] = sidecar_hash
+            self._save(entry)
+        
+        # A transaction sent earlier is resolved first: sending its jobs again could post them twice
+        unconfirmed = 0
+        for tx_hash in dict.fromkeys(variant['tx_hash'] for variant in entry['variants']
+                                     if variant.get('tx_hash') and not variant['job_id']):
+            sent = [variant for variant in entry['variants'] if variant.get('tx_hash') == tx_hash]
+            try:
+                job_ids = starknet.confirm_jobs(tx_hash, len(sent), deadline.remaining())
+            except TransactionFailed as e:
+                print(f"Queued submission {entry['id']}: {e}; sending its jobs again")
+                for variant in sent:
+                    variant['tx_hash'] = ""
+                self._save(entry)
+                continue
+            except TransactionUnconfirmed as e:
+                print(f"Queued submission {entry['id']}: {e}")
+                unconfirmed += len(sent)
+                continue
+            
+            submitted_at = time.time()
+            for variant, job_id in zip(sent, job_ids):
+                variant['job_id'] = job_id
+                variant['submitted_at'] = submitted_at
+            self._save(entry)
+        
+        # Variants still waiting for the contract go out as multicall transactions;
+        # each hash is on disk before its receipt is awaited, so a crash cannot lead to a resend
+        pending = [variant for variant in entry['variants'] if not variant['job_id'] and not variant.get('tx_hash')]
+        if pending:
+            def record_sent(indices, tx_hash):
+                for index in indices:
+                    pending[index]['tx_hash'] = tx_hash
+                try:
+                    self._save(entry)
+                except OSError as e:
+                    print(f"Could not save queue entry {entry['id']}: {e}")
+            
+            jobs = [(variant['sidecar_hash'], params['reward_amount'], params['deadline_hours']) for variant in pending]
+            submissions = starknet.submit_jobs(jobs, params['wallet_address'], deadline, on_sent=record_sent)
+            if not submissions:
+                raise DrainError("Failed to submit job to contract")
+            
+            # Keep the IDs of the batches that landed and the hashes of those still in flight;
+            # only jobs that never reached the contract are sent again
+            submitted_at = time.time()
+            for variant, submission in zip(pending, submissions):
+                if submission.state == SUBMITTED:
+                    variant['job_id'] = submission.job_id
+                    variant['submitted_at'] = submitted_at
+                elif submission.state == UNCONFIRMED:
+                    unconfirmed += 1
+                else:
+                    # Never sent, or reverted: free to be sent again
+                    variant['tx_hash'] = ""
+            self._save(entry)
+        
+        missing = sum(1 for variant in entry['variants'] if not variant['job_id'])
+        if missing:
+            raise DrainError(f"{missing} of {len(entry['variants'])} jobs are not on the contract yet "
+                             f"({unconfirmed} awaiting confirmation)")
+
+def _awaiting_confirmation(entry: Dict[str, Any]) -> bool:
+    """Whether some variant was sent in a transaction that has not been confirmed"""
+    return any(variant.get('tx_hash') and not variant['job_id'] for variant in entry['variants'])
+
+def _waiting_only(entry: Dict[str, Any]) -> bool:
+    """Whether every variant without a job ID is waiting for a sent transaction"""
+    return _awaiting_confirmation(entry) and all(variant['job_id'] or variant.get('tx_hash')
+                                                 for variant in entry['variants'])
+
+_queue = None
+
+def get_queue() -> SubmissionQueue:
+    """Return the process-wide submission queue"""
+    global _queue
+    if _queue is None:
+        _queue = SubmissionQueue(os.path.join(get_data_dir(), QUEUE_DIR))
+    return _queue
+
+# Identifies the file open in this session until the next load (File > New
+# or Open), so entries queued from an unsaved file never reach another one
+_file_token = uuid.uuid4().hex
+
+def file_token() -> str:
+    """Token of the open file, recorded with the entries queued from it"""
+    return _file_token
+
+def is_enabled() -> bool:
+    """Whether failed submissions should be queued instead of dropped"""
+    try:
+        addon_prefs = bpy.context.preferences.addons[__name__.partition('.')[0]].preferences
+        return addon_prefs.queue_offline_submissions
+    except (KeyError, AttributeError):
+        return True
+
+def _start():
+    try:
+        addon_prefs = bpy.context.preferences.addons[__name__.partition('.')[0]].preferences
+        max_parallel = addon_prefs.queue_max_parallel
+    except (KeyError, AttributeError):
+        max_parallel = DEFAULT_QUEUE_PARALLEL
+    get_queue().start(max_parallel)
+
+def _apply_entry(entry_id: str) -> bool:
+    """Dispatcher update: add the jobs of a drained entry of the open file to its job history"""
+    submission_queue = get_queue()
+    entry = next((entry for entry in submission_queue.completed_entries(bpy.data.filepath, _file_token)
+                  if entry['id'] == entry_id), None)
+    if entry is None:
+        return False
+    
+    scene = bpy.data.scenes.get(entry['scene']) or bpy.context.scene
+    # Kept until the file is saved, so closing without saving does not lose the jobs
+    if scene is None or not submission_queue.mark_applied(entry_id, _file_token):
+        return False
+    
+    params = entry['params']
+    for variant in entry['variants']:
+        # Already there if the file was saved with them by another Blender instance
+        if scene.veriframe.jobs.find(variant['job_id']) >= 0:
+            continue
+        scene.veriframe.add_job(variant['job_id'], variant['sidecar_hash'], entry['blend_hash'], variant['overrides'],
+                                params['reward_amount'], params['deadline_hours'],
+                                # Entries queued by earlier versions hold a timestamp string
+                                variant.get('submitted_at') or variant.get('submission_time'),
+                                params.get('group_id', ""), entry.get('root_hash', ""))
+    return True
+
+def _post_entry(entry_id: str):
+    dispatcher.get_dispatcher().post(lambda: _apply_entry(entry_id), key=('queue', entry_id))
+
+def apply_completed() -> int:
+    """Hand drained entries of the open file to the dispatcher for its job history; returns how many"""
+    entries = get_queue().completed_entries(bpy.data.filepath, _file_token)
+    for entry in entries:
+        _post_entry(entry['id'])
+    return len(entries)
+
+_last_counts = None
+
+def _poll():
+    """bpy.app.timers callback: sync with disk and keep draining"""
+    global _last_counts
+    
+    try:
+        submission_queue = get_queue()
+        submission_queue.refresh()
+        _start()
+        
+        # Entries drained by another Blender instance only show up here
+        apply_completed()
+        counts = submission_queue.counts()
+        if counts != _last_counts:
+            dispatcher.get_dispatcher().redraw()
+        _last_counts = counts
+    except Exception as e:
+        print(f"Submission queue error: {e}")
+    
+    return QUEUE_POLL_INTERVAL
+
+@persistent
+def on_load_post(filepath):
+    """load_post handler: resume draining and record jobs queued from the loaded file"""
+    global _file_token
+    _file_token = uuid.uuid4().hex
+    
+    try:
+        get_queue().refresh()
+        _start()
+        apply_completed()
+    except Exception as e:
+        print(f"Submission queue error: {e}")
+
+@persistent
+def on_save_post(filepath):
+    """save_post handler: entries queued before the first save now belong to the saved path,
+    and entries whose jobs were added to the job history are now saved with it"""
+    try:
+        get_queue().adopt(_file_token, bpy.data.filepath)
+        get_queue().remove_applied(_file_token)
+    except Exception as e:
+        print(f"Submission queue error: {e}")
+
+def register():
+    if on_load_post not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(on_load_post)
+    if on_save_post not in bpy.app.handlers.save_post:
+        bpy.app.handlers.save_post.append(on_save_post)
+    if not bpy.app.timers.is_registered(_poll):
+        bpy.app.timers.register(_poll, first_interval=QUEUE_POLL_INTERVAL, persistent=True)
+
+def unregister():
+    if bpy.app.timers.is_registered(_poll):
+        bpy.app.timers.unregister(_poll)
+    if on_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(on_load_post)
+    if on_save_post in bpy.app.handlers.save_post:
+        bpy.app.handlers.save_post.remove(on_save_post)
+    
+    global _queue
+    if _queue is not None:
+        _queue.stop()
+        _queue = None
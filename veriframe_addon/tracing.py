@@ -0,0 +1,136 @@
+"""
+Stage timing for the VeriFrame addon
+
+Spans record how long each pipeline stage took (save, pack, hash, upload,
+contract call, ...) along with byte counts, so slow submissions can be
+attributed to a stage. Recent spans are kept in memory, shown in the debug
+panel and exportable as Chrome trace-event JSON (chrome://tracing, Perfetto).
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List
+
+from .config import MAX_TRACE_SPANS
+
+class Span:
+    """One timed stage"""
+    
+    __slots__ = ('name', 'category', 'start_ns', 'end_ns', 'thread_id', 'thread_name', 'args')
+    
+    def __init__(self, name: str, category: str, args: Dict[str, Any]):
+        self.name = name
+        self.category = category
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = None
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+        self.args = args
+    
+    @property
+    def duration(self) -> float:
+        """Duration in seconds (up to now if the span is still open)"""
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e9
+    
+    def set(self, **args):
+        """Attach extra values, e.g. a byte count known only at the end"""
+        self.args.update(args)
+    
+    @property
+    def throughput(self) -> Optional[float]:
+        """Bytes per second, when the span carries a byte count"""
+        size = self.args.get('bytes')
+        if not size or self.duration <= 0:
+            return None
+        return size / self.duration
+
+class Tracer:
+    """Collects spans from any thread into a bounded buffer"""
+    
+    def __init__(self, max_spans: int = MAX_TRACE_SPANS):
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._epoch_ns = time.perf_counter_ns()
+        self._listeners = []
+    
+    def add_listener(self, listener):
+        """Call listener(span) whenever a span finishes (e.g. to feed metrics)"""
+        self._listeners.append(listener)
+    
+    @contextmanager
+    def span(self, name: str, category: str = "veriframe", **args):
+        """Time the enclosed block; yields the span so callers can add args"""
+        current = Span(name, category, args)
+        try:
+            yield current
+        except BaseException as e:
+            current.args['error'] = type(e).__name__
+            raise
+        finally:
+            current.end_ns = time.perf_counter_ns()
+            # A non-2xx answer does not raise, but the call still failed
+            status_code = current.args.get('status_code')
+            if status_code is not None and not 200 <= status_code < 300:
+                current.args.setdefault('error', f"HTTP {status_code}")
+            if current.throughput is not None:
+                current.args['throughput_mb_s'] = round(current.throughput / (1024 * 1024), 2)
+            with self._lock:
+                self._spans.append(current)
+            for listener in self._listeners:
+                try:
+                    listener(current)
+                except Exception as e:
+                    print(f"Span listener error: {e}")
+    
+    def spans(self) -> List[Span]:
+        """Finished spans, oldest first"""
+        with self._lock:
+            return list(self._spans)
+    
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+    
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Render spans as Chrome trace-event JSON ('X' complete events, microseconds)"""
+        pid = os.getpid()
+        events = []
+        thread_names = {}
+        
+        for span in self.spans():
+            thread_names[span.thread_id] = span.thread_name
+            events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': (span.start_ns - self._epoch_ns) / 1000,
+                'dur': (span.end_ns - span.start_ns) / 1000,
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': span.args,
+            })
+        
+        for thread_id, thread_name in thread_names.items():
+            events.append({
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': pid,
+                'tid': thread_id,
+                'args': {'name': thread_name},
+            })
+        
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+    
+    def export_chrome_trace(self, path: str):
+        """Write the Chrome trace JSON to path"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+
+# Process-wide tracer shared by operators and managers
+tracer = Tracer()
@@ -0,0 +1,238 @@
+"""
+Nonce management and receipt tracking for VeriFrame transactions
+
+Waiting for each transaction's receipt before sending the next one would
+make a bulk submission pay a full block time per batch. Instead nonces are
+handed out locally, so transactions go out back to back, and one background
+thread per RPC endpoint polls for the receipts of everything in flight.
+Receipts are fetched as one batched JSON-RPC request per poll, with the poll
+interval backing off while nothing new lands.
+
+When a send fails, or a receipt comes back REJECTED, the nonce is synced
+from the chain again before the next transaction. The chain nonce does not
+count this run's transactions still in the mempool, so the larger of it and
+the local counter is used: an in-flight nonce is never handed out twice.
+
+Only a receipt says a transaction reverted or was rejected. A transaction
+without a receipt (RPC down, node slow to index it) is unconfirmed, not
+failed: it may still land, so it must not be sent again. Tracking its hash
+again later resumes polling.
+"""
+
+import time
+import threading
+from typing import Callable, Dict, List
+
+from . import metrics
+from . import resilience
+from .config import (
+    RECEIPT_POLL_INTERVAL,
+    RECEIPT_MAX_POLL_INTERVAL,
+    RECEIPT_TIMEOUT,
+    RECEIPT_BATCH_SIZE,
+)
+
+TXN_HASH_NOT_FOUND = 29  # JSON-RPC error code for a transaction the node has not seen (yet)
+
+class TransactionFailed(Exception):
+    """A transaction was reverted or rejected; its calls had no effect"""
+
+class TransactionUnconfirmed(Exception):
+    """No receipt within the timeout; the transaction may still land"""
+
+class NonceManager:
+    """Local nonce counter for one account, synced from the chain when needed"""
+    
+    def __init__(self, fetch: Callable[[], int]):
+        self._fetch = fetch
+        self._next = None
+        self._stale = True
+        self._lock = threading.Lock()
+    
+    def reserve(self) -> int:
+        """Next unused nonce; only the first call (or the first after resync) asks the chain"""
+        with self._lock:
+            if self._stale:
+                chain = int(self._fetch())
+                # Transactions of this run still in the mempool are ahead of the chain nonce
+                self._next = chain if self._next is None else max(chain, self._next)
+                self._stale = False
+            nonce = self._next
+            self._next += 1
+            return nonce
+    
+    def release(self, nonce: int):
+        """Hand back a nonce whose send failed, if nothing was reserved after it, so it leaves no gap"""
+        with self._lock:
+            if self._next is not None and nonce == self._next - 1:
+                self._next = nonce
+    
+    def resync(self):
+        """Have the next reserve() check the chain nonce again, e.g. after a rejected transaction"""
+        with self._lock:
+            self._stale = True
+
+class _Pending:
+    def __init__(self, tx_hash: str):
+        from concurrent.futures import Future
+        
+        self.tx_hash = tx_hash
+        self.future = Future()
+        self.sent_at = time.monotonic()
+
+class ReceiptTracker:
+    """Polls receipts of in-flight transactions on a background thread"""
+    
+    def __init__(self, rpc_url: str, poll_interval: float = RECEIPT_POLL_INTERVAL,
+                 max_interval: float = RECEIPT_MAX_POLL_INTERVAL, timeout: float = RECEIPT_TIMEOUT):
+        self.rpc_url = rpc_url
+        self.poll_interval = poll_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self._pending = {}
+        self._thread = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+    
+    def track(self, tx_hash: str) -> 'Future':
+        """Future for the receipt of tx_hash
+        
+        Resolves to the receipt dict once the transaction succeeded. Raises
+        TransactionFailed if it reverted or was rejected, and
+        TransactionUnconfirmed if no receipt arrived within the timeout.
+        """
+        with self._lock:
+            pending = self._pending.get(tx_hash)
+            if pending is None:
+                pending = self._pending[tx_hash] = _Pending(tx_hash)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="veriframe-receipts", daemon=True)
+                self._thread.start()
+        
+        # A new transaction resets the backoff
+        self._wake.set()
+        return pending.future
+    
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+    
+    def _run(self):
+        interval = self.poll_interval
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+                pending = list(self._pending.values())
+            
+            if self._wake.wait(interval):
+                self._wake.clear()
+                interval = self.poll_interval
+            
+            try:
+                landed = self._poll(pending)
+            except Exception as e:
+                # The RPC being down is no reason to give up on the transactions
+                print(f"Receipt polling error: {e}")
+                metrics.errors.labels(operation='starknet.receipts').inc()
+                landed = 0
+            
+            self._expire(pending)
+            interval = self.poll_interval if landed else min(interval * 2, self.max_interval)
+    
+    def _poll(self, pending: List[_Pending]) -> int:
+        """Ask for every pending receipt and settle the ones that are known; returns how many"""
+        settled = 0
+        for start in range(0, len(pending), RECEIPT_BATCH_SIZE):
+            batch = pending[start:start + RECEIPT_BATCH_SIZE]
+            responses = self._fetch_receipts([item.tx_hash for item in batch])
+            for index, item in enumerate(batch):
+                response = responses.get(index, {})
+                # An error (not found yet, or the node failing) says nothing about the transaction
+                if 'result' in response:
+                    self._settle(item, response['result'])
+                    settled += 1
+                elif response.get('error', {}).get('code') not in (None, TXN_HASH_NOT_FOUND):
+                    print(f"Receipt error for {item.tx_hash}: {response['error'].get('message', 'RPC error')}")
+        return settled
+    
+    def _expire(self, pending: List[_Pending]):
+        """Give up on receipts older than the timeout, whether or not the last poll got through"""
+        now = time.monotonic()
+        for item in pending:
+            if not item.future.done() and now - item.sent_at > self.timeout:
+                with self._lock:
+                    self._pending.pop(item.tx_hash, None)
+                item.future.set_exception(TransactionUnconfirmed(
+                    f"No receipt for {item.tx_hash} after {self.timeout:.0f}s; it may still land"
+                ))
+    
+    def _fetch_receipts(self, tx_hashes: List[str]) -> Dict[int, dict]:
+        """One batched starknet_getTransactionReceipt request; responses keyed by position"""
+        import requests
+        
+        payload = [
+            {"jsonrpc": "2.0", "id": index, "method": "starknet_getTransactionReceipt",
+             "params": {"transaction_hash": tx_hash}}
+            for index, tx_hash in enumerate(tx_hashes)
+        ]
+        
+        def send(timeout):
+            return requests.post(self.rpc_url, json=payload, timeout=timeout)
+        
+        response = resilience.call(send, self.rpc_url, timeout=10)
+        response.raise_for_status()
+        body = response.json()
+        # A node without batch support answers with a single error object
+        if not isinstance(body, list):
+            raise resilience.NetworkError(body.get('error', {}).get('message', "Unexpected receipt response"))
+        return {item.get('id'): item for item in body}
+    
+    def _settle(self, item: _Pending, receipt: dict):
+        if receipt.get('finality_status') == 'REJECTED':
+            # A rejected transaction never used its nonce
+            resync_nonces(self.rpc_url)
+        if receipt.get('execution_status') == 'REVERTED' or receipt.get('finality_status') == 'REJECTED':
+            self._fail(item, f"Transaction {item.tx_hash} reverted: {receipt.get('revert_reason', 'no reason given')}")
+            return
+        
+        with self._lock:
+            self._pending.pop(item.tx_hash, None)
+        item.future.set_result(receipt)
+    
+    def _fail(self, item: _Pending, message: str):
+        with self._lock:
+            self._pending.pop(item.tx_hash, None)
+        item.future.set_exception(TransactionFailed(message))
+
+_trackers = {}
+_nonces = {}
+_registry_lock = threading.Lock()
+
+def get_tracker(rpc_url: str) -> ReceiptTracker:
+    """Receipt tracker shared by every StarknetManager for one network"""
+    with _registry_lock:
+        tracker = _trackers.get(rpc_url)
+        if tracker is None:
+            tracker = _trackers[rpc_url] = ReceiptTracker(rpc_url)
+        return tracker
+
+def get_nonces(rpc_url: str, address: str, fetch: Callable[[], int]) -> NonceManager:
+    """Nonce manager shared by every StarknetManager for one account on one network"""
+    with _registry_lock:
+        nonces = _nonces.get((rpc_url, address))
+        if nonces is None:
+            nonces = _nonces[(rpc_url, address)] = NonceManager(fetch)
+        return nonces
+
+def resync_nonces(rpc_url: str):
+    """Resync the nonce of every account on one network"""
+    with _registry_lock:
+        managers = [nonces for (url, _), nonces in _nonces.items() if url == rpc_url]
+    for nonces in managers:
+        nonces.resync()
+
+def is_nonce_error(error: Exception) -> bool:
+    """Whether a rejected send was about the nonce, so a fresh nonce may get it through"""
+    return 'nonce' in str(error).lower()
@@ -4,124 +4,848 @@ Utility functions for VeriFrame addon
 
 import os
 import json
-import requests
-import tempfile
 import hashlib
-from typing import Optional, Dict, Any
+import time
+import uuid
+from array import array
+from collections import namedtuple
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+from .config import (
+    RENDER_ENGINE_IDS,
+    RENDER_FORMAT_IDS,
+    SIDECAR_VERSION,
+    DELTA_SIDECAR_VERSION,
+    UPLOAD_CHUNK_SIZE,
+    TERMINAL_JOB_STATUSES,
+    JOB_STATUS_TYPES,
+    JOB_STATUS_TRANSITIONS,
+    CAR_ACCEPT,
+    DEFAULT_IPFS_CHUNK_SIZE_KB,
+    PRESENCE_CHECK_WORKERS,
+    PRESENCE_CHECK_TIMEOUT,
+    PRIVATE_KEY_ENV,
+)
+from . import cid
+from . import contract_cache
+from . import metrics
+from . import multicall
+from . import resilience
+from . import transactions
+from .tracing import tracer
+
+class AddOptions(namedtuple('AddOptions', 'chunker raw_leaves cid_version hash_function pin trickle',
+                            defaults=(f"size-{DEFAULT_IPFS_CHUNK_SIZE_KB * 1024}", False, 0, 'sha2-256', True, False))):
+    """Parameters for `ipfs add`; the defaults are the node's own"""
+    
+    @classmethod
+    def from_preferences(cls, addon_prefs) -> 'AddOptions':
+        chunk_size = addon_prefs.ipfs_chunk_size_kb * 1024
+        if addon_prefs.ipfs_chunker == 'RABIN':
+            # Same min/max around the average as the node's plain "rabin"
+            chunker = f"rabin-{chunk_size // 3}-{chunk_size}-{chunk_size + chunk_size // 2}"
+        elif addon_prefs.ipfs_chunker == 'BUZHASH':
+            chunker = "buzhash"
+        else:
+            chunker = f"size-{chunk_size}"
+        
+        return cls(chunker, addon_prefs.ipfs_raw_leaves, int(addon_prefs.ipfs_cid_version),
+                   addon_prefs.ipfs_hash_function, addon_prefs.ipfs_pin, addon_prefs.ipfs_trickle)
+    
+    def params(self) -> Dict[str, str]:
+        """Query parameters for /api/v0/add"""
+        return {
+            'chunker': self.chunker,
+            'raw-leaves': str(self.raw_leaves).lower(),
+            'cid-version': str(self.cid_version),
+            'hash': self.hash_function,
+            'pin': str(self.pin).lower(),
+            'trickle': str(self.trickle).lower(),
+        }
+    
+    def builder_options(self) -> Optional[Dict[str, Any]]:
+        """cid.UnixFSFileBuilder arguments giving the CIDs the node would, or None
+        
+        Content-defined chunking, the trickle layout and hashes other than
+        sha2-256 can only be done by the node.
+        """
+        if self.trickle or self.hash_function != 'sha2-256' or not self.chunker.startswith("size-"):
+            return None
+        return {'cid_version': self.cid_version, 'chunk_size': int(self.chunker[5:]), 'raw_leaves': self.raw_leaves}
 
 class IPFSManager:
     """Handles IPFS operations"""
     
-    def __init__(self, api_url: str, gateway_url: str):
+    def __init__(self, api_url: str, gateway_url: str, add_options: Optional[AddOptions] = None):
         self.api_url = api_url.rstrip('/')
         self.gateway_url = gateway_url.rstrip('/')
+        self.add_options = add_options or AddOptions()
+        self.last_upload_sha256 = None
+        self.last_download_sha256 = None
     
-    def upload_file(self, file_path: str) -> Optional[str]:
-        """Upload a file to IPFS and return the hash"""
+    def is_available(self) -> bool:
+        """False while the IPFS API is failing and calls are being short-circuited"""
+        return resilience.is_available(self.api_url)
+    
+    def upload_file(self, file_path: str, max_bytes_per_second: int = 0, deadline=None,
+                    skip_present: bool = False) -> Optional[str]:
+        """Upload a file to IPFS and return the hash
+        
+        The file is streamed in chunks rather than read into memory, and hashed
+        on the way (see last_upload_sha256). A non-zero max_bytes_per_second
+        throttles the transfer. The node chunks and hashes it as add_options
+        say. Adding content is idempotent, so transient failures are retried.
+        
+        With skip_present, the CID is computed locally first (see expected_cid)
+        and nothing is sent if the node already holds the whole file.
+        """
+        import requests
+        
+        if skip_present:
+            expected = self.expected_cid(file_path)
+            if expected and self.has_dag(expected, deadline):
+                print(f"IPFS already has {os.path.basename(file_path)} ({expected}), not uploading")
+                return expected
+        
+        def post(timeout):
+            # Fresh body and hasher per attempt so retries start from the beginning
+            hasher = hashlib.sha256()
+            boundary = uuid.uuid4().hex
+            response = requests.post(
+                f"{self.api_url}/api/v0/add",
+                params=self.add_options.params(),
+                data=_stream_multipart(file_path, boundary, max_bytes_per_second, hasher),
+                headers={'Content-Type': f"multipart/form-data; boundary={boundary}"},
+                timeout=timeout
+            )
+            self.last_upload_sha256 = hasher.hexdigest()
+            return response
+        
         try:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                response = requests.post(
-                    f"{self.api_url}/api/v0/add",
-                    files=files,
-                    timeout=30
-                )
+            with tracer.span("ipfs.upload_file", "ipfs", file=os.path.basename(file_path),
+                             bytes=os.path.getsize(file_path), direction='upload') as span:
+                response = resilience.call(post, self.api_url, deadline=deadline)
+                span.set(status_code=response.status_code)
             
             if response.status_code == 200:
                 result = response.json()
                 return result['Hash']
             else:
                 print(f"IPFS upload failed: {response.text}")
+                metrics.errors.labels(operation='ipfs.upload').inc()
                 return None
-                
+        
         except Exception as e:
             print(f"IPFS upload error: {e}")
+            metrics.errors.labels(operation='ipfs.upload').inc()
             return None
     
-    def download_file(self, ipfs_hash: str, output_path: str) -> bool:
-        """Download a file from IPFS"""
+    def upload_json(self, data: Dict[str, Any], filename: str = "job.json", deadline=None) -> Optional[str]:
+        """Upload a small JSON document to IPFS and return the hash"""
+        import requests
+        
         try:
-            url = f"{self.gateway_url}/ipfs/{ipfs_hash}"
-            response = requests.get(url, timeout=60)
+            payload = canonical_json(data)
+            with tracer.span("ipfs.upload_json", "ipfs", file=filename, bytes=len(payload), direction='upload') as span:
+                response = resilience.call(
+                    lambda timeout: requests.post(
+                        f"{self.api_url}/api/v0/add",
+                        params=self.add_options.params(),
+                        files={'file': (filename, payload, 'application/json')},
+                        timeout=timeout
+                    ),
+                    self.api_url, deadline=deadline
+                )
+                span.set(status_code=response.status_code)
+            
+            if response.status_code == 200:
+                return response.json()['Hash']
+            else:
+                print(f"IPFS upload failed: {response.text}")
+                metrics.errors.labels(operation='ipfs.upload').inc()
+                return None
+        
+        except Exception as e:
+            print(f"IPFS upload error: {e}")
+            metrics.errors.labels(operation='ipfs.upload').inc()
+            return None
+    
+    def download_file(self, ipfs_hash: str, output_path: str, deadline=None, verify: bool = False) -> bool:
+        """Download a file from IPFS
+        
+        ipfs_hash may be a path inside a directory (CID/sub/file). The body is
+        streamed to a temporary file next to output_path, which is renamed once
+        complete, so an interrupted download never leaves a truncated file. It
+        is hashed on the way (see last_download_sha256).
+        
+        With verify, ipfs_hash must be a plain CID. The gateway is asked for a
+        CAR, whose blocks are checked against the CID as they arrive; a plain
+        byte response is checked by hashing it the way `ipfs add` would. A
+        response that does not match is rejected without retrying.
+        """
+        sinks = []
+        
+        def open_sink():
+            sinks.append(PartialFile(output_path))
+            return sinks[-1]
+        
+        if not self.download_stream(ipfs_hash, open_sink, deadline, verify):
+            return False
+        self.last_download_sha256 = sinks[-1].sha256
+        return True
+    
+    def download_stream(self, ipfs_hash: str, open_sink, deadline=None, verify: bool = False) -> bool:
+        """Stream a file from IPFS into a sink, e.g. to process it while it downloads
+        
+        open_sink() is called for every attempt and returns a file-like object
+        with write(), close() and discard(); it is closed once the whole file
+        has arrived (and verified, see download_file), or discarded if the
+        attempt fails. Errors raised by the sink fail the download.
+        """
+        import requests
+        
+        url = f"{self.gateway_url}/ipfs/{ipfs_hash}"
+        headers = {'Accept': CAR_ACCEPT} if verify else {}
+        written = 0
+        
+        def fetch(timeout):
+            nonlocal written
+            # Each attempt starts the sink again
+            written = 0
+            response = requests.get(url, headers=headers, stream=True, timeout=timeout)
+            if response.status_code != 200:
+                return response
+            
+            sink = open_sink()
+            
+            def write(data):
+                nonlocal written
+                sink.write(data)
+                written += len(data)
+            
+            try:
+                verifier = self._verifier(ipfs_hash, response, write) if verify else None
+                for chunk in response.iter_content(UPLOAD_CHUNK_SIZE):
+                    if verifier is None:
+                        write(chunk)
+                    else:
+                        verifier.update(chunk)
+                if verifier is not None:
+                    verifier.finish()
+                sink.close()
+            except BaseException:
+                sink.discard()
+                raise
+            return response
+        
+        try:
+            with tracer.span("ipfs.download_file", "ipfs", cid=ipfs_hash, direction='download') as span:
+                response = resilience.call(fetch, self.gateway_url, timeout=60, deadline=deadline)
+                span.set(status_code=response.status_code, bytes=written)
             
             if response.status_code == 200:
-                with open(output_path, 'wb') as f:
-                    f.write(response.content)
                 return True
             else:
                 print(f"IPFS download failed: {response.status_code}")
+                metrics.errors.labels(operation='ipfs.download').inc()
                 return False
+        
+        except Exception as e:
+            if isinstance(e, cid.VerificationError):
+                print(f"IPFS download of {ipfs_hash} rejected: {e}")
+                metrics.errors.labels(operation='ipfs.verify').inc()
+            else:
+                print(f"IPFS download error: {e}")
+                metrics.errors.labels(operation='ipfs.download').inc()
+            return False
+    
+    @staticmethod
+    def _verifier(ipfs_hash: str, response, write):
+        """Verifier for a download response, writing verified file bytes through write"""
+        try:
+            expected = cid.CID.decode(ipfs_hash)
+        except ValueError as e:
+            raise cid.VerificationError(str(e))
+        
+        if response.headers.get('Content-Type', "").startswith("application/vnd.ipld.car"):
+            return cid.CarVerifier(expected, write)
+        
+        # A gateway without CAR support sent the file itself
+        return cid.StreamVerifier(expected, write)
+    
+    def expected_cid(self, file_path: str) -> Optional[str]:
+        """CID an add of file_path will get, computed without the node
+        
+        None when add_options use settings only the node can apply (see
+        AddOptions.builder_options).
+        """
+        options = self.add_options.builder_options()
+        if options is None:
+            return None
+        
+        builder = cid.UnixFSFileBuilder(**options)
+        with tracer.span("cid.precompute", "ipfs", file=os.path.basename(file_path), bytes=os.path.getsize(file_path)):
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+                    builder.update(chunk)
+            return str(builder.finish())
+    
+    def has_dag(self, block_cid: str, deadline=None) -> bool:
+        """Whether the node holds the whole DAG under block_cid, because it is pinned recursively or under such a pin"""
+        import requests
+        
+        def pin_type(timeout):
+            response = requests.post(f"{self.api_url}/api/v0/pin/ls", params={'arg': block_cid, 'type': 'all'},
+                                     timeout=timeout)
+            # The node answers 500 for CIDs that are not pinned
+            if response.status_code != 200:
+                return None
+            return next(iter(response.json().get('Keys', {}).values()), {}).get('Type')
+        
+        try:
+            found = resilience.call(pin_type, self.api_url, timeout=PRESENCE_CHECK_TIMEOUT, deadline=deadline)
+        except Exception as e:
+            print(f"IPFS pin check error: {e}")
+            return False
+        return found in ('recursive', 'indirect')
+    
+    def has_block(self, block_cid: str, deadline=None) -> bool:
+        """Whether the node has a block in its own store, without looking for it on the network"""
+        import requests
+        
+        try:
+            return resilience.call(
+                lambda timeout: requests.post(
+                    f"{self.api_url}/api/v0/block/stat", params={'arg': block_cid, 'offline': 'true'}, timeout=timeout
+                ).status_code == 200,
+                self.api_url, timeout=PRESENCE_CHECK_TIMEOUT, deadline=deadline
+            )
+        except Exception as e:
+            print(f"IPFS block check error: {e}")
+            return False
+    
+    def mark_present_blocks(self, package, deadline=None) -> int:
+        """Leave the blocks of a car.JobPackage the node already has out of its CAR
+        
+        A package or file whose DAG is pinned is settled with one call; other
+        files are checked block by block, in parallel. Returns the number of
+        blocks found.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        with tracer.span("ipfs.presence", "ipfs", cid=package.root) as span:
+            if self.has_dag(package.root, deadline):
+                present = {block_cid.key for block_cid in package.block_cids()}
+            else:
+                present = set()
+                unknown = {}
+                for file_cid, block_cids in package.files():
+                    if self.has_dag(str(file_cid), deadline):
+                        present.update(block_cid.key for block_cid in block_cids)
+                for block_cid in package.block_cids():
+                    if block_cid.key not in present:
+                        unknown.setdefault(block_cid.key, block_cid)
                 
+                with ThreadPoolExecutor(PRESENCE_CHECK_WORKERS, thread_name_prefix="veriframe-presence") as pool:
+                    found = pool.map(lambda block_cid: self.has_block(str(block_cid), deadline), unknown.values())
+                    present.update(key for key, has in zip(list(unknown), found) if has)
+            
+            package.mark_present(present)
+            span.set(present=len(present), missing=package.missing_blocks, bytes=package.car_size)
+        return len(present)
+    
+    def import_car(self, package, deadline=None) -> Optional[str]:
+        """Upload a car.JobPackage with one dag/import call and return its root CID
+        
+        The CAR is streamed as it is built and its root is pinned unless
+        add_options turn pinning off. Importing blocks is idempotent, so
+        transient failures are retried. Blocks marked present are not sent,
+        and with nothing to send or pin no call is made.
+        """
+        import requests
+        
+        if not package.missing_blocks and not self.add_options.pin:
+            return package.root
+        
+        def post(timeout):
+            boundary = uuid.uuid4().hex
+            return requests.post(
+                f"{self.api_url}/api/v0/dag/import",
+                params={'pin-roots': str(self.add_options.pin).lower()},
+                data=_multipart(package.iter_car(), "job.car", boundary),
+                headers={'Content-Type': f"multipart/form-data; boundary={boundary}"},
+                timeout=timeout
+            )
+        
+        try:
+            root = package.root
+            with tracer.span("ipfs.dag_import", "ipfs", cid=root, bytes=package.car_size, direction='upload') as span:
+                response = resilience.call(post, self.api_url, deadline=deadline)
+                span.set(status_code=response.status_code)
+            
+            if response.status_code != 200:
+                print(f"IPFS DAG import failed: {response.text}")
+                metrics.errors.labels(operation='ipfs.dag_import').inc()
+                return None
+            
+            # One JSON object per line: pinned roots are reported as {"Root": {"Cid": {"/": ...}}},
+            # failures part way through as {"Message": ..., "Type": "error"}
+            reported = False
+            for line in response.text.splitlines():
+                message = json.loads(line) if line.strip() else {}
+                if message.get('Type') == 'error':
+                    print(f"IPFS DAG import failed: {message.get('Message', line)}")
+                    metrics.errors.labels(operation='ipfs.dag_import').inc()
+                    return None
+                imported = message.get('Root')
+                if not imported:
+                    continue
+                if imported.get('PinErrorMsg'):
+                    print(f"IPFS DAG import could not pin {root}: {imported['PinErrorMsg']}")
+                    metrics.errors.labels(operation='ipfs.dag_import').inc()
+                    return None
+                if cid.CID.decode(imported['Cid']['/']).key == cid.CID.decode(root).key:
+                    reported = True
+            
+            # The node only reports roots it pins: without pinning, a clean response is the confirmation
+            if reported or not self.add_options.pin:
+                return root
+            
+            print(f"IPFS DAG import did not report root {root}")
+            metrics.errors.labels(operation='ipfs.dag_import').inc()
+            return None
+        
+        except Exception as e:
+            print(f"IPFS DAG import error: {e}")
+            metrics.errors.labels(operation='ipfs.dag_import').inc()
+            return None
+    
+    def download_car(self, ipfs_hash: str, open_file, deadline=None) -> bool:
+        """Fetch a whole DAG as one CAR export, verifying and unpacking it as it streams
+        
+        open_file(path, cid) is called for every file as it starts (see
+        cid.CarVerifier). Returns False if the gateway cannot export CARs or
+        the response does not match ipfs_hash.
+        """
+        import requests
+        
+        def fetch(timeout):
+            response = requests.get(f"{self.gateway_url}/ipfs/{ipfs_hash}", headers={'Accept': CAR_ACCEPT},
+                                    stream=True, timeout=timeout)
+            if response.status_code == 200 and response.headers.get('Content-Type', "").startswith("application/vnd.ipld.car"):
+                verifier = cid.CarVerifier(cid.CID.decode(ipfs_hash), open_file=open_file)
+                for chunk in response.iter_content(UPLOAD_CHUNK_SIZE):
+                    verifier.update(chunk)
+                verifier.finish()
+            return response
+        
+        try:
+            with tracer.span("ipfs.download_car", "ipfs", cid=ipfs_hash, direction='download') as span:
+                response = resilience.call(fetch, self.gateway_url, timeout=60, deadline=deadline)
+                span.set(status_code=response.status_code)
+            
+            if response.status_code != 200:
+                print(f"IPFS CAR download failed: {response.status_code}")
+                metrics.errors.labels(operation='ipfs.download').inc()
+                return False
+            if not response.headers.get('Content-Type', "").startswith("application/vnd.ipld.car"):
+                print("IPFS gateway does not export CARs")
+                return False
+            return True
+        
         except Exception as e:
-            print(f"IPFS download error: {e}")
+            if isinstance(e, cid.VerificationError):
+                print(f"IPFS CAR download of {ipfs_hash} rejected: {e}")
+                metrics.errors.labels(operation='ipfs.verify').inc()
+            else:
+                print(f"IPFS CAR download error: {e}")
+                metrics.errors.labels(operation='ipfs.download').inc()
             return False
     
-    def get_file_info(self, ipfs_hash: str) -> Optional[Dict[str, Any]]:
+    def list_directory(self, ipfs_hash: str, deadline=None) -> Optional[List[Dict[str, Any]]]:
+        """List the links of a directory as dicts with Name, Hash, Size and Type (1 = directory)
+        
+        A plain file has no links, so it lists as empty. Returns None on failure.
+        """
+        import requests
+        
+        try:
+            with tracer.span("ipfs.ls", "ipfs", cid=ipfs_hash):
+                response = resilience.call(
+                    lambda timeout: requests.post(
+                        f"{self.api_url}/api/v0/ls",
+                        params={'arg': ipfs_hash, 'resolve-type': 'true', 'size': 'true'},
+                        timeout=timeout
+                    ),
+                    self.api_url, timeout=30, deadline=deadline
+                )
+            
+            if response.status_code == 200:
+                objects = response.json().get('Objects') or [{}]
+                return objects[0].get('Links') or []
+            else:
+                print(f"IPFS ls failed: {response.text}")
+                metrics.errors.labels(operation='ipfs.ls').inc()
+                return None
+        
+        except Exception as e:
+            print(f"IPFS ls error: {e}")
+            metrics.errors.labels(operation='ipfs.ls').inc()
+            return None
+    
+    def get_file_info(self, ipfs_hash: str, deadline=None) -> Optional[Dict[str, Any]]:
         """Get information about a file on IPFS"""
+        import requests
+        
         try:
-            response = requests.post(
-                f"{self.api_url}/api/v0/object/stat",
-                params={'arg': ipfs_hash},
-                timeout=10
-            )
+            with tracer.span("ipfs.object_stat", "ipfs", cid=ipfs_hash):
+                response = resilience.call(
+                    lambda timeout: requests.post(
+                        f"{self.api_url}/api/v0/object/stat",
+                        params={'arg': ipfs_hash},
+                        timeout=timeout
+                    ),
+                    self.api_url, timeout=10, deadline=deadline
+                )
             
             if response.status_code == 200:
                 return response.json()
             else:
                 return None
-                
+        
         except Exception as e:
             print(f"IPFS info error: {e}")
+            metrics.errors.labels(operation='ipfs.info').inc()
             return None
 
+class PartialFile:
+    """Download target written beside path and renamed into place once complete"""
+    
+    def __init__(self, path: str, partial_path: Optional[str] = None):
+        self.path = path
+        self.partial_path = partial_path or path + ".part"
+        self.sha256 = None
+        self._hasher = hashlib.sha256()
+        self._file = open(self.partial_path, 'wb')
+    
+    def write(self, data):
+        self._file.write(data)
+        self._hasher.update(data)
+    
+    def close(self):
+        self._file.close()
+        os.replace(self.partial_path, self.path)
+        self.sha256 = self._hasher.hexdigest()
+    
+    def discard(self):
+        self._file.close()
+        if os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+
+def _multipart(chunks, filename: str, boundary: str):
+    """Wrap a stream of file chunks in a single-file multipart/form-data body"""
+    yield (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode('utf-8')
+    yield from chunks
+    yield f"\r\n--{boundary}--\r\n".encode('utf-8')
+
+def _stream_multipart(file_path: str, boundary: str, max_bytes_per_second: int = 0, hasher=None):
+    """Yield a multipart/form-data body for one file, chunk by chunk"""
+    def read():
+        start = time.monotonic()
+        sent = 0
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+                if hasher is not None:
+                    hasher.update(chunk)
+                yield chunk
+                sent += len(chunk)
+                
+                if max_bytes_per_second > 0:
+                    # Sleep until the average rate is back under the cap
+                    ahead = sent / max_bytes_per_second - (time.monotonic() - start)
+                    if ahead > 0:
+                        time.sleep(ahead)
+    
+    return _multipart(read(), os.path.basename(file_path), boundary)
+
+# JobSubmission states
+SUBMITTED = 'SUBMITTED'  # on chain with a known job ID
+UNCONFIRMED = 'UNCONFIRMED'  # sent, but no receipt yet: may still land
+NOT_SUBMITTED = 'NOT_SUBMITTED'  # never sent, or reverted: safe to send again
+
+class JobSubmission(namedtuple('JobSubmission', 'state job_id tx_hash', defaults=(NOT_SUBMITTED, None, None))):
+    """Outcome of submitting one job: its state, job ID and the hash of the transaction that carried it"""
+
 class StarknetManager:
     """Handles Starknet contract interactions"""
     
     def __init__(self, rpc_url: str, contract_address: str):
         self.rpc_url = rpc_url
         self.contract_address = contract_address
+        self.cache = contract_cache.get_cache(rpc_url, contract_address)
+        self._accounts = {}
     
-    def submit_job(self, ipfs_hash: str, reward_amount: float, deadline_hours: int, wallet_address: str) -> Optional[str]:
+    def is_available(self) -> bool:
+        """False while the RPC endpoint is failing and calls are being short-circuited"""
+        return resilience.is_available(self.rpc_url)
+    
+    def submit_job(self, ipfs_hash: str, reward_amount: float, deadline_hours: int, wallet_address: str, deadline=None) -> Optional[JobSubmission]:
         """Submit a job to the VeriFrame contract"""
-        # In a real implementation, this would:
-        # 1. Use starknet.py to connect to the network
-        # 2. Create a contract instance
-        # 3. Call the submit_job function with proper parameters
-        # 4. Handle transaction signing and submission
-        # 5. Return the transaction hash or job ID
-        
-        # For now, we'll simulate this
-        import uuid
-        job_id = str(uuid.uuid4())[:8]
-        print(f"Simulated job submission: {job_id}")
-        return job_id
+        submissions = self.submit_jobs([(ipfs_hash, reward_amount, deadline_hours)], wallet_address, deadline)
+        return submissions[0] if submissions else None
+    
+    def submit_jobs(self, jobs: List[Tuple[str, float, int]], wallet_address: str, deadline=None,
+                    on_sent: Optional[Callable[[List[int], str], None]] = None) -> Optional[List[JobSubmission]]:
+        """Submit (ipfs_hash, reward_amount, deadline_hours) jobs as multicall transactions
+        
+        The submit_job calls are packed into as few account multicalls as the
+        calldata limits allow, so each batch succeeds or fails as a whole.
+        Every batch is sent back to back with locally managed nonces before
+        any receipt is awaited; on_sent(job indices, tx_hash) is called after
+        each send, e.g. to record the hash before waiting. Returns one
+        JobSubmission per job, in order, or None if the calls could not be
+        encoded.
+        
+        A job is only NOT_SUBMITTED if its transaction was never sent or
+        reverted. One that was sent but has no receipt is UNCONFIRMED and must
+        be resolved with confirm_jobs, never sent again.
+        """
+        try:
+            calls = [multicall.submit_job_call(self.contract_address, *job) for job in jobs]
+            batches = multicall.chunk_calls(calls)
+        except (multicall.MulticallError, ValueError) as e:
+            print(f"Contract submit error: {e}")
+            metrics.errors.labels(operation='starknet.submit_jobs').inc()
+            return None
+        
+        submissions = [JobSubmission()] * len(jobs)
+        account = self._account(wallet_address)
+        if account is None:
+            for batch in batches:
+                try:
+                    with tracer.span("starknet.submit_jobs", "starknet", jobs=len(batch)) as span:
+                        batch_ids = self._simulate([calls[index] for index in batch], deadline)
+                        span.set(job_ids=batch_ids)
+                except Exception as e:
+                    print(f"Contract submit error: {e}")
+                    metrics.errors.labels(operation='starknet.submit_jobs').inc()
+                    break
+                for index, job_id in zip(batch, batch_ids):
+                    submissions[index] = JobSubmission(SUBMITTED, job_id)
+            return submissions
+        
+        # A batch that cannot be sent stops the rest, so no nonce is left with a gap behind it
+        tracker = transactions.get_tracker(self.rpc_url)
+        in_flight = []
+        for batch in batches:
+            try:
+                with tracer.span("starknet.send", "starknet", jobs=len(batch)) as span:
+                    tx_hash = self._send(account, wallet_address, [calls[index] for index in batch])
+                    span.set(tx_hash=tx_hash)
+            except Exception as e:
+                print(f"Contract submit error after sending {len(in_flight)} of {len(batches)} transactions: {e}")
+                metrics.errors.labels(operation='starknet.submit_jobs').inc()
+                break
+            
+            for index in batch:
+                submissions[index] = JobSubmission(UNCONFIRMED, None, tx_hash)
+            if on_sent is not None:
+                on_sent(batch, tx_hash)
+            in_flight.append((batch, tx_hash, tracker.track(tx_hash)))
+        
+        # Sent transactions may still land, so receipts are awaited past the deadline
+        # (the tracker gives up after RECEIPT_TIMEOUT) rather than reported as failed
+        for batch, tx_hash, receipt in in_flight:
+            try:
+                with tracer.span("starknet.receipt", "starknet", jobs=len(batch), tx_hash=tx_hash):
+                    batch_ids = self._job_ids(receipt.result(), len(batch))
+            except transactions.TransactionFailed as e:
+                print(f"Contract submit error: {e}")
+                metrics.errors.labels(operation='starknet.submit_jobs').inc()
+                for index in batch:
+                    submissions[index] = JobSubmission()
+                continue
+            except Exception as e:
+                # Left UNCONFIRMED with its hash: resending could post the jobs twice
+                print(f"Transaction {tx_hash} is unconfirmed: {e}")
+                metrics.errors.labels(operation='starknet.receipt').inc()
+                continue
+            for index, job_id in zip(batch, batch_ids):
+                submissions[index] = JobSubmission(SUBMITTED, job_id, tx_hash)
+        
+        return submissions
+    
+    def confirm_jobs(self, tx_hash: str, count: int, timeout: Optional[float] = None) -> List[str]:
+        """Job IDs created by a sent transaction of count submit_job calls
+        
+        Polls the receipt again, waiting at most timeout seconds (up to
+        RECEIPT_TIMEOUT by default). Raises transactions.TransactionFailed if
+        the transaction reverted, so its jobs may be sent again, and
+        transactions.TransactionUnconfirmed while there is no answer yet.
+        """
+        from concurrent.futures import TimeoutError as FutureTimeoutError
+        
+        receipt = transactions.get_tracker(self.rpc_url).track(tx_hash)
+        try:
+            with tracer.span("starknet.receipt", "starknet", jobs=count, tx_hash=tx_hash):
+                return self._job_ids(receipt.result(timeout), count)
+        except FutureTimeoutError:
+            raise transactions.TransactionUnconfirmed(f"No receipt for {tx_hash} yet")
+    
+    def _job_ids(self, receipt: dict, count: int) -> List[str]:
+        try:
+            return multicall.job_ids_from_events(receipt.get('events', []), self.contract_address, count)
+        except (multicall.MulticallError, ValueError) as e:
+            # The jobs are on chain; only their IDs could not be read
+            raise transactions.TransactionUnconfirmed(str(e))
+    
+    def _simulate(self, calls: List['multicall.Call'], deadline=None) -> List[str]:
+        """Stand-in for sending calls while starknet-py or a signing key is missing"""
+        def simulate(timeout):
+            return [str(uuid.uuid4())[:8] for _ in calls]
+        
+        # Submitting is not idempotent: only retried if the request never left
+        job_ids = resilience.call(simulate, self.rpc_url, idempotent=False, deadline=deadline)
+        print(f"Simulated submission of {len(calls)} job(s) in one transaction "
+              f"({len(multicall.execute_calldata(calls))} felts of calldata): {', '.join(job_ids)}")
+        return job_ids
+    
+    def _send(self, account, wallet_address: str, calls: List['multicall.Call']) -> str:
+        """Sign and send calls as one multicall with a locally reserved nonce; returns the transaction hash"""
+        from starknet_py.net.client_models import Call
+        
+        calls = [Call(to_addr=call.to, selector=call.selector, calldata=call.calldata) for call in calls]
+        nonces = transactions.get_nonces(self.rpc_url, wallet_address, account.get_nonce_sync)
+        for attempt in range(2):
+            nonce = nonces.reserve()
+            try:
+                result = account.execute_v3_sync(calls=calls, nonce=nonce, auto_estimate=True)
+                return hex(result.transaction_hash)
+            except Exception as e:
+                # The local nonce may no longer match the chain: check it again
+                nonces.release(nonce)
+                nonces.resync()
+                if attempt or not transactions.is_nonce_error(e):
+                    raise
+    
+    def _account(self, wallet_address: str):
+        """starknet-py account for wallet_address, or None to simulate"""
+        private_key = os.environ.get(PRIVATE_KEY_ENV)
+        if not private_key or not wallet_address:
+            return None
+        
+        if wallet_address not in self._accounts:
+            try:
+                from starknet_py.net.account.account import Account
+                from starknet_py.net.full_node_client import FullNodeClient
+                from starknet_py.net.signer.stark_curve_signer import KeyPair
+            except ImportError:
+                print(f"{PRIVATE_KEY_ENV} is set but starknet-py is not installed; submissions are simulated")
+                return None
+            
+            client = FullNodeClient(node_url=self.rpc_url)
+            self._accounts[wallet_address] = Account(
+                client=client,
+                address=wallet_address,
+                key_pair=KeyPair.from_private_key(int(private_key, 16)),
+                chain=int(client.get_chain_id_sync(), 16),
+            )
+        return self._accounts[wallet_address]
+    
+    def get_block_number(self, deadline=None) -> Optional[int]:
+        """Number of the latest block"""
+        # In a real implementation, this would call starknet_blockNumber
+        # For simulation, a new block every six seconds
+        def query(timeout):
+            return int(time.time() // 6)
+        
+        try:
+            with tracer.span("starknet.block_number", "starknet"):
+                return resilience.call(query, self.rpc_url, timeout=10, deadline=deadline)
+        except resilience.NetworkError as e:
+            print(f"Block number error: {e}")
+            metrics.errors.labels(operation='starknet.block_number').inc()
+            return None
+    
+    def get_job_status(self, job_id: str, deadline=None) -> Optional[str]:
+        """Get the status of a job from the contract
+        
+        Terminal statuses are cached for the session; others are reused until
+        the next block or the cache TTL.
+        """
+        return self.cache.get(
+            ('status', job_id),
+            lambda: self._query_job_status(job_id, deadline),
+            lambda status: status in TERMINAL_JOB_STATUSES,
+            lambda: self.get_block_number(deadline),
+        )
     
-    def get_job_status(self, job_id: str) -> str:
-        """Get the status of a job from the contract"""
+    def _query_job_status(self, job_id: str, deadline=None) -> Optional[str]:
         # In a real implementation, this would query the contract
         # For simulation, we'll return random status
         import random
-        statuses = ['PENDING', 'IN_PROGRESS', 'COMPLETED', 'FAILED']
-        return random.choice(statuses)
+        
+        def query(timeout):
+            statuses = ['PENDING', 'IN_PROGRESS', 'COMPLETED', 'FAILED']
+            return random.choice(statuses)
+        
+        try:
+            with tracer.span("starknet.get_job_status", "starknet", job_id=job_id):
+                return resilience.call(query, self.rpc_url, timeout=10, deadline=deadline)
+        except resilience.NetworkError as e:
+            print(f"Job status error: {e}")
+            metrics.errors.labels(operation='starknet.get_job_status').inc()
+            return None
+    
+    def get_job_result(self, job_id: str, deadline=None) -> Optional[str]:
+        """Get the result IPFS hash for a completed job (cached once known)"""
+        return self.cache.get(('result', job_id), lambda: self._query_job_result(job_id, deadline), bool)
     
-    def get_job_result(self, job_id: str) -> Optional[str]:
-        """Get the result IPFS hash for a completed job"""
+    def _query_job_result(self, job_id: str, deadline=None) -> Optional[str]:
         # In a real implementation, this would query the contract
         # For simulation, return a mock hash
-        return "QmExampleResultHash123456789"
+        def query(timeout):
+            return "QmExampleResultHash123456789"
+        
+        try:
+            with tracer.span("starknet.get_job_result", "starknet", job_id=job_id):
+                return resilience.call(query, self.rpc_url, timeout=10, deadline=deadline)
+        except resilience.NetworkError as e:
+            print(f"Job result error: {e}")
+            metrics.errors.labels(operation='starknet.get_job_result').inc()
+            return None
     
-    def cancel_job(self, job_id: str, wallet_address: str) -> bool:
+    def cancel_job(self, job_id: str, wallet_address: str, deadline=None) -> bool:
         """Cancel a pending job"""
         # In a real implementation, this would call the contract
-        print(f"Simulated job cancellation: {job_id}")
-        return True
+        def send(timeout):
+            print(f"Simulated job cancellation: {job_id}")
+            return True
+        
+        try:
+            with tracer.span("starknet.cancel_job", "starknet", job_id=job_id):
+                cancelled = resilience.call(send, self.rpc_url, idempotent=False, deadline=deadline)
+            self.cache.invalidate(('status', job_id))
+            return cancelled
+        except resilience.NetworkError as e:
+            print(f"Job cancel error: {e}")
+            metrics.errors.labels(operation='starknet.cancel_job').inc()
+            return False
 
 class BlenderJobManager:
     """Manages Blender-specific job operations"""
     
     @staticmethod
     def prepare_blend_file(output_path: str, render_settings: Dict[str, Any]) -> bool:
-        """Prepare the current blend file for remote rendering"""
+        """Prepare the current blend file for remote rendering by saving a full packed copy
+        
+        Kept as a fallback for export_blend_file(); this path modifies the open file.
+        """
         try:
             import bpy
             
@@ -130,27 +854,133 @@ class BlenderJobManager:
             original_format = bpy.context.scene.render.image_settings.file_format
             
             # Apply job-specific settings
-            if 'engine' in render_settings:
-                bpy.context.scene.render.engine = render_settings['engine']
-            
-            if 'format' in render_settings:
-                bpy.context.scene.render.image_settings.file_format = render_settings['format']
+            BlenderJobManager.apply_render_overrides(bpy.context.scene, render_settings)
             
             # Pack external data
-            bpy.ops.file.pack_all()
+            with tracer.span("pack_all", "blender"):
+                bpy.ops.file.pack_all()
             
             # Save the prepared file
-            bpy.ops.wm.save_as_mainfile(filepath=output_path, copy=True)
+            with tracer.span("save_as_mainfile", "blender") as span:
+                bpy.ops.wm.save_as_mainfile(filepath=output_path, copy=True)
+                span.set(bytes=os.path.getsize(output_path))
             
             # Restore original settings
             bpy.context.scene.render.engine = original_engine
             bpy.context.scene.render.image_settings.file_format = original_format
             
             return True
-            
+        
         except Exception as e:
             print(f"Error preparing blend file: {e}")
+            metrics.errors.labels(operation='prepare_blend').inc()
+            return False
+    
+    @staticmethod
+    def export_blend_file(output_path: str, render_settings: Dict[str, Any], scene=None, scenes=None) -> bool:
+        """Write only the scene (or scenes) and dependencies, leaving the open file untouched
+        
+        Data shared between several scenes is written once.
+        """
+        staging_path = output_path + ".staging"
+        try:
+            import bpy
+            
+            scenes = list(scenes) if scenes else [scene or bpy.context.scene]
+            scene_names = [scene.name for scene in scenes]
+            
+            # Write the live scenes (including unsaved edits) and everything they reference
+            with tracer.span("libraries.write", "blender", scene=", ".join(scene_names)) as span:
+                bpy.data.libraries.write(staging_path, set(scenes), path_remap='ABSOLUTE', fake_user=True)
+                span.set(bytes=os.path.getsize(staging_path))
+            
+            # Overrides and packing are applied to a throwaway copy, never to the session
+            with bpy.data.temp_data() as temp_data:
+                with tracer.span("temp_data.load", "blender"):
+                    with temp_data.libraries.load(staging_path, link=False) as (data_from, data_to):
+                        data_to.scenes = scene_names
+                
+                scene_copies = data_to.scenes
+                for scene_copy in scene_copies:
+                    BlenderJobManager.apply_render_overrides(scene_copy, render_settings)
+                
+                with tracer.span("pack", "blender"):
+                    for datablocks in (temp_data.images, temp_data.sounds, temp_data.fonts):
+                        for datablock in datablocks:
+                            if datablock.filepath in ('', '<builtin>') or datablock.packed_file:
+                                continue
+                            if getattr(datablock, 'source', 'FILE') == 'FILE':
+                                try:
+                                    datablock.pack()
+                                except RuntimeError as e:
+                                    print(f"Could not pack {datablock.name}: {e}")
+                
+                with tracer.span("temp_data.write", "blender") as span:
+                    temp_data.libraries.write(output_path, set(scene_copies), path_remap='NONE', fake_user=True)
+                    span.set(bytes=os.path.getsize(output_path))
+            
+            return True
+        
+        except Exception as e:
+            print(f"Error exporting blend file: {e}")
+            metrics.errors.labels(operation='export_blend').inc()
             return False
+        
+        finally:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+    
+    @staticmethod
+    def apply_render_overrides(scene, render_settings: Dict[str, Any]):
+        """Apply job render settings to a scene"""
+        if 'engine' in render_settings:
+            engine = RENDER_ENGINE_IDS.get(render_settings['engine'], render_settings['engine'])
+            try:
+                scene.render.engine = engine
+            except TypeError:
+                # Blender 4.2 renamed Eevee to BLENDER_EEVEE_NEXT
+                scene.render.engine = f"{engine}_NEXT"
+        
+        if 'format' in render_settings:
+            scene.render.image_settings.file_format = RENDER_FORMAT_IDS.get(render_settings['format'], render_settings['format'])
+        
+        if 'samples' in render_settings:
+            if scene.render.engine == 'CYCLES':
+                scene.cycles.samples = render_settings['samples']
+            elif hasattr(scene, 'eevee'):
+                scene.eevee.taa_render_samples = render_settings['samples']
+        
+        if 'frame_start' in render_settings:
+            scene.frame_start = render_settings['frame_start']
+        
+        if 'frame_end' in render_settings:
+            scene.frame_end = render_settings['frame_end']
+        
+        if 'resolution_percentage' in render_settings:
+            scene.render.resolution_percentage = render_settings['resolution_percentage']
+        
+        if 'camera' in render_settings:
+            camera = scene.objects.get(render_settings['camera'])
+            if camera is not None and camera.type == 'CAMERA':
+                scene.camera = camera
+        
+        if 'view_layer' in render_settings:
+            for view_layer in scene.view_layers:
+                view_layer.use = view_layer.name == render_settings['view_layer']
+    
+    @staticmethod
+    def find_unpacked_files() -> list:
+        """List external files the open blend references but does not contain"""
+        import bpy
+        
+        unpacked = []
+        for datablocks in (bpy.data.images, bpy.data.sounds, bpy.data.fonts, bpy.data.libraries):
+            for datablock in datablocks:
+                if datablock.filepath in ('', '<builtin>') or getattr(datablock, 'packed_file', None):
+                    continue
+                if getattr(datablock, 'source', 'FILE') in ('FILE', 'SEQUENCE', 'MOVIE', 'TILED'):
+                    unpacked.append(datablock.filepath)
+        return unpacked
     
     @staticmethod
     def validate_scene() -> Dict[str, Any]:
@@ -192,7 +1022,7 @@ class BlenderJobManager:
                 'issues': issues,
                 'warnings': warnings
             }
-            
+        
         except Exception as e:
             return {
                 'valid': False,
@@ -200,49 +1030,271 @@ class BlenderJobManager:
                 'warnings': []
             }
 
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def to_epoch(value) -> int:
+    """Epoch seconds from an epoch number or a TIMESTAMP_FORMAT string (0 if empty or unparseable)"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if not value:
+        return 0
+    try:
+        # TIMESTAMP_FORMAT is ISO 8601 with a space, which fromisoformat parses much faster than strptime
+        return int(datetime.fromisoformat(value).timestamp())
+    except ValueError:
+        return 0
+
+def _numpy():
+    """NumPy if it can be imported (Blender bundles it), else None"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
 class JobTracker:
-    """Tracks and manages job history"""
+    """Tracks and manages job history in compact columns
+    
+    Histories can reach 100k jobs, so there is no dict per job: each field is
+    a typed array indexed by row, statuses are small integer codes,
+    timestamps are epoch seconds, and CIDs and other strings live in one
+    table and are stored as indices. Strings that repeat across jobs (the
+    blend CID shared by the variants of one upload, group IDs, variant
+    summaries) are interned; per-job CIDs are stored once without the lookup
+    dict. Aggregates run on the raw column buffers with NumPy when it is
+    available. get_job() and friends still return plain dicts, built on demand.
+    """
+    
+    # Statuses this version does not know (e.g. added to the contract later) are kept as UNKNOWN
+    UNKNOWN = 'UNKNOWN'
+    STATUSES = tuple(status for status, _, _ in JOB_STATUS_TYPES) + (UNKNOWN,)
+    STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+    ACTIVE_STATUSES = ('PENDING', 'IN_PROGRESS')
+    STRING_FIELDS = ('ipfs_hash', 'blend_hash', 'root_hash', 'result_hash', 'variant', 'group_id')
+    SHARED_FIELDS = ('blend_hash', 'root_hash', 'variant', 'group_id')
     
     def __init__(self):
-        self.jobs = []
+        self._clear()
+    
+    def _clear(self):
+        self._job_ids = []
+        self._rows = {}
+        self._status = array('b')
+        self._reward = array('d')
+        self._deadline = array('i')
+        self._submitted_at = array('q')
+        self._status_changed_at = array('q')
+        self._strings = {field: array('i') for field in self.STRING_FIELDS}
+        self._table = [""]
+        self._interned = {"": 0}
+        self._free = []  # table slots of per-job strings that were overwritten with nothing
+    
+    def __len__(self) -> int:
+        return len(self._job_ids)
+    
+    def _intern(self, value: str) -> int:
+        index = self._interned.get(value)
+        if index is None:
+            index = self._interned[value] = len(self._table)
+            self._table.append(value)
+        return index
+    
+    def _store(self, field: str, value: str, row: Optional[int] = None) -> int:
+        if field in self.SHARED_FIELDS:
+            return self._intern(value)
+        
+        # A per-job string is only referenced by its own row, so an overwrite reuses its slot
+        index = self._strings[field][row] if row is not None else 0
+        if not value:
+            if index:
+                self._table[index] = ""
+                self._free.append(index)
+            return 0
+        if not index:
+            if self._free:
+                index = self._free.pop()
+            else:
+                index = len(self._table)
+                self._table.append("")
+        self._table[index] = value
+        return index
+    
+    def _status_code(self, status: str) -> int:
+        return self.STATUS_CODES.get(status, self.STATUS_CODES[self.UNKNOWN])
     
     def add_job(self, job_data: Dict[str, Any]) -> str:
-        """Add a new job to tracking"""
+        """Add a new job to tracking (a job ID that is already tracked is overwritten)"""
         job_id = job_data.get('job_id', '')
-        self.jobs.append(job_data)
+        row = self._rows.get(job_id)
+        submitted_at = to_epoch(job_data.get('submitted_at') or job_data.get('submission_time')) or int(time.time())
+        values = (
+            (self._status, self._status_code(job_data.get('status', 'PENDING'))),
+            (self._reward, float(job_data.get('reward', 0.0))),
+            (self._deadline, int(job_data.get('deadline', 0))),
+            (self._submitted_at, submitted_at),
+            (self._status_changed_at, to_epoch(job_data.get('status_changed_at')) or submitted_at),
+        ) + tuple((self._strings[field], self._store(field, job_data.get(field) or "", row)) for field in self.STRING_FIELDS)
+        
+        if row is None:
+            self._rows[job_id] = len(self._job_ids)
+            self._job_ids.append(job_id)
+            for column, value in values:
+                column.append(value)
+        else:
+            for column, value in values:
+                column[row] = value
         return job_id
     
     def update_job_status(self, job_id: str, status: str) -> bool:
-        """Update the status of a tracked job"""
-        for job in self.jobs:
-            if job.get('job_id') == job_id:
-                job['status'] = status
-                return True
-        return False
+        """Update the status of a tracked job; False if unknown or not a forward transition"""
+        row = self._rows.get(job_id)
+        if row is None:
+            return False
+        
+        current = self.STATUSES[self._status[row]]
+        if current == self.UNKNOWN:
+            # Nothing is known about where an unknown status sits, so any known status replaces it
+            allowed = status in self.STATUS_CODES and status != self.UNKNOWN
+        else:
+            allowed = status in JOB_STATUS_TRANSITIONS.get(current, ())
+        if not allowed:
+            return False
+        self._status[row] = self.STATUS_CODES[status]
+        self._status_changed_at[row] = int(time.time())
+        return True
+    
+    def _job(self, row: int) -> Dict[str, Any]:
+        job = {
+            'job_id': self._job_ids[row],
+            'status': self.STATUSES[self._status[row]],
+            'reward': self._reward[row],
+            'deadline': self._deadline[row],
+            'submitted_at': self._submitted_at[row],
+            'status_changed_at': self._status_changed_at[row],
+        }
+        for field in self.STRING_FIELDS:
+            job[field] = self._table[self._strings[field][row]]
+        return job
     
     def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Get job data by ID"""
-        for job in self.jobs:
-            if job.get('job_id') == job_id:
-                return job
-        return None
+        row = self._rows.get(job_id)
+        return self._job(row) if row is not None else None
+    
+    def _rows_with_status(self, statuses) -> List[int]:
+        codes = [self.STATUS_CODES[status] for status in statuses if status in self.STATUS_CODES]
+        np = _numpy()
+        if np is not None and self._job_ids:
+            return np.flatnonzero(np.isin(np.frombuffer(self._status, dtype=np.int8), codes)).tolist()
+        return [row for row, code in enumerate(self._status) if code in codes]
     
     def get_active_jobs(self) -> list:
         """Get all active (pending/in progress) jobs"""
-        return [job for job in self.jobs if job.get('status') in ['PENDING', 'IN_PROGRESS']]
+        return [self._job(row) for row in self._rows_with_status(self.ACTIVE_STATUSES)]
+    
+    def status_counts(self) -> Dict[str, int]:
+        """Number of jobs in each status"""
+        np = _numpy()
+        if np is not None and self._job_ids:
+            counts = np.bincount(np.frombuffer(self._status, dtype=np.int8), minlength=len(self.STATUSES)).tolist()
+        else:
+            counts = [0] * len(self.STATUSES)
+            for code in self._status:
+                counts[code] += 1
+        return dict(zip(self.STATUSES, counts))
+    
+    def total_reward(self, status: str = 'COMPLETED') -> float:
+        """Sum of the rewards of jobs in status"""
+        if status not in self.STATUS_CODES:
+            return 0.0
+        np = _numpy()
+        if np is not None and self._job_ids:
+            mask = np.frombuffer(self._status, dtype=np.int8) == self.STATUS_CODES[status]
+            return float(np.frombuffer(self._reward, dtype=np.float64)[mask].sum())
+        code = self.STATUS_CODES[status]
+        return sum(reward for reward, job_code in zip(self._reward, self._status) if job_code == code)
+    
+    def job_ids_by_submission(self, newest_first: bool = True) -> List[str]:
+        """Job IDs ordered by submission time"""
+        np = _numpy()
+        if np is not None and self._job_ids:
+            order = np.argsort(np.frombuffer(self._submitted_at, dtype=np.int64), kind='stable')
+            rows = order[::-1] if newest_first else order
+            return [self._job_ids[row] for row in rows.tolist()]
+        rows = sorted(range(len(self._job_ids)), key=self._submitted_at.__getitem__, reverse=newest_first)
+        return [self._job_ids[row] for row in rows]
     
     def cleanup_old_jobs(self, max_jobs: int = 50):
         """Remove old jobs to keep history manageable"""
-        if len(self.jobs) > max_jobs:
-            # Keep most recent jobs
-            self.jobs = self.jobs[-max_jobs:]
+        if len(self._job_ids) > max_jobs:
+            # Keep most recent jobs; the string table is rebuilt so dropped and overwritten CIDs are freed too
+            jobs = [self._job(row) for row in range(len(self._job_ids) - max_jobs, len(self._job_ids))]
+            self._clear()
+            for job in jobs:
+                self.add_job(job)
+
+def build_job_sidecar(blend_hash, overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the job description that is uploaded next to the base blend
+    
+    Workers fetch the blend by its CID and apply the overrides before rendering,
+    so one uploaded blend can serve any number of render variants. A blend
+    given as a delta reference needs a worker that understands version 2.
+    """
+    return {
+        'version': DELTA_SIDECAR_VERSION if isinstance(blend_hash, dict) else SIDECAR_VERSION,
+        'blend': blend_hash,
+        'overrides': overrides,
+    }
+
+def blend_ref_cid(blend_ref) -> str:
+    """CID that identifies a blend reference: the CID itself, or the CID of a delta"""
+    if isinstance(blend_ref, dict):
+        return blend_ref['delta']
+    return blend_ref
+
+def describe_overrides(overrides: Dict[str, Any]) -> str:
+    """Short human readable summary of render overrides, e.g. 'CYCLES PNG 128spp 50%'"""
+    parts = [overrides.get('engine', ''), overrides.get('format', '')]
+    if 'samples' in overrides:
+        parts.append(f"{overrides['samples']}spp")
+    if 'resolution_percentage' in overrides:
+        parts.append(f"{overrides['resolution_percentage']}%")
+    if 'frame_start' in overrides:
+        parts.append(f"f{overrides['frame_start']}-{overrides.get('frame_end', overrides['frame_start'])}")
+    if 'camera' in overrides:
+        parts.append(overrides['camera'])
+    if 'view_layer' in overrides:
+        parts.append(overrides['view_layer'])
+    return " ".join(part for part in parts if part)
+
+def get_data_dir() -> str:
+    """Directory for VeriFrame state that outlives a Blender session"""
+    try:
+        import bpy
+        path = bpy.utils.user_resource('CONFIG', path="veriframe", create=True)
+    except ImportError:
+        path = os.path.join(os.path.expanduser("~"), ".config", "veriframe")
+        os.makedirs(path, exist_ok=True)
+    return path
+
+def canonical_json(data: Any) -> bytes:
+    """Canonical JSON encoding, so identical documents map to the same CID"""
+    return json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+def write_json_atomic(path: str, data: Any):
+    """Write JSON so readers never see a half-written file"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
 
 def calculate_file_hash(file_path: str) -> str:
     """Calculate SHA256 hash of a file"""
     hash_sha256 = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_sha256.update(chunk)
+    with tracer.span("hash_file", "io", bytes=os.path.getsize(file_path)):
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+                hash_sha256.update(chunk)
     return hash_sha256.hexdigest()
 
 def format_file_size(size_bytes: int) -> str: